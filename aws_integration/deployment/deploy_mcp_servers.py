@@ -4,10 +4,15 @@ Deploy TRACE MCP Servers to AWS Bedrock AgentCore
 This script deploys both MCP servers:
 1. Principal Tools Server - Health, remediation, dashboard, JSON tools
 2. Regional Coordinator Server - Regional coordination and edge agent tools
+
+Each server is built from its own directory under deployment/build/, holding
+the server file, the modules it imports (tool_limits.py and the telemetry_core
+package from the TRACE root) and its requirements.txt.
 """
 
 import sys
 import os
+import shutil
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "AWS-Hackathon"))
 
@@ -25,6 +30,41 @@ import json
 import argparse
 from cognito_utils import create_agentcore_role, setup_cognito_user_pool
 
+DEPLOYMENT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACE_ROOT = os.path.dirname(os.path.dirname(DEPLOYMENT_DIR))
+BUILD_DIR = os.path.join(DEPLOYMENT_DIR, "build")
+# Imported by the servers, copied into every build directory
+TOOL_LIMITS_FILE = os.path.join(
+    TRACE_ROOT, "aws_integration", "mcp_servers", "tool_limits.py"
+)
+TELEMETRY_CORE_DIR = os.path.join(TRACE_ROOT, "telemetry_core")
+
+
+def stage_server_build(server_name, server_file, requirements_file):
+    """
+    Copy a server and everything it imports from TRACE into a build directory.
+
+    Args:
+        server_name: Name of the server (the build directory's name)
+        server_file: Path to the server file
+        requirements_file: Requirements of the server
+
+    Returns:
+        Path of the build directory
+    """
+    build_dir = os.path.join(BUILD_DIR, server_name)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    shutil.copy2(server_file, build_dir)
+    shutil.copy2(TOOL_LIMITS_FILE, build_dir)
+    shutil.copy2(requirements_file, os.path.join(build_dir, "requirements.txt"))
+    shutil.copytree(
+        TELEMETRY_CORE_DIR,
+        os.path.join(build_dir, "telemetry_core"),
+        ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+    )
+    return build_dir
+
 
 def deploy_mcp_server(server_name, server_file, port=8000):
     """
@@ -78,27 +118,38 @@ def deploy_mcp_server(server_name, server_file, port=8000):
                 """mcp>=1.0.0
 fastmcp>=0.1.0
 boto3>=1.35.50
+numpy>=1.24.0
+pandas>=2.1.0
 """
             )
         print(f"✅ Requirements file created")
 
-    # Configure AgentCore runtime
+    # Stage the server with the shared telemetry_core package
+    build_dir = stage_server_build(server_name, server_file, requirements_file)
+    print(f"✅ Build directory staged: {build_dir}")
+
+    # Configure and launch the AgentCore runtime from the build directory
     print(f"\nConfiguring AgentCore runtime...")
     agentcore_runtime = Runtime()
-    agentcore_runtime.configure(
-        entrypoint=server_file,
-        execution_role=agentcore_role["Role"]["Arn"],
-        auto_create_ecr=True,
-        requirements_file=requirements_file,
-        region=region,
-        authorizer_configuration=auth_config,
-        agent_name=server_name,
-    )
+    working_dir = os.getcwd()
+    os.chdir(build_dir)
+    try:
+        agentcore_runtime.configure(
+            entrypoint=os.path.basename(server_file),
+            execution_role=agentcore_role["Role"]["Arn"],
+            auto_create_ecr=True,
+            requirements_file="requirements.txt",
+            region=region,
+            authorizer_configuration=auth_config,
+            agent_name=server_name,
+        )
 
-    # Launch the runtime
-    print(f"\nLaunching AgentCore runtime...")
-    print("This may take several minutes...")
-    launch_result = agentcore_runtime.launch()
+        # Launch the runtime
+        print(f"\nLaunching AgentCore runtime...")
+        print("This may take several minutes...")
+        launch_result = agentcore_runtime.launch()
+    finally:
+        os.chdir(working_dir)
 
     print(f"\n✅ {server_name} deployed successfully!")
     print(f"   Agent ARN: {launch_result.agent_arn}")
@@ -6,14 +6,21 @@ This server exposes all Principal Agent tools via MCP protocol:
 - Remediation tools
 - Dashboard tools
 - JSON data processing tools
+
+Tools are async. The JSON tools parse and analyze whole datasets, so they run
+on the bounded tool pool (tool_limits) instead of the event loop, and are
+turned away with a 429-style error when saturated.
 """
 
 from mcp.server.fastmcp import FastMCP
-from typing import Dict, List, Optional
-import json
+from typing import List
 import random
 from datetime import datetime
-from pathlib import Path
+
+from telemetry_core import engine
+from telemetry_core.dataset_registry import DEFAULT_SESSION
+from telemetry_core.telemetry_query import DEFAULT_LIMIT
+from tool_limits import offloaded, tool_load
 
 # Initialize FastMCP server
 mcp = FastMCP(host="0.0.0.0", stateless_http=True)
@@ -40,8 +47,8 @@ agents_db = {
     },
 }
 
-# Global JSON data storage
-_loaded_json_data = None
+# JSON datasets live in the shared telemetry engine, keyed by session. The server
+# is stateless over HTTP, so clients pass session_id explicitly.
 
 
 # ============================================================================
@@ -50,7 +57,7 @@ _loaded_json_data = None
 
 
 @mcp.tool()
-def check_system_health() -> dict:
+async def check_system_health() -> dict:
     """
     Check overall system health across all agents and infrastructure.
 
@@ -96,7 +103,7 @@ def check_system_health() -> dict:
 
 
 @mcp.tool()
-def get_agent_status(agent_id: str) -> dict:
+async def get_agent_status(agent_id: str) -> dict:
     """
     Get detailed status of a specific agent.
 
@@ -135,7 +142,7 @@ def get_agent_status(agent_id: str) -> dict:
 
 
 @mcp.tool()
-def restart_agent(agent_id: str, reason: str = "manual restart") -> dict:
+async def restart_agent(agent_id: str, reason: str = "manual restart") -> dict:
     """
     Restart a failed or degraded agent.
 
@@ -166,7 +173,7 @@ def restart_agent(agent_id: str, reason: str = "manual restart") -> dict:
 
 
 @mcp.tool()
-def redeploy_agent(agent_id: str, version: str = "latest") -> dict:
+async def redeploy_agent(agent_id: str, version: str = "latest") -> dict:
     """
     Redeploy an agent with new configuration or version.
 
@@ -198,7 +205,7 @@ def redeploy_agent(agent_id: str, version: str = "latest") -> dict:
 
 
 @mcp.tool()
-def reroute_traffic(
+async def reroute_traffic(
     from_agent: str, to_agent: str, traffic_percentage: int = 100
 ) -> dict:
     """
@@ -230,14 +237,14 @@ def reroute_traffic(
 
 
 @mcp.tool()
-def generate_health_dashboard() -> dict:
+async def generate_health_dashboard() -> dict:
     """
     Generate a comprehensive health dashboard for all systems.
 
     Returns:
         Dashboard data with visualizations and metrics
     """
-    health_data = check_system_health()
+    health_data = await check_system_health()
 
     return {
         "dashboard_type": "system_health",
@@ -265,7 +272,7 @@ def generate_health_dashboard() -> dict:
 
 
 @mcp.tool()
-def get_system_metrics(time_range: str = "1h", metric_types: str = "all") -> dict:
+async def get_system_metrics(time_range: str = "1h", metric_types: str = "all") -> dict:
     """
     Get comprehensive system metrics over a time range.
 
@@ -296,6 +303,7 @@ def get_system_metrics(time_range: str = "1h", metric_types: str = "all") -> dic
                 "bandwidth_utilization_percent": random.randint(40, 80),
                 "packet_loss_percent": random.uniform(0, 0.5),
             },
+            "mcp_tool_load": tool_load(),
         },
         "trends": {
             "energy_savings": "increasing",
@@ -311,109 +319,84 @@ def get_system_metrics(time_range: str = "1h", metric_types: str = "all") -> dic
 
 
 @mcp.tool()
-def add_json_data(json_path: str) -> dict:
+@offloaded
+def add_json_data(
+    json_path: str,
+    dataset_name: str = None,
+    session_id: str = DEFAULT_SESSION,
+    streaming: bool = False,
+) -> dict:
     """
-    Load and validate JSON data from a file path for analysis.
+    Load and validate JSON (or CSV) data from a file path for analysis.
 
     Args:
-        json_path: Path to JSON file (absolute or relative)
+        json_path: Path to JSON, NDJSON or CSV file (absolute or relative)
+        dataset_name: Name to load the data under (defaults to the file name)
+        session_id: Session the dataset belongs to
+        streaming: Parse record-by-record and keep only running aggregates,
+            for files too large to hold in memory
 
     Returns:
         Load status with record count and sample data
     """
-    global _loaded_json_data
-
-    try:
-        json_file = Path(json_path)
-
-        # If relative path, make it relative to TRACE root
-        if not json_file.is_absolute():
-            # Try to find TRACE root
-            trace_root = Path(__file__).parent.parent.parent
-            json_file = trace_root / json_path
-
-        if not json_file.exists():
-            return {
-                "status": "error",
-                "message": f"File not found: {json_file}",
-                "suggestion": "Please provide a valid file path",
-            }
-
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if isinstance(data, list):
-            num_records = len(data)
-            sample = data[0] if data else {}
-        elif isinstance(data, dict):
-            num_records = 1
-            sample = data
-        else:
-            return {"status": "error", "message": "Invalid JSON structure"}
-
-        _loaded_json_data = {
-            "path": str(json_file),
-            "data": data,
-            "loaded_at": datetime.now().isoformat(),
-            "num_records": num_records,
-        }
+    return engine.add_json_data(
+        json_path, streaming, dataset_name, session_id=session_id
+    )
 
-        return {
-            "status": "success",
-            "message": f"Successfully loaded {num_records} records",
-            "file_path": str(json_file),
-            "num_records": num_records,
-            "sample_record": sample,
-            "fields": list(sample.keys()) if isinstance(sample, dict) else [],
-        }
 
-    except Exception as e:
-        return {"status": "error", "message": f"Error loading file: {str(e)}"}
+@mcp.tool()
+async def list_json_datasets(session_id: str = DEFAULT_SESSION) -> dict:
+    """
+    List the JSON datasets loaded in a session.
+
+    Args:
+        session_id: Session to list
+
+    Returns:
+        Loaded datasets, with the active one marked
+    """
+    return engine.list_json_datasets(session_id=session_id)
 
 
 @mcp.tool()
+@offloaded
 def analyze_json_data_with_llm(
-    analysis_type: str = "comprehensive", focus_areas: str = "all"
+    analysis_type: str = "comprehensive",
+    focus_areas: str = "all",
+    dataset_name: str = None,
+    session_id: str = DEFAULT_SESSION,
 ) -> dict:
     """
     Analyze loaded JSON data for insights and recommendations.
 
     Args:
         analysis_type: Type of analysis (comprehensive, energy, congestion, health, prediction)
-        focus_areas: Areas to focus on (all, towers, regions, errors, performance, recommendations)
+        focus_areas: Comma-separated areas to focus on (all, towers, regions, errors, performance, recommendations)
+        dataset_name: Loaded dataset to analyze (defaults to the last one loaded)
+        session_id: Session the dataset belongs to
 
     Returns:
         Analysis results with insights and recommendations
     """
-    global _loaded_json_data
-
-    if _loaded_json_data is None:
-        return {
-            "status": "error",
-            "message": "No JSON data loaded",
-            "suggestion": "Use add_json_data() first",
-        }
-
-    data = _loaded_json_data["data"]
-    records = data if isinstance(data, list) else [data]
-
-    # Perform analysis
-    analysis = {
-        "status": "success",
-        "analysis_type": analysis_type,
-        "focus_areas": focus_areas,
-        "num_records": len(records),
-        "summary": _analyze_summary(records),
-        "insights": _analyze_insights(records, analysis_type),
-        "recommendations": _generate_recommendations(records, analysis_type),
-    }
-
-    return analysis
+    areas = [area.strip() for area in focus_areas.split(",") if area.strip()]
+    return engine.analyze_json_data_with_llm(
+        analysis_type,
+        None if areas in ([], ["all"]) else areas,
+        dataset_name,
+        session_id=session_id,
+    )
 
 
 @mcp.tool()
+@offloaded
 def get_recommendations_from_json(
-    tower_id: str = None, region_id: str = None, metric_focus: str = "all"
+    tower_id: str = None,
+    region_id: str = None,
+    metric_focus: str = "all",
+    dataset_name: str = None,
+    session_id: str = DEFAULT_SESSION,
+    start_time: str = None,
+    end_time: str = None,
 ) -> dict:
     """
     Get specific recommendations from loaded JSON data.
@@ -422,188 +405,116 @@ def get_recommendations_from_json(
         tower_id: Specific tower to focus on
         region_id: Specific region to focus on
         metric_focus: Metric focus (all, energy, bandwidth, latency, errors)
+        dataset_name: Loaded dataset to use (defaults to the last one loaded)
+        session_id: Session the dataset belongs to
+        start_time: Only use records at or after this ISO-8601 time
+        end_time: Only use records before this ISO-8601 time
 
     Returns:
         Specific recommendations with priorities
     """
-    global _loaded_json_data
-
-    if _loaded_json_data is None:
-        return {"status": "error", "message": "No JSON data loaded"}
+    return engine.get_recommendations_from_json(
+        tower_id,
+        region_id,
+        metric_focus,
+        dataset_name,
+        start_time,
+        end_time,
+        session_id=session_id,
+    )
 
-    data = _loaded_json_data["data"]
-    records = data if isinstance(data, list) else [data]
 
-    # Filter data
-    if tower_id:
-        records = [r for r in records if r.get("tower_id") == tower_id]
-    if region_id:
-        records = [r for r in records if r.get("region_id") == region_id]
+@mcp.tool()
+@offloaded
+def query_json_data(
+    aggregates: List[str] = None,
+    group_by: List[str] = None,
+    where: List[str] = None,
+    start_time: str = None,
+    end_time: str = None,
+    order_by: str = None,
+    descending: bool = True,
+    limit: int = DEFAULT_LIMIT,
+    dataset_name: str = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Filter, group and aggregate loaded JSON data in one call.
 
-    recommendations = _generate_recommendations(records, metric_focus)
+    Args:
+        aggregates: Aggregates such as "count", "avg(latency_ms)", "p95(latency_ms)"
+        group_by: Fields to group by, e.g. ["region_id"]
+        where: Filters such as "latency_ms > 100" or "detected_error != none"
+        start_time: Only use records at or after this ISO-8601 time
+        end_time: Only use records before this ISO-8601 time
+        order_by: Output column to sort groups by
+        descending: Sort order for order_by
+        limit: Maximum number of groups returned
+        dataset_name: Loaded dataset to query (defaults to the last one loaded)
+        session_id: Session the dataset belongs to
 
-    return {
-        "status": "success",
-        "scope": {
-            "tower_id": tower_id or "all towers",
-            "region_id": region_id or "all regions",
-            "metric_focus": metric_focus,
-        },
-        "records_analyzed": len(records),
-        "recommendations": recommendations,
-    }
+    Returns:
+        One row per group with the requested aggregates
+    """
+    return engine.query_json_data(
+        aggregates,
+        group_by,
+        where,
+        start_time,
+        end_time,
+        order_by,
+        descending,
+        limit,
+        dataset_name,
+        session_id=session_id,
+    )
 
 
 @mcp.tool()
-def compare_json_datasets(json_path1: str, json_path2: str) -> dict:
+@offloaded
+def compare_json_datasets(
+    json_path1: str,
+    json_path2: str,
+    session_id: str = DEFAULT_SESSION,
+    streaming: bool = False,
+) -> dict:
     """
     Compare two JSON datasets to identify changes and trends.
 
+    Files already loaded in the session are reused; the session's active
+    dataset is left unchanged.
+
     Args:
         json_path1: Path to first JSON file (baseline)
         json_path2: Path to second JSON file (comparison)
+        session_id: Session to load the datasets into
+        streaming: Diff files that are not loaded yet straight from disk
 
     Returns:
-        Comparison analysis
+        Comparison analysis with per-tower and per-region changes
     """
-    # Load both datasets
-    result1 = add_json_data(json_path1)
-    if result1["status"] != "success":
-        return result1
-
-    data1 = _loaded_json_data["data"]
-
-    result2 = add_json_data(json_path2)
-    if result2["status"] != "success":
-        return result2
-
-    data2 = _loaded_json_data["data"]
-
-    # Perform comparison
-    records1 = data1 if isinstance(data1, list) else [data1]
-    records2 = data2 if isinstance(data2, list) else [data2]
-
-    comparison = {
-        "status": "success",
-        "dataset1": {"path": json_path1, "records": len(records1)},
-        "dataset2": {"path": json_path2, "records": len(records2)},
-        "changes": {
-            "record_count_change": len(records2) - len(records1),
-            "metric_changes": _compare_metrics(records1, records2),
-        },
-    }
-
-    return comparison
-
-
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
-
-
-def _analyze_summary(records: List[dict]) -> dict:
-    """Generate summary statistics."""
-    if not records:
-        return {}
+    return engine.compare_json_datasets(
+        json_path1, json_path2, streaming, session_id=session_id
+    )
 
-    return {
-        "total_records": len(records),
-        "unique_towers": len(set(r.get("tower_id", "") for r in records)),
-        "avg_bandwidth_util": round(
-            sum(r.get("bandwidth_utilization_pct", 0) for r in records) / len(records),
-            2,
-        ),
-        "avg_latency_ms": round(
-            sum(r.get("latency_ms", 0) for r in records) / len(records), 2
-        ),
-    }
 
+@mcp.tool()
+@offloaded
+def append_json_data(
+    json_path: str, dataset_name: str = None, session_id: str = DEFAULT_SESSION
+) -> dict:
+    """
+    Append new telemetry records to a loaded dataset.
 
-def _analyze_insights(records: List[dict], analysis_type: str) -> List[str]:
-    """Generate insights based on analysis type."""
-    insights = []
-
-    if analysis_type in ["comprehensive", "energy"]:
-        low_usage = [r for r in records if r.get("bandwidth_utilization_pct", 100) < 30]
-        if low_usage:
-            insights.append(
-                f"🔋 {len(low_usage)} records show energy optimization opportunity (<30% bandwidth utilization)"
-            )
-
-    if analysis_type in ["comprehensive", "congestion"]:
-        high_usage = [r for r in records if r.get("bandwidth_utilization_pct", 0) > 70]
-        if high_usage:
-            insights.append(
-                f"⚠️ {len(high_usage)} records show congestion risk (>70% bandwidth utilization)"
-            )
-
-    if analysis_type in ["comprehensive", "health"]:
-        errors = [
-            r for r in records if r.get("detected_error") not in ["none", None, ""]
-        ]
-        if errors:
-            insights.append(
-                f"🔴 {len(errors)} records contain errors requiring attention"
-            )
-
-    return insights
-
-
-def _generate_recommendations(records: List[dict], focus: str) -> List[dict]:
-    """Generate actionable recommendations."""
-    recommendations = []
-
-    if focus in ["all", "energy"]:
-        low_usage = [r for r in records if r.get("bandwidth_utilization_pct", 100) < 30]
-        if low_usage:
-            towers = sorted(set(r.get("tower_id", "") for r in low_usage))[:5]
-            recommendations.append(
-                {
-                    "priority": "HIGH",
-                    "category": "Energy Optimization",
-                    "title": "Implement Power Saving Mode",
-                    "affected_towers": towers,
-                    "expected_impact": "30-40% energy savings",
-                    "action": "Schedule TRX shutdowns during low-traffic periods",
-                }
-            )
-
-    if focus in ["all", "bandwidth"]:
-        high_usage = [r for r in records if r.get("bandwidth_utilization_pct", 0) > 70]
-        if high_usage:
-            towers = sorted(set(r.get("tower_id", "") for r in high_usage))[:5]
-            recommendations.append(
-                {
-                    "priority": "HIGH",
-                    "category": "Congestion Management",
-                    "title": "Prevent Network Congestion",
-                    "affected_towers": towers,
-                    "expected_impact": "Maintain QoS",
-                    "action": "Enable load balancing and expand coverage",
-                }
-            )
-
-    return recommendations[:5]
-
-
-def _compare_metrics(records1: List[dict], records2: List[dict]) -> dict:
-    """Compare metrics between two datasets."""
-    if not records1 or not records2:
-        return {}
-
-    metrics = {}
-    for metric in ["bandwidth_utilization_pct", "latency_ms"]:
-        avg1 = sum(r.get(metric, 0) for r in records1) / len(records1)
-        avg2 = sum(r.get(metric, 0) for r in records2) / len(records2)
-        change = ((avg2 - avg1) / avg1 * 100) if avg1 != 0 else 0
-
-        metrics[metric] = {
-            "dataset1_avg": round(avg1, 2),
-            "dataset2_avg": round(avg2, 2),
-            "change_percent": round(change, 2),
-        }
+    Args:
+        json_path: File with the new records (JSON array/object, NDJSON or CSV)
+        dataset_name: Dataset to extend (defaults to the last one loaded)
+        session_id: Session the dataset belongs to
 
-    return metrics
+    Returns:
+        Number of records appended and the new size of the dataset
+    """
+    return engine.append_json_data(json_path, dataset_name, session_id=session_id)
 
 
 if __name__ == "__main__":
@@ -613,7 +524,9 @@ if __name__ == "__main__":
     print("  - Remediation: restart_agent, redeploy_agent, reroute_traffic")
     print("  - Dashboard: generate_health_dashboard, get_system_metrics")
     print("  - JSON Processing: add_json_data, analyze_json_data_with_llm,")
-    print("                     get_recommendations_from_json, compare_json_datasets")
+    print("                     get_recommendations_from_json, query_json_data,")
+    print("                     compare_json_datasets, append_json_data,")
+    print("                     list_json_datasets")
     print("\nServer running on http://0.0.0.0:8000/mcp")
 
     mcp.run(transport="streamable-http")
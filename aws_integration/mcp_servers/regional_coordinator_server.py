@@ -6,49 +6,81 @@ This server exposes Regional Coordinator and Edge Agent tools via MCP protocol:
 - Policy enforcement
 - Load balancing
 - Edge agent tools (monitoring, prediction, decision, action, learning)
+
+Tools are async handlers that answer without blocking the event loop; anything
+slow belongs on the bounded tool pool (tool_limits.offloaded).
 """
 
 from mcp.server.fastmcp import FastMCP
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional
+import os
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+
+import numpy as np
+
+from telemetry_core.telemetry_fleet import open_fleet
+from tool_limits import offloaded
 
 # Initialize FastMCP server
 mcp = FastMCP(host="0.0.0.0", stateless_http=True)
 
+# Largest number of towers one batch tool call may cover
+BATCH_MAX_TOWERS = int(os.environ.get("MCP_BATCH_MAX_TOWERS", "1000"))
+# Decimals kept for float columns in batch results
+BATCH_DECIMALS = 2
+
+# Power model of a site: baseline draw plus a share per active transceiver
+IDLE_POWER_KW = 1.0
+TRANSCEIVER_POWER_KW = 0.2
+USERS_PER_TRANSCEIVER = 125
+DEFAULT_CAPACITY_USERS = 1000
+# Transceivers kept active at any load, as a share of those installed
+MIN_ACTIVE_SHARE = 0.25
+TIME_RANGES = {"1h": 3600, "6h": 6 * 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+# Relative change below which a metric's trend counts as stable
+TREND_TOLERANCE = 0.05
+
+# Shared fleet state: every telemetry tool reads the same towers and samples
+_fleet = open_fleet()
+
 # ============================================================================
 # REGIONAL COORDINATOR TOOLS
 # ============================================================================
 
 
 @mcp.tool()
-def aggregate_telemetry(region_id: str = "region_east", tower_ids: str = "all") -> dict:
+@offloaded
+def aggregate_telemetry(region_id: str = None, tower_ids: str = "all") -> dict:
     """
-    Aggregate telemetry from multiple towers in a region.
+    Aggregate the latest telemetry of multiple towers in a region.
 
     Args:
-        region_id: Region identifier
+        region_id: Region identifier (defaults to the whole fleet)
         tower_ids: Comma-separated tower IDs or 'all'
 
     Returns:
         Aggregated telemetry data
     """
-    tower_list = (
-        tower_ids.split(",")
-        if tower_ids != "all"
-        else [f"tower_{i}" for i in range(1, 11)]
-    )
+    tower_list = _tower_list(region_id, tower_ids)
+    error = _check_towers(region_id, tower_list)
+    if error is not None:
+        return error
 
     telemetry_data = []
     for tower_id in tower_list:
+        latest = _fleet.latest(tower_id)
+        load = latest.get("bandwidth_utilization_pct")
         telemetry_data.append(
             {
-                "tower_id": tower_id.strip(),
-                "timestamp": datetime.now().isoformat(),
-                "bandwidth_utilization_pct": random.randint(20, 85),
-                "latency_ms": random.randint(10, 100),
-                "active_connections": random.randint(100, 2000),
-                "power_consumption_kwh": random.uniform(50, 250),
+                "tower_id": tower_id,
+                "timestamp": latest["timestamp"],
+                "bandwidth_utilization_pct": load,
+                "latency_ms": latest.get("latency_ms"),
+                "active_connections": latest.get("connected_users"),
+                "power_consumption_kw": round(
+                    _power_draw_kw(_transceivers(latest), load), 2
+                ),
             }
         )
 
@@ -56,11 +88,11 @@ def aggregate_telemetry(region_id: str = "region_east", tower_ids: str = "all")
         telemetry_data
     )
     avg_latency = sum(t["latency_ms"] for t in telemetry_data) / len(telemetry_data)
-    total_power = sum(t["power_consumption_kwh"] for t in telemetry_data)
+    total_power = sum(t["power_consumption_kw"] for t in telemetry_data)
 
     return {
-        "region_id": region_id,
-        "timestamp": datetime.now().isoformat(),
+        "region_id": region_id or "all",
+        "timestamp": _fleet_time(),
         "num_towers": len(telemetry_data),
         "aggregated_metrics": {
             "avg_bandwidth_utilization_pct": round(avg_bandwidth, 2),
@@ -68,48 +100,73 @@ def aggregate_telemetry(region_id: str = "region_east", tower_ids: str = "all")
             "total_active_connections": sum(
                 t["active_connections"] for t in telemetry_data
             ),
-            "total_power_consumption_kwh": round(total_power, 2),
+            "total_power_consumption_kw": round(total_power, 2),
         },
         "tower_data": telemetry_data[:5],  # Return first 5 for brevity
     }
 
 
 @mcp.tool()
-def get_regional_metrics(
-    region_id: str = "region_east", time_range: str = "1h"
-) -> dict:
+@offloaded
+def get_regional_metrics(region_id: str = None, time_range: str = "1h") -> dict:
     """
     Get regional performance metrics over time.
 
     Args:
-        region_id: Region identifier
-        time_range: Time range (1h, 6h, 24h)
+        region_id: Region identifier (defaults to the whole fleet)
+        time_range: Time range (1h, 6h, 24h, 7d); bounded by the samples kept
+            per tower
 
     Returns:
         Regional metrics
     """
+    if time_range not in TIME_RANGES:
+        return {
+            "status": "error",
+            "message": f"Unknown time range '{time_range}'",
+            "suggestion": f"Use one of {', '.join(TIME_RANGES)}",
+        }
+    towers = _tower_list(region_id, "all")
+    error = _check_towers(region_id, towers)
+    if error is not None:
+        return error
+
+    windows = [_fleet.window(t, seconds=TIME_RANGES[time_range]) for t in towers]
+    bandwidth = np.concatenate([w["bandwidth_utilization_pct"] for w in windows])
+    latency = np.concatenate([w["latency_ms"] for w in windows])
+    errors = np.concatenate([w["errors"] for w in windows])
+    energy = sum(
+        _energy_kwh(w, _transceivers(_fleet.latest(t))) for t, w in zip(towers, windows)
+    )
+    # Halves of the window in time, for the trends
+    halves = [
+        np.concatenate([w[field][: len(w["times"]) // 2] for w in windows])
+        for field in ("bandwidth_utilization_pct", "latency_ms")
+    ]
+
     return {
-        "region_id": region_id,
+        "region_id": region_id or "all",
         "time_range": time_range,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _fleet_time(),
+        "num_towers": len(towers),
+        "samples": int(len(bandwidth)),
+        "window_hours": round(max(_span_hours(w) for w in windows), 2),
         "metrics": {
-            "avg_bandwidth_utilization_pct": random.randint(40, 75),
-            "peak_bandwidth_utilization_pct": random.randint(80, 95),
-            "avg_latency_ms": random.randint(15, 50),
-            "total_energy_consumption_kwh": random.uniform(500, 2000),
-            "energy_savings_pct": random.randint(25, 40),
-            "service_quality_score": random.uniform(0.90, 0.99),
+            "avg_bandwidth_utilization_pct": _mean(bandwidth),
+            "peak_bandwidth_utilization_pct": _rounded(float(np.nanmax(bandwidth))),
+            "avg_latency_ms": _mean(latency),
+            "total_energy_consumption_kwh": round(energy, 2),
+            "service_quality_score": round(1 - float(errors.mean()), 3),
         },
         "trends": {
-            "bandwidth": "stable",
-            "latency": "improving",
-            "energy_efficiency": "improving",
+            "bandwidth": _trend(halves[0], bandwidth, "increasing", "decreasing"),
+            "latency": _trend(halves[1], latency, "worsening", "improving"),
         },
     }
 
 
 @mcp.tool()
-def enforce_policy(
+async def enforce_policy(
     policy_name: str, region_id: str = "region_east", parameters: str = "{}"
 ) -> dict:
     """
@@ -140,7 +197,7 @@ def enforce_policy(
 
 
 @mcp.tool()
-def validate_action(
+async def validate_action(
     action_type: str, target_tower: str, parameters: str = "{}"
 ) -> dict:
     """
@@ -181,7 +238,7 @@ def validate_action(
 
 
 @mcp.tool()
-def balance_load(region_id: str = "region_east", strategy: str = "auto") -> dict:
+async def balance_load(region_id: str = "region_east", strategy: str = "auto") -> dict:
     """
     Balance load across towers in a region.
 
@@ -212,6 +269,7 @@ def balance_load(region_id: str = "region_east", strategy: str = "auto") -> dict
 
 
 @mcp.tool()
+@offloaded
 def get_tower_status(tower_id: str) -> dict:
     """
     Get detailed status of a specific tower.
@@ -222,24 +280,7 @@ def get_tower_status(tower_id: str) -> dict:
     Returns:
         Tower status and metrics
     """
-    return {
-        "tower_id": tower_id,
-        "timestamp": datetime.now().isoformat(),
-        "status": random.choice(
-            ["operational", "operational", "operational", "degraded"]
-        ),
-        "health_score": random.uniform(0.85, 0.99),
-        "current_metrics": {
-            "bandwidth_utilization_pct": random.randint(30, 80),
-            "active_connections": random.randint(200, 1500),
-            "latency_ms": random.randint(10, 60),
-            "packet_loss_pct": random.uniform(0, 1),
-            "power_consumption_kwh": random.uniform(80, 200),
-            "active_transceivers": random.randint(6, 12),
-            "signal_strength_dbm": random.uniform(-70, -50),
-        },
-        "alerts": [],
-    }
+    return _check_towers(None, [tower_id]) or _tower_status(tower_id)
 
 
 # ============================================================================
@@ -248,56 +289,35 @@ def get_tower_status(tower_id: str) -> dict:
 
 
 @mcp.tool()
-def collect_ran_kpis(tower_id: str = "tower_1") -> dict:
+@offloaded
+def collect_ran_kpis(tower_id: str = None) -> dict:
     """
     Collect Radio Access Network Key Performance Indicators.
 
     Args:
-        tower_id: ID of the tower to monitor
+        tower_id: ID of the tower to monitor (defaults to the first tower)
 
     Returns:
-        RAN KPIs
+        Latest RAN KPIs and their last-hour averages
     """
-    return {
-        "tower_id": tower_id,
-        "timestamp": datetime.now().isoformat(),
-        "kpis": {
-            "active_connections": random.randint(500, 2500),
-            "throughput_mbps": random.uniform(100, 1000),
-            "latency_ms": random.randint(10, 100),
-            "packet_loss_percent": random.uniform(0, 2),
-            "signal_strength_dbm": random.uniform(-90, -50),
-            "handover_success_rate": random.uniform(0.95, 0.99),
-            "call_drop_rate": random.uniform(0, 0.02),
-            "resource_utilization_percent": random.uniform(30, 90),
-        },
-    }
+    tower_id = tower_id or _fleet.towers()[0]
+    return _check_towers(None, [tower_id]) or _ran_kpis(tower_id)
 
 
 @mcp.tool()
-def collect_power_metrics(tower_id: str = "tower_1") -> dict:
+@offloaded
+def collect_power_metrics(tower_id: str = None) -> dict:
     """
     Collect power consumption metrics from tower equipment.
 
     Args:
-        tower_id: ID of the tower to monitor
+        tower_id: ID of the tower to monitor (defaults to the first tower)
 
     Returns:
         Power metrics
     """
-    return {
-        "tower_id": tower_id,
-        "timestamp": datetime.now().isoformat(),
-        "power_metrics": {
-            "total_consumption_kwh": random.uniform(50, 250),
-            "active_transceivers": random.randint(4, 12),
-            "idle_transceivers": random.randint(0, 4),
-            "power_saving_mode": random.choice([True, False]),
-            "efficiency_percent": random.uniform(70, 95),
-            "temperature_celsius": random.randint(35, 65),
-            "cooling_power_kwh": random.uniform(10, 50),
-        },
-    }
+    tower_id = tower_id or _fleet.towers()[0]
+    return _check_towers(None, [tower_id]) or _power_metrics(tower_id)
 
 
 # ============================================================================
@@ -306,89 +326,68 @@ def collect_power_metrics(tower_id: str = "tower_1") -> dict:
 
 
 @mcp.tool()
-def forecast_traffic_load(tower_id: str = "tower_1", hours_ahead: int = 4) -> dict:
+@offloaded
+def forecast_traffic_load(tower_id: str = None, hours_ahead: int = 4) -> dict:
     """
     Forecast traffic load for upcoming hours.
 
     Args:
-        tower_id: Tower to forecast
+        tower_id: Tower to forecast (defaults to the first tower)
         hours_ahead: Number of hours to forecast
 
     Returns:
         Traffic forecast
     """
-    forecast = []
-    current_load = random.randint(40, 70)
-
-    for i in range(hours_ahead):
-        time_point = datetime.now() + timedelta(hours=i + 1)
-        # Simulate daily pattern
-        hour = time_point.hour
-        if 9 <= hour <= 18:  # Peak hours
-            load = random.randint(60, 90)
-        elif 22 <= hour or hour <= 6:  # Low hours
-            load = random.randint(20, 40)
-        else:
-            load = random.randint(40, 70)
-
-        forecast.append(
-            {
-                "timestamp": time_point.isoformat(),
-                "predicted_load_pct": load,
-                "confidence": random.uniform(0.80, 0.95),
-            }
-        )
-
-    return {
-        "tower_id": tower_id,
-        "forecast_timestamp": datetime.now().isoformat(),
-        "hours_ahead": hours_ahead,
-        "current_load_pct": current_load,
-        "forecast": forecast,
-        "recommendations": [
-            (
-                "Energy saving opportunity"
-                if f["predicted_load_pct"] < 35
-                else "Normal operation"
-            )
-            for f in forecast
-        ],
-    }
+    tower_id = tower_id or _fleet.towers()[0]
+    return _check_towers(None, [tower_id]) or _traffic_forecast(tower_id, hours_ahead)
 
 
 @mcp.tool()
-def detect_traffic_surge(
-    region_id: str = "region_east", threshold_pct: int = 80
-) -> dict:
+@offloaded
+def detect_traffic_surge(region_id: str = None, threshold_pct: int = 80) -> dict:
     """
     Detect potential traffic surges in a region.
 
+    A tower is affected when its current load or its forecast for the next
+    hour reaches the threshold.
+
     Args:
-        region_id: Region to monitor
+        region_id: Region to monitor (defaults to the whole fleet)
         threshold_pct: Surge detection threshold
 
     Returns:
         Surge detection results
     """
-    surge_detected = random.choice([True, False, False])  # 33% chance
+    towers = _tower_list(region_id, "all")
+    error = _check_towers(region_id, towers)
+    if error is not None:
+        return error
 
-    if surge_detected:
+    peaks = {}
+    for tower_id in towers:
+        forecast = _traffic_forecast(tower_id, 1)
+        peaks[tower_id] = max(
+            forecast["current_load_pct"], forecast["forecast"][0]["predicted_load_pct"]
+        )
+    affected = [tower_id for tower_id, peak in peaks.items() if peak >= threshold_pct]
+
+    if affected:
         return {
             "surge_detected": True,
-            "region_id": region_id,
-            "timestamp": datetime.now().isoformat(),
-            "affected_towers": [f"tower_{i}" for i in range(1, random.randint(3, 6))],
-            "predicted_peak_load_pct": random.randint(85, 95),
-            "estimated_time_to_peak": f"{random.randint(15, 60)} minutes",
+            "region_id": region_id or "all",
+            "timestamp": _fleet_time(),
+            "affected_towers": affected,
+            "predicted_peak_load_pct": round(max(peaks.values()), 1),
+            "estimated_time_to_peak": "within 1 hour",
             "recommendation": "Activate backup cells and enable load balancing",
         }
     else:
         return {
             "surge_detected": False,
-            "region_id": region_id,
-            "timestamp": datetime.now().isoformat(),
+            "region_id": region_id or "all",
+            "timestamp": _fleet_time(),
             "current_status": "normal",
-            "avg_load_pct": random.randint(40, 70),
+            "avg_load_pct": round(sum(peaks.values()) / len(peaks), 1),
         }
 
 
@@ -398,6 +397,7 @@ def detect_traffic_surge(
 
 
 @mcp.tool()
+@offloaded
 def make_energy_decision(tower_id: str, current_load: int, forecast_load: int) -> dict:
     """
     Make energy optimization decision based on current and forecast load.
@@ -410,36 +410,13 @@ def make_energy_decision(tower_id: str, current_load: int, forecast_load: int) -
     Returns:
         Energy optimization decision
     """
-    if forecast_load < 30:
-        decision = "shutdown_partial_trx"
-        trx_to_shutdown = random.randint(2, 4)
-        energy_savings_kwh = random.uniform(20, 40)
-    elif forecast_load < 50:
-        decision = "reduce_power"
-        trx_to_shutdown = random.randint(1, 2)
-        energy_savings_kwh = random.uniform(10, 20)
-    else:
-        decision = "maintain_full_capacity"
-        trx_to_shutdown = 0
-        energy_savings_kwh = 0
-
-    return {
-        "tower_id": tower_id,
-        "decision": decision,
-        "timestamp": datetime.now().isoformat(),
-        "current_load_pct": current_load,
-        "forecast_load_pct": forecast_load,
-        "trx_to_shutdown": trx_to_shutdown,
-        "estimated_energy_savings_kwh": round(energy_savings_kwh, 2),
-        "safety_score": random.uniform(0.90, 0.99),
-        "recommendation": (
-            "Safe to execute" if trx_to_shutdown > 0 else "Maintain current state"
-        ),
-    }
+    return _check_towers(None, [tower_id]) or _energy_decision(
+        tower_id, current_load, forecast_load
+    )
 
 
 @mcp.tool()
-def make_congestion_decision(
+async def make_congestion_decision(
     tower_id: str, current_load: int, predicted_surge: bool
 ) -> dict:
     """
@@ -485,7 +462,7 @@ def make_congestion_decision(
 
 
 @mcp.tool()
-def shutdown_trx(tower_id: str, trx_ids: str) -> dict:
+async def shutdown_trx(tower_id: str, trx_ids: str) -> dict:
     """
     Shutdown specified transceivers for energy saving.
 
@@ -513,7 +490,7 @@ def shutdown_trx(tower_id: str, trx_ids: str) -> dict:
 
 
 @mcp.tool()
-def activate_backup_cell(tower_id: str, cell_id: str) -> dict:
+async def activate_backup_cell(tower_id: str, cell_id: str) -> dict:
     """
     Activate backup cell to handle traffic surge.
 
@@ -542,7 +519,7 @@ def activate_backup_cell(tower_id: str, cell_id: str) -> dict:
 
 
 @mcp.tool()
-def analyze_performance(workflow_type: str, time_range_days: int = 7) -> dict:
+async def analyze_performance(workflow_type: str, time_range_days: int = 7) -> dict:
     """
     Analyze workflow performance over time.
 
@@ -577,7 +554,7 @@ def analyze_performance(workflow_type: str, time_range_days: int = 7) -> dict:
 
 
 @mcp.tool()
-def retrain_model(model_name: str, dataset_size: int = 1000) -> dict:
+async def retrain_model(model_name: str, dataset_size: int = 1000) -> dict:
     """
     Retrain ML model with new data.
 
@@ -605,11 +582,418 @@ def retrain_model(model_name: str, dataset_size: int = 1000) -> dict:
     }
 
 
+# ============================================================================
+# BATCH TOOLS
+# ============================================================================
+# One call covers a list of towers or a whole region, so sweeping a region is
+# one round trip instead of one per tower. Results are columnar: the per-tower
+# fields are listed once in "columns" and each tower is one row.
+
+
+@mcp.tool()
+@offloaded
+def get_tower_status_batch(region_id: str = None, tower_ids: str = "all") -> dict:
+    """
+    Get the status and current metrics of many towers in one call.
+
+    Args:
+        region_id: Region whose towers to cover when tower_ids is 'all'
+            (defaults to the whole fleet)
+        tower_ids: Comma-separated tower IDs or 'all'
+
+    Returns:
+        One row per tower, plus the towers per status
+    """
+    return _batch(region_id, tower_ids, _tower_status, "status")
+
+
+@mcp.tool()
+@offloaded
+def collect_ran_kpis_batch(region_id: str = None, tower_ids: str = "all") -> dict:
+    """
+    Collect RAN KPIs from many towers in one call.
+
+    Args:
+        region_id: Region whose towers to cover when tower_ids is 'all'
+            (defaults to the whole fleet)
+        tower_ids: Comma-separated tower IDs or 'all'
+
+    Returns:
+        One row of KPIs per tower
+    """
+    return _batch(region_id, tower_ids, _ran_kpis)
+
+
+@mcp.tool()
+@offloaded
+def collect_power_metrics_batch(
+    region_id: str = None, tower_ids: str = "all"
+) -> dict:
+    """
+    Collect power metrics from many towers in one call.
+
+    Args:
+        region_id: Region whose towers to cover when tower_ids is 'all'
+            (defaults to the whole fleet)
+        tower_ids: Comma-separated tower IDs or 'all'
+
+    Returns:
+        One row of power metrics per tower
+    """
+    return _batch(region_id, tower_ids, _power_metrics)
+
+
+@mcp.tool()
+@offloaded
+def forecast_traffic_load_batch(
+    region_id: str = None, tower_ids: str = "all", hours_ahead: int = 4
+) -> dict:
+    """
+    Forecast the hourly traffic load of many towers in one call.
+
+    Args:
+        region_id: Region whose towers to cover when tower_ids is 'all'
+            (defaults to the whole fleet)
+        tower_ids: Comma-separated tower IDs or 'all'
+        hours_ahead: Number of hours to forecast
+
+    Returns:
+        One row per tower: current load and predicted load per hour
+    """
+    return _batch(
+        region_id,
+        tower_ids,
+        lambda tower_id: _forecast_row(_traffic_forecast(tower_id, hours_ahead)),
+    )
+
+
+@mcp.tool()
+@offloaded
+def make_energy_decision_batch(
+    region_id: str = None, tower_ids: str = "all", hours_ahead: int = 4
+) -> dict:
+    """
+    Make energy optimization decisions for many towers in one call.
+
+    Each tower's current load and its peak forecast load over the next
+    hours_ahead hours feed the same decision as make_energy_decision.
+
+    Args:
+        region_id: Region whose towers to cover when tower_ids is 'all'
+            (defaults to the whole fleet)
+        tower_ids: Comma-separated tower IDs or 'all'
+        hours_ahead: Forecast horizon whose peak load the decision must cover
+
+    Returns:
+        One decision row per tower, plus the towers per decision and the
+        total estimated savings
+    """
+
+    def decide(tower_id: str) -> dict:
+        forecast = _traffic_forecast(tower_id, hours_ahead)
+        peak = max(
+            (f["predicted_load_pct"] for f in forecast["forecast"]),
+            default=forecast["current_load_pct"],
+        )
+        return _energy_decision(tower_id, forecast["current_load_pct"], peak)
+
+    result = _batch(region_id, tower_ids, decide, "decision")
+    if result["status"] == "success":
+        savings = result["columns"].index("estimated_energy_savings_kwh")
+        result["total_energy_savings_kwh"] = round(
+            sum(row[savings] for row in result["rows"]), BATCH_DECIMALS
+        )
+    return result
+
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+
+def _fleet_time() -> str:
+    """Current simulated time of the fleet, ISO 8601."""
+    return datetime.fromtimestamp(_fleet.now(), timezone.utc).isoformat()
+
+
+def _tower_list(region_id: Optional[str], tower_ids: str) -> List[str]:
+    """Tower IDs named in a comma-separated list, or all towers of the region."""
+    if tower_ids.strip() == "all":
+        return _fleet.towers(region_id)
+    return [tower_id.strip() for tower_id in tower_ids.split(",") if tower_id.strip()]
+
+
+def _check_towers(region_id: Optional[str], towers: List[str]) -> Optional[dict]:
+    """Error payload if the region or any of the towers is not in the fleet."""
+    if region_id is not None and region_id not in _fleet.regions():
+        return {
+            "status": "error",
+            "message": f"Unknown region '{region_id}'",
+            "available_regions": _fleet.regions(),
+        }
+    if not towers:
+        return {"status": "error", "message": "No tower IDs given"}
+    unknown = [tower_id for tower_id in towers if tower_id not in _fleet]
+    if unknown:
+        return {
+            "status": "error",
+            "message": f"Unknown towers: {', '.join(unknown[:5])}"
+            + (f" and {len(unknown) - 5} more" if len(unknown) > 5 else ""),
+            "suggestion": "Use get_tower_status_batch(region_id) to list towers",
+        }
+    return None
+
+
+def _batch(
+    region_id: Optional[str],
+    tower_ids: str,
+    collect: Callable[[str], dict],
+    count_by: Optional[str] = None,
+) -> dict:
+    """Run a per-tower collector over many towers into one columnar result."""
+    towers = _tower_list(region_id, tower_ids)
+    if len(towers) > BATCH_MAX_TOWERS:
+        return {
+            "status": "error",
+            "message": f"{len(towers)} towers requested, at most {BATCH_MAX_TOWERS}",
+            "suggestion": "Split the towers over several calls",
+        }
+    error = _check_towers(region_id, towers)
+    if error is not None:
+        return error
+
+    records = [_flatten(collect(tower_id)) for tower_id in towers]
+    columns = [column for column in records[0] if column != "timestamp"]
+    result = {
+        "status": "success",
+        "region_id": region_id or "all",
+        "timestamp": _fleet_time(),
+        "num_towers": len(records),
+        "columns": columns,
+        "rows": [[_rounded(r.get(column)) for column in columns] for r in records],
+    }
+    if count_by is not None:
+        counts: Dict[str, int] = {}
+        for record in records:
+            counts[record[count_by]] = counts.get(record[count_by], 0) + 1
+        result[f"towers_by_{count_by}"] = counts
+    return result
+
+
+def _flatten(record: dict) -> dict:
+    """Lift nested metric groups (e.g. "kpis") into the record's own fields."""
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+    return flat
+
+
+def _forecast_row(forecast: dict) -> dict:
+    """One flat record per tower forecast: current load and load per hour."""
+    row = {
+        "tower_id": forecast["tower_id"],
+        "timestamp": forecast["forecast_timestamp"],
+        "current_load_pct": forecast["current_load_pct"],
+    }
+    for hour, point in enumerate(forecast["forecast"], 1):
+        row[f"load_pct_h{hour}"] = point["predicted_load_pct"]
+    row["min_confidence"] = min(
+        (point["confidence"] for point in forecast["forecast"]), default=None
+    )
+    return row
+
+
+def _rounded(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, BATCH_DECIMALS)
+    return value
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    if not np.isfinite(values).any():
+        return None
+    return round(float(np.nanmean(values)), BATCH_DECIMALS)
+
+
+def _trend(first_half: np.ndarray, values: np.ndarray, up: str, down: str) -> str:
+    """Direction of a metric: mean of the whole window against its first half."""
+    if not (np.isfinite(first_half).any() and np.isfinite(values).any()):
+        return "stable"
+    before, overall = np.nanmean(first_half), np.nanmean(values)
+    change = (overall - before) / abs(before) if before else 0.0
+    if change > TREND_TOLERANCE:
+        return up
+    if change < -TREND_TOLERANCE:
+        return down
+    return "stable"
+
+
+def _transceivers(record: dict) -> int:
+    """Transceivers installed at a tower, from its user capacity."""
+    capacity = record.get("capacity_users") or DEFAULT_CAPACITY_USERS
+    return max(1, round(capacity / USERS_PER_TRANSCEIVER))
+
+
+def _active_transceivers(total: int, load_pct: Any) -> Any:
+    """Transceivers needed for a load (scalar or array), never below the floor."""
+    load = np.nan_to_num(np.asarray(load_pct, dtype=float))
+    share = np.maximum(load / 100, MIN_ACTIVE_SHARE)
+    active = np.minimum(np.ceil(total * share), total)
+    return int(active) if active.ndim == 0 else active
+
+
+def _power_draw_kw(total: int, load_pct: Any) -> Any:
+    """Estimated site power draw at a load: baseline plus active transceivers."""
+    return IDLE_POWER_KW + TRANSCEIVER_POWER_KW * _active_transceivers(total, load_pct)
+
+
+def _span_hours(window: Dict[str, np.ndarray]) -> float:
+    """Hours covered by a window of samples, the last one's interval included."""
+    times = window["times"]
+    if len(times) < 2:
+        return 0.0
+    return float(times[-1] - times[0] + np.median(np.diff(times))) / 3600
+
+
+def _energy_kwh(window: Dict[str, np.ndarray], total: int) -> float:
+    """Estimated energy a tower used over a window of samples."""
+    if not len(window["times"]):
+        return 0.0
+    draw = _power_draw_kw(total, window["bandwidth_utilization_pct"])
+    return float(np.mean(draw)) * _span_hours(window)
+
+
+def _tower_status(tower_id: str) -> dict:
+    """Status and current metrics of one tower."""
+    latest = _fleet.latest(tower_id)
+    errors = _fleet.window(tower_id)["errors"]
+    error = latest.get("detected_error")
+    healthy = error in ("none", None, "")
+    load = latest.get("bandwidth_utilization_pct")
+    total = _transceivers(latest)
+    return {
+        "tower_id": tower_id,
+        "region_id": latest.get("region_id"),
+        "timestamp": latest["timestamp"],
+        "status": "operational" if healthy else "degraded",
+        "health_score": round(1 - float(errors.mean()), 3),
+        "current_metrics": {
+            "bandwidth_utilization_pct": load,
+            "active_connections": latest.get("connected_users"),
+            "latency_ms": latest.get("latency_ms"),
+            "packet_loss_pct": latest.get("packet_loss_pct"),
+            "power_consumption_kw": round(_power_draw_kw(total, load), 2),
+            "active_transceivers": _active_transceivers(total, load),
+            "rsrq_db": latest.get("rsrq_db"),
+        },
+        "alerts": [] if healthy else [error],
+    }
+
+
+def _ran_kpis(tower_id: str) -> dict:
+    """Latest RAN KPIs of one tower, with their averages over the last hour."""
+    latest = _fleet.latest(tower_id)
+    window = _fleet.window(tower_id, seconds=3600)
+    return {
+        "tower_id": tower_id,
+        "timestamp": latest["timestamp"],
+        "kpis": {
+            "active_connections": latest.get("connected_users"),
+            "bandwidth_utilization_pct": latest.get("bandwidth_utilization_pct"),
+            "latency_ms": latest.get("latency_ms"),
+            "packet_loss_pct": latest.get("packet_loss_pct"),
+            "rsrq_db": latest.get("rsrq_db"),
+            "cpu_util_pct": latest.get("cpu_util_pct"),
+            "coverage_gap_pct": latest.get("coverage_gap_pct"),
+        },
+        "last_hour": {
+            "samples": len(window["times"]),
+            "avg_bandwidth_utilization_pct": _mean(window["bandwidth_utilization_pct"]),
+            "avg_latency_ms": _mean(window["latency_ms"]),
+            "avg_packet_loss_pct": _mean(window["packet_loss_pct"]),
+            "error_rate": round(float(window["errors"].mean()), 3),
+        },
+    }
+
+
+def _power_metrics(tower_id: str) -> dict:
+    """Estimated power draw and transceiver use of one tower."""
+    latest = _fleet.latest(tower_id)
+    total = _transceivers(latest)
+    active = _active_transceivers(total, latest.get("bandwidth_utilization_pct"))
+    return {
+        "tower_id": tower_id,
+        "timestamp": latest["timestamp"],
+        "power_metrics": {
+            "current_draw_kw": round(IDLE_POWER_KW + TRANSCEIVER_POWER_KW * active, 2),
+            "last_hour_consumption_kwh": round(
+                _energy_kwh(_fleet.window(tower_id, seconds=3600), total), 2
+            ),
+            "active_transceivers": active,
+            "idle_transceivers": total - active,
+            "power_saving_mode": active < total,
+            "supply_voltage_v": latest.get("power_voltage_v"),
+        },
+    }
+
+
+def _traffic_forecast(tower_id: str, hours_ahead: int) -> dict:
+    """Hourly load forecast of one tower (see TowerFleet.forecast)."""
+    forecast = _fleet.forecast(tower_id, hours_ahead)
+    forecast["recommendations"] = [
+        (
+            "Energy saving opportunity"
+            if f["predicted_load_pct"] < 35
+            else "Normal operation"
+        )
+        for f in forecast["forecast"]
+    ]
+    return forecast
+
+
+def _energy_decision(tower_id: str, current_load: int, forecast_load: int) -> dict:
+    """Energy decision for one tower from its current and forecast load."""
+    total = _transceivers(_fleet.latest(tower_id))
+    surplus = _active_transceivers(total, current_load) - _active_transceivers(
+        total, forecast_load
+    )
+    if forecast_load < 30:
+        decision = "shutdown_partial_trx"
+    elif forecast_load < 50:
+        decision = "reduce_power"
+    else:
+        decision = "maintain_full_capacity"
+    trx_to_shutdown = max(surplus, 0) if decision != "maintain_full_capacity" else 0
+
+    return {
+        "tower_id": tower_id,
+        "decision": decision,
+        "timestamp": _fleet_time(),
+        "current_load_pct": current_load,
+        "forecast_load_pct": forecast_load,
+        "trx_to_shutdown": trx_to_shutdown,
+        # Per hour the transceivers stay off
+        "estimated_energy_savings_kwh": round(
+            trx_to_shutdown * TRANSCEIVER_POWER_KW, 2
+        ),
+        "safety_score": round(1 - float(_fleet.window(tower_id)["errors"].mean()), 3),
+        "recommendation": (
+            "Safe to execute" if trx_to_shutdown > 0 else "Maintain current state"
+        ),
+    }
+
+
 if __name__ == "__main__":
     print("Starting Regional Coordinator & Edge Agents MCP Server...")
     print("Available tools:")
     print("  - Regional: aggregate_telemetry, get_regional_metrics, enforce_policy,")
     print("              validate_action, balance_load, get_tower_status")
+    print("  - Batch: get_tower_status_batch, collect_ran_kpis_batch,")
+    print("           collect_power_metrics_batch, forecast_traffic_load_batch,")
+    print("           make_energy_decision_batch")
     print("  - Monitoring: collect_ran_kpis, collect_power_metrics")
     print("  - Prediction: forecast_traffic_load, detect_traffic_surge")
     print("  - Decision: make_energy_decision, make_congestion_decision")
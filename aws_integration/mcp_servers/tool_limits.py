@@ -0,0 +1,142 @@
+"""
+Bounded Execution of MCP Tool Calls
+
+The MCP servers serve every client from one asyncio event loop (stateless
+HTTP), so a tool that parses or analyzes for seconds inline stalls all other
+clients, health checks included. Tools decorated with @offloaded instead:
+1. Run on a bounded thread pool (MCP_TOOL_WORKERS threads), leaving the event
+   loop free for cheap tools and other clients
+2. Hold one of the tool's concurrency slots while queued or running
+   (MCP_TOOL_CONCURRENCY per tool, "tool_name=slots,..." overrides in
+   MCP_TOOL_LIMITS)
+3. Are rejected right away, 429-style, when the tool has no free slot or
+   MCP_TOOL_QUEUE calls are already waiting for a worker. The rejection carries
+   a retry hint based on the tool's recent run time
+
+Threads rather than processes: loaded datasets live in this process, numpy
+releases the GIL for the bulk of the work, and very large aggregations already
+fan out to worker processes inside the telemetry engine.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+
+MCP_TOOL_WORKERS = int(os.environ.get("MCP_TOOL_WORKERS", "4"))
+DEFAULT_TOOL_CONCURRENCY = int(os.environ.get("MCP_TOOL_CONCURRENCY", "2"))
+# Calls admitted beyond the workers, waiting for a free thread
+MCP_TOOL_QUEUE = int(os.environ.get("MCP_TOOL_QUEUE", "8"))
+# Weight of the latest call in a tool's smoothed run time
+DURATION_SMOOTHING = 0.3
+# Retry hint for tools that have not completed a call yet
+DEFAULT_RETRY_SECONDS = 1.0
+REJECTED_STATUS_CODE = 429
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for entry in value.split(","):
+        name, _, slots = entry.partition("=")
+        if name.strip() and slots.strip():
+            limits[name.strip()] = int(slots)
+    return limits
+
+
+TOOL_LIMITS = _parse_limits(os.environ.get("MCP_TOOL_LIMITS", ""))
+
+
+def tool_limit(tool_name: str) -> int:
+    """Number of calls of a tool that may be queued or running at once."""
+    return TOOL_LIMITS.get(tool_name, DEFAULT_TOOL_CONCURRENCY)
+
+
+def tool_load() -> dict:
+    """Snapshot of the offloaded calls: in flight and rejected, per tool."""
+    with _lock:
+        return {
+            "workers": MCP_TOOL_WORKERS,
+            "in_flight": {name: n for name, n in _in_flight.items() if n},
+            "waiting": max(0, _total - MCP_TOOL_WORKERS),
+            "rejected": dict(_rejected),
+            "avg_seconds": {
+                name: round(seconds, 3) for name, seconds in _durations.items()
+            },
+        }
+
+
+def offloaded(func: Callable[..., dict]) -> Callable[..., Awaitable[dict]]:
+    """
+    Turn a blocking tool into an async one run on the bounded tool pool.
+
+    The wrapper keeps the tool's name, docstring and signature, so MCP declares
+    it exactly as the undecorated function.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        global _total
+        with _lock:
+            if (
+                _in_flight.get(name, 0) >= tool_limit(name)
+                or _total >= MCP_TOOL_WORKERS + MCP_TOOL_QUEUE
+            ):
+                _rejected[name] = _rejected.get(name, 0) + 1
+                return _rejection(name)
+            _in_flight[name] = _in_flight.get(name, 0) + 1
+            _total += 1
+
+        started = time.perf_counter()
+        try:
+            future = _executor.submit(func, *args, **kwargs)
+        except BaseException:
+            _release(name, None)
+            raise
+        # Slots are released when the call finishes, not when the client stops
+        # waiting, so cancelled calls still count against the limits
+        future.add_done_callback(
+            lambda _: _release(name, time.perf_counter() - started)
+        )
+        return await asyncio.wrap_future(future)
+
+    return wrapper
+
+
+def _release(name: str, seconds: Optional[float]) -> None:
+    global _total
+    with _lock:
+        _in_flight[name] -= 1
+        _total -= 1
+        if seconds is not None:
+            previous = _durations.get(name, seconds)
+            _durations[name] = previous + DURATION_SMOOTHING * (seconds - previous)
+
+
+def _rejection(name: str) -> dict:
+    """429-style payload for a call turned away because its tool is saturated."""
+    retry_after = round(max(_durations.get(name, DEFAULT_RETRY_SECONDS), 0.1), 1)
+    return {
+        "status": "error",
+        "error_code": REJECTED_STATUS_CODE,
+        "message": (
+            f"Server busy: {_in_flight.get(name, 0)} {name} calls in progress, "
+            f"{max(0, _total - MCP_TOOL_WORKERS)} waiting for a worker"
+        ),
+        "suggestion": f"Retry in {retry_after} seconds",
+        "retry_after_seconds": retry_after,
+    }
+
+
+_executor = ThreadPoolExecutor(MCP_TOOL_WORKERS, thread_name_prefix="mcp-tool")
+_lock = threading.Lock()
+# Calls queued or running, per tool and in total
+_in_flight: Dict[str, int] = {}
+_total = 0
+_rejected: Dict[str, int] = {}
+# Smoothed run time of each tool, in seconds
+_durations: Dict[str, float] = {}
@@ -182,6 +182,9 @@ From regional_coordinator MCP server:
 - validate_action: Validate proposed actions
 - balance_load: Balance load across towers
 - get_tower_status: Get tower-specific status
+- get_tower_status_batch, collect_ran_kpis_batch, collect_power_metrics_batch,
+  forecast_traffic_load_batch, make_energy_decision_batch: the same for many
+  towers or a whole region in one call (prefer these over per-tower loops)
 - Regional coordinator sub-agent: Delegate to regional coordinator
 
 WORKFLOWS:
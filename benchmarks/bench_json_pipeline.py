@@ -0,0 +1,337 @@
+"""
+Benchmark: JSON Telemetry Analysis Pipeline
+
+Measures how each stage of the telemetry_core engine scales with dataset size, on
+synthetic fleet telemetry with the trace_reduced_20.json schema:
+1. generate  - write the synthetic dataset (JSON array)
+2. load      - add_json_data, parsing the file (no snapshot reuse)
+3. stream    - add_json_data(streaming=True)
+4. analyze   - _perform_analysis(comprehensive) over the loaded records
+5. predict   - analyze_json_data_with_llm("prediction"), from the rollups
+6. sample    - _sample_data_intelligently
+7. filter    - _filter_data by tower, then by time window
+8. compare   - compare_json_datasets(streaming=True) against a second day
+9. append    - append_json_data with 10% more records
+
+For every stage it reports wall time, records/sec, peak RSS and how far RSS
+grew above its level at the start of the stage. Each size runs in a fresh
+subprocess, so peak RSS is not inflated by an earlier, larger run. A 1e6-record
+file is also generated, streamed and loaded (without the other stages), since
+cold-load costs and streaming memory only show at that size. Results can be
+saved as a JSON baseline and later runs checked against it.
+
+Usage:
+    python benchmarks/bench_json_pipeline.py            # 1e3, 1e4, 1e5 (+ 1e6 loads)
+    python benchmarks/bench_json_pipeline.py --sizes 1e3,1e6,1e7
+    python benchmarks/bench_json_pipeline.py --save     # write a new baseline
+    python benchmarks/bench_json_pipeline.py --check    # exit 1 on regressions
+    python benchmarks/bench_json_pipeline.py --load-sizes ""   # skip the 1e6 loads
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path to import TRACE modules
+trace_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(trace_root))
+
+try:
+    import psutil
+except ImportError:  # Fall back to the process-wide peak from getrusage
+    psutil = None
+    import resource
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+# Sizes where only generate, stream and load run, to catch load-path regressions
+# that only show on large files
+DEFAULT_LOAD_SIZES = [1_000_000]
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baselines" / "json_pipeline.json"
+# A stage regresses when it is this much slower (records/sec) or bigger (RSS)
+DEFAULT_TOLERANCE = 0.25
+# RSS changes below this are noise (allocator, import-time caches)
+RSS_SLACK_MB = 20
+# Wall-time changes below this are noise (scheduler jitter on millisecond stages)
+TIME_SLACK_S = 0.02
+RSS_POLL_S = 0.005
+# Timed runs per stage (the fastest counts); stateful stages run once
+REPEAT = 3
+SEED = 0
+
+
+class _PeakRss:
+    """Track the peak resident set size while a block runs."""
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "_PeakRss":
+        self.peak = _rss()
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak = max(self.peak, _rss())
+
+    def _poll(self) -> None:
+        while not self._stop.wait(RSS_POLL_S):
+            self.peak = max(self.peak, _rss())
+
+
+def _rss() -> int:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _measure(
+    num_records: int,
+    stage: Callable[[], object],
+    setup: Optional[Callable[[], None]] = None,
+    repeat: int = REPEAT,
+) -> dict:
+    """Best wall time and highest peak RSS over `repeat` runs of a stage."""
+    seconds, peak, growth = float("inf"), 0, 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        before = _rss()
+        with _PeakRss() as rss:
+            start = time.perf_counter()
+            result = stage()
+            seconds = min(seconds, time.perf_counter() - start)
+        peak = max(peak, rss.peak)
+        growth = max(growth, rss.peak - before)
+        if isinstance(result, dict) and result.get("status") not in (None, "success"):
+            raise RuntimeError(f"Stage failed: {result.get('message')}")
+    return {
+        "seconds": round(seconds, 6),
+        "records_per_sec": round(num_records / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(peak / 2**20, 1),
+        "rss_growth_mb": round(growth / 2**20, 1),
+    }
+
+
+def run_size(
+    num_records: int, workdir: Path, load_only: bool = False
+) -> Dict[str, dict]:
+    """Run every stage (or only generate, stream and load) for one dataset size."""
+    from telemetry_core import engine
+    from telemetry_core.telemetry_synthetic import write_dataset
+
+    engine._parse_cache.persistent = None  # Measure parsing, not snapshot reuse
+    day1 = workdir / f"fleet_{num_records}.json"
+    day2 = workdir / f"fleet_{num_records}_day2.json"
+    delta = workdir / f"fleet_{num_records}_delta.ndjson"
+    # Large sizes run each stage once: a rerun would only repeat minutes of work
+    repeat = 1 if load_only else REPEAT
+
+    results = {}
+    results["generate"] = _measure(
+        num_records, lambda: write_dataset(day1, num_records, seed=SEED), repeat=repeat
+    )
+
+    def stream() -> dict:
+        return engine.add_json_data(str(day1), streaming=True, dataset_name="streamed")
+
+    if load_only:
+        # Before the load, so peak RSS is the stream's, not the loaded dataset's
+        results["stream"] = _measure(num_records, stream, repeat=repeat)
+    results["load"] = _measure(
+        num_records,
+        lambda: engine.add_json_data(str(day1)),
+        setup=engine._parse_cache.clear,
+        repeat=repeat,
+    )
+    if load_only:
+        return results
+    write_dataset(day2, num_records, seed=SEED + 1)
+    write_dataset(delta, max(num_records // 10, 1), seed=SEED + 2)
+    results["stream"] = _measure(num_records, stream)
+
+    name = day1.stem
+    store = engine._registry.get(engine.DEFAULT_SESSION, name)["data"]
+    tower = store.value("tower_id", 0)
+    start = store.value("timestamp", len(store) // 2)
+    results["analyze"] = _measure(
+        num_records, lambda: engine._perform_analysis(store, "comprehensive", [])
+    )
+    # Cleared before each run: a repeat call would be a result cache hit
+    results["predict"] = _measure(
+        num_records,
+        lambda: engine.analyze_json_data_with_llm("prediction", dataset_name=name),
+        setup=engine._result_cache.clear,
+    )
+    results["sample"] = _measure(
+        num_records,
+        lambda: engine._sample_data_intelligently(store, engine.MAX_SAMPLE_RECORDS),
+    )
+    results["filter"] = _measure(
+        num_records,
+        lambda: (
+            engine._filter_data(store, tower, None),
+            engine._filter_data(store, None, None, start_time=start),
+        ),
+    )
+    results["compare"] = _measure(
+        num_records,
+        lambda: engine.compare_json_datasets(str(day1), str(day2), streaming=True),
+    )
+    results["append"] = _measure(
+        num_records // 10 or 1,
+        lambda: engine.append_json_data(str(delta), dataset_name=name),
+        repeat=1,
+    )
+    return results
+
+
+def run(sizes: List[int], load_sizes: List[int] = ()) -> dict:
+    """
+    Run every size in its own subprocess and collect the results.
+
+    Load sizes run only the generate, stream and load stages (sizes that
+    are also in sizes run in full).
+    """
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": {},
+    }
+    runs = [(size, []) for size in sizes]
+    runs += [(size, ["--load-only"]) for size in load_sizes if size not in sizes]
+    for size, options in runs:
+        print(f"Benchmarking {size:,} records...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", str(size), *options],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        report["results"][str(size)] = json.loads(output)
+    return report
+
+
+def compare_to_baseline(
+    report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Regressions of a report against a baseline, as readable lines."""
+    regressions = []
+    for size, stages in report["results"].items():
+        for stage, current in stages.items():
+            base = baseline.get("results", {}).get(size, {}).get(stage)
+            if base is None:
+                continue
+            # Same as records/sec falling by `tolerance`, plus the noise slack
+            slowest = base["seconds"] / (1 - tolerance) + TIME_SLACK_S
+            if base["records_per_sec"] and current["seconds"] > slowest:
+                regressions.append(
+                    f"{stage} @ {size}: {current['records_per_sec']:,.0f} rec/s "
+                    f"(baseline {base['records_per_sec']:,.0f})"
+                )
+            if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance) + (
+                RSS_SLACK_MB
+            ):
+                regressions.append(
+                    f"{stage} @ {size}: peak RSS {current['peak_rss_mb']:.0f} MB "
+                    f"(baseline {base['peak_rss_mb']:.0f} MB)"
+                )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'size':>10} {'stage':<10} {'seconds':>10} {'rec/s':>14} "
+        f"{'peak RSS':>10} {'growth':>10}"
+    )
+    for size, stages in report["results"].items():
+        for stage, result in stages.items():
+            rate = result["records_per_sec"] or 0
+            print(
+                f"{int(size):>10,} {stage:<10} {result['seconds']:>10.4f} "
+                f"{rate:>14,.0f} {result['peak_rss_mb']:>8.1f}MB "
+                f"{result['rss_growth_mb']:>8.1f}MB"
+            )
+
+
+def _parse_sizes(value: str) -> List[int]:
+    return [int(float(size)) for size in value.split(",") if size]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=_parse_sizes,
+        default=DEFAULT_SIZES,
+        help="Comma-separated record counts, e.g. 1e3,1e5,1e7",
+    )
+    parser.add_argument(
+        "--load-sizes",
+        type=_parse_sizes,
+        default=DEFAULT_LOAD_SIZES,
+        help="Record counts that only generate, stream and load ('' for none)",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="Write the results as the baseline"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="Exit 1 if a stage regressed"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", type=Path, help="Also write the results here")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--load-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        with tempfile.TemporaryDirectory() as workdir:
+            print(json.dumps(run_size(args.worker, Path(workdir), args.load_only)))
+        return 0
+
+    report = run(args.sizes, args.load_sizes)
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"No baseline at {args.baseline}; run with --save first")
+            return 1
+        regressions = compare_to_baseline(
+            report, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark: Trace Replay through the Edge Agents
+
+Load-tests the monitoring -> prediction -> decision -> action edge agents by
+replaying recorded (or synthetic) telemetry at an accelerated wall-clock speed,
+after ingesting each record into the tower fleet the predictions read (see
+principal_agent/parent_agents/regional_coordinator/edge_agents/replay.py).
+Reports per stage the calls, failures, errors, throughput and latency
+percentiles, the end-to-end decision latency from a record's due time to its
+last stage, and whether backpressure made the replay fall behind schedule.
+
+Usage:
+    python benchmarks/bench_trace_replay.py                      # trace at 1000x
+    python benchmarks/bench_trace_replay.py --speed 60 --records 500
+    python benchmarks/bench_trace_replay.py --trace synthetic --speed max \\
+        --records 100000 --workers 8
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path to import TRACE modules
+trace_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(trace_root))
+
+from principal_agent.parent_agents.regional_coordinator.edge_agents.replay import (
+    DEFAULT_REPLAY_SEED,
+    DEFAULT_TRACE,
+    replay_trace,
+)  # noqa: E402
+from telemetry_core.telemetry_replay import REPLAY_QUEUE, REPLAY_WORKERS  # noqa: E402
+
+
+DEFAULT_SPEED = 1000.0
+
+
+def print_report(report: dict) -> None:
+    speed = report["speed"] or "max"
+    print(
+        f"{report['records']:,} records from {report['towers']} towers in "
+        f"{report['elapsed_seconds']:.2f}s (speed {speed}, achieved "
+        f"{report['achieved_speed'] or 0:,.0f}x, {report['records_per_s'] or 0:,.0f} "
+        f"rec/s)"
+    )
+    backpressure = report["backpressure"]
+    print(
+        f"backpressure: {backpressure['blocked_puts']} blocked puts "
+        f"({backpressure['blocked_seconds']:.3f}s), max lag "
+        f"{backpressure['max_lag_seconds']:.3f}s"
+    )
+    print(
+        f"{'stage':<12} {'calls':>8} {'failed':>8} {'errors':>7} {'calls/s':>10} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for stage, counters in report["stages"].items():
+        print(
+            f"{stage:<12} {counters['calls']:>8,} {counters['failed']:>8,} "
+            f"{counters['errors']:>7,} {counters['calls_per_s'] or 0:>10,.0f} "
+            + _latencies(counters)
+        )
+    end_to_end = report["end_to_end"]
+    print(
+        f"{'end_to_end':<12} {end_to_end['records']:>8,} {'':>28}"
+        + _latencies(end_to_end)
+    )
+
+
+def _latencies(counters: dict) -> str:
+    return " ".join(
+        f"{counters[key]:>9.3f}" if counters.get(key) is not None else f"{'-':>9}"
+        for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+    )
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    return None if value == "max" else float(value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--trace",
+        default=str(DEFAULT_TRACE),
+        help="Trace file (JSON, NDJSON or CSV) or 'synthetic'",
+    )
+    parser.add_argument(
+        "--speed",
+        type=_parse_speed,
+        default=DEFAULT_SPEED,
+        help="Simulated seconds per wall-clock second, or 'max' for unpaced",
+    )
+    parser.add_argument(
+        "--records", type=int, help="Records to replay (loops the trace if needed)"
+    )
+    parser.add_argument("--workers", type=int, default=REPLAY_WORKERS)
+    parser.add_argument("--queue", type=int, default=REPLAY_QUEUE)
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_REPLAY_SEED,
+        help="Seed of the simulated agent outcomes (repeatable with --workers 1)",
+    )
+    parser.add_argument("--output", type=Path, help="Also write the results here")
+    args = parser.parse_args(argv)
+
+    if args.trace == "synthetic" and args.records is None:
+        parser.error("--trace synthetic needs --records")
+    report = replay_trace(
+        args.trace, args.speed, args.records, args.workers, args.queue, args.seed
+    )
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,9 +17,12 @@ from .tools.remediation import restart_agent, redeploy_agent, reroute_traffic
 from .tools.dashboard import generate_health_dashboard, get_system_metrics
 from .tools.json_data_processor import (
     add_json_data,
+    append_json_data,
     analyze_json_data_with_llm,
     get_recommendations_from_json,
     compare_json_datasets,
+    list_json_datasets,
+    query_json_data,
 )
 
 
@@ -50,10 +53,13 @@ principal_agent = Agent(
     3. JSON: Load → Analyze → Recommend
 
     JSON Usage:
-    • add_json_data("path.json") - Load data
+    • add_json_data("path.json" or ".csv") - Load data
+    • append_json_data(path) - Append new records
     • analyze_json_data_with_llm(type, focus) - Analyze
-    • get_recommendations_from_json(tower, metric) - Get recommendations
+    • get_recommendations_from_json(tower, metric, start/end_time) - Get recommendations
+    • query_json_data(aggregates, group_by, where) - Filtered stats
     • compare_json_datasets(file1, file2) - Compare
+    • list_json_datasets() - Loaded datasets
 
     Analysis Focus:
     - Energy optimization (30-40% savings)
@@ -73,9 +79,12 @@ principal_agent = Agent(
         generate_health_dashboard,
         get_system_metrics,
         add_json_data,
+        append_json_data,
         analyze_json_data_with_llm,
         get_recommendations_from_json,
         compare_json_datasets,
+        list_json_datasets,
+        query_json_data,
     ],
 )
 
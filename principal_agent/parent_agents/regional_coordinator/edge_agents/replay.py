@@ -0,0 +1,141 @@
+"""
+Trace Replay into the Edge Agents
+
+Drives the edge-agent tools from recorded telemetry with the replay engine in
+telemetry_core.telemetry_replay, one pipeline stage per agent:
+1. ingest     - the record joins its tower's recent samples in a TowerFleet fed
+   only by the replay
+2. monitoring - stream_telemetry hands the recorded KPIs to the prediction agent
+   (a failed stream is counted, but the prediction goes ahead: it forecasts
+   from the tower's samples in the fleet, not from the streamed record)
+3. prediction - TowerFleet.forecast for the next hour: the trend of the
+   tower's replayed load, timed from the record's timestamp
+4. decision   - make_congestion_decision when the recorded or forecast load is
+   high, make_energy_decision otherwise
+5. action     - the action tool the decision calls for, if any
+
+The trace defaults to data/trace_reduced_20.csv (the JSON form works as well,
+and a record count beyond the trace loops it with shifted timestamps);
+"synthetic" replays the seeded synthetic fleet instead. Forecasts depend only
+on the replayed records, never on the wall clock; the monitoring, decision and
+action tools draw their simulated outcomes from `random`, which the replay
+seeds, so a replay with one worker is repeatable (more workers interleave the
+draws).
+"""
+
+import random
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from telemetry_core.telemetry_fleet import TowerFleet, replay_source, synthetic_source
+from telemetry_core.telemetry_replay import (
+    REPLAY_QUEUE,
+    REPLAY_WORKERS,
+    Handler,
+    TraceReplay,
+)
+
+from .action_agent.tools import (
+    activate_backup_cells,
+    adjust_power_allocation,
+    shutdown_trx,
+)
+from .decision_xapp_agent.tools import make_congestion_decision, make_energy_decision
+from .monitoring_agent.tools import stream_telemetry
+
+
+DEFAULT_TRACE = Path(__file__).resolve().parents[4] / "data" / "trace_reduced_20.csv"
+# Recorded or forecast load (%) above which congestion, not energy, is decided
+CONGESTION_LOAD_PCT = 70
+SURGE_LOAD_PCT = 80
+# Actions taken for the decisions that call for one
+SHUTDOWN_TRX_IDS = ["trx_3", "trx_4"]
+POWER_SAVING_PCT = 70
+BACKUP_CELLS = 2
+DEFAULT_REPLAY_SEED = 0
+
+
+def monitor(context: dict) -> dict:
+    return stream_telemetry(context["record"], destination="prediction_agent")
+
+
+def decide(context: dict) -> dict:
+    record = context["record"]
+    current_load = record.get("bandwidth_utilization_pct") or 0.0
+    forecast_load = context["prediction"]["forecast"][0]["predicted_load_pct"]
+    if max(current_load, forecast_load) > CONGESTION_LOAD_PCT:
+        return make_congestion_decision(
+            record["tower_id"], current_load, forecast_load > SURGE_LOAD_PCT
+        )
+    return make_energy_decision(record["tower_id"], current_load, forecast_load)
+
+
+def act(context: dict) -> Optional[dict]:
+    tower_id = context["record"]["tower_id"]
+    decision = context["decision"]["decision"]
+    if decision == "shutdown_partial_trx":
+        return shutdown_trx(tower_id, SHUTDOWN_TRX_IDS)
+    if decision == "enable_power_saving":
+        return adjust_power_allocation(tower_id, POWER_SAVING_PCT)
+    if decision == "activate_backup_cells":
+        return activate_backup_cells(tower_id, BACKUP_CELLS)
+    return None  # maintain_current, balance_load (regional) or monitor
+
+
+def edge_stages(fleet: TowerFleet) -> List[Tuple[str, Handler]]:
+    """Edge-agent stages, forecasting from the towers' samples in fleet."""
+
+    def predict(context: dict) -> Optional[dict]:
+        return fleet.forecast(context["record"]["tower_id"], hours_ahead=1)
+
+    return [
+        ("monitoring", monitor),
+        ("prediction", predict),
+        ("decision", decide),
+        ("action", act),
+    ]
+
+
+def replay_trace(
+    trace: str = str(DEFAULT_TRACE),
+    speed: Optional[float] = 1.0,
+    records: Optional[int] = None,
+    workers: int = REPLAY_WORKERS,
+    queue_size: int = REPLAY_QUEUE,
+    seed: Optional[int] = DEFAULT_REPLAY_SEED,
+) -> dict:
+    """
+    Replay a telemetry trace through the edge agents and measure them.
+
+    Args:
+        trace: Trace file (JSON, NDJSON or CSV) or "synthetic"
+        speed: Simulated seconds per wall-clock second; None for unpaced
+        records: Records to replay; None plays a trace file once (required for
+            "synthetic", which never ends)
+        workers: Worker threads
+        queue_size: Records waiting per worker before the replay blocks
+        seed: Seed of the agent tools' simulated outcomes; None leaves
+            `random` as it is
+
+    Returns:
+        Replay counters per stage and end to end (see TraceReplay.run)
+    """
+    if trace == "synthetic":
+        if records is None:
+            raise ValueError("A synthetic replay needs a record count")
+        source = synthetic_source()
+    else:
+        source = replay_source(trace, loop=records is not None)
+    if seed is not None:
+        random.seed(seed)
+    # Fed by the replay's ingest stage only, so it holds the replayed samples
+    fleet = TowerFleet(())
+    replay = TraceReplay(
+        edge_stages(fleet),
+        speed,
+        workers,
+        queue_size,
+        fleet,
+        continue_on_failure=["monitoring"],
+    )
+    return replay.run(source, limit=records)
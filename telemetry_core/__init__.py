@@ -0,0 +1,7 @@
+"""
+TRACE Telemetry Core
+
+Framework-free telemetry engine shared by the ADK principal agent and the MCP
+servers: the columnar store, loaders, indexes, rollups, warehouse, analyzers and
+the tool functions in engine. Depends on numpy and pandas only.
+"""
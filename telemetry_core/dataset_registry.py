@@ -0,0 +1,174 @@
+"""
+Dataset Registry for TRACE JSON Analysis
+
+Keeps every loaded telemetry dataset under a (session, name) handle instead of
+a single module global, so concurrent operator sessions and compare/analyze
+calls never overwrite each other's data:
+1. Named datasets per session, plus an "active" dataset per session
+2. Reference counting while a dataset is in use by a tool call
+3. LRU eviction of idle datasets once the memory budget is exceeded
+4. A generation number per registered dataset, so results derived from one
+   load (or append) of a dataset can be told apart from the next
+"""
+
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_SESSION = "default"
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("DATASET_MEMORY_BUDGET_MB", "1024"))
+
+_Key = Tuple[str, str]
+
+
+def dataset_nbytes(dataset: dict) -> int:
+    """Approximate memory held by a dataset entry (records, rollups, quarantine)."""
+    return sum(
+        getattr(dataset.get(part), "nbytes", 0)
+        for part in ("data", "rollups", "quarantine")
+    )
+
+
+class DatasetRegistry:
+    """Thread-safe registry of loaded datasets keyed by (session_id, name)."""
+
+    def __init__(self, memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_MB << 20):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.RLock()
+        self._datasets: "OrderedDict[_Key, dict]" = OrderedDict()
+        self._refcounts: Dict[_Key, int] = {}
+        self._active: Dict[str, str] = {}
+        self._generations = itertools.count(1)
+
+    def register(
+        self, session_id: str, name: str, dataset: dict, activate: bool = True
+    ) -> dict:
+        """
+        Add (or replace) a dataset and optionally make it the session's active one.
+
+        Callers still holding a replaced dataset keep a valid reference to it;
+        only the registry handle moves to the new data. Every registration gets
+        a new, registry-wide unique dataset["generation"].
+        """
+        dataset["name"] = name
+        dataset["nbytes"] = dataset_nbytes(dataset)
+        key = (session_id, name)
+
+        with self._lock:
+            dataset["generation"] = next(self._generations)
+            self._datasets[key] = dataset
+            self._datasets.move_to_end(key)
+            if activate:
+                self._active[session_id] = name
+            self._evict()
+
+        return dataset
+
+    def get(self, session_id: str, name: Optional[str] = None) -> Optional[dict]:
+        """Look up a dataset by name, or the session's active dataset."""
+        with self._lock:
+            key = self._resolve(session_id, name)
+            if key is None:
+                return None
+            self._datasets.move_to_end(key)
+            return self._datasets[key]
+
+    def find_by_path(self, session_id: str, path: str) -> Optional[dict]:
+        """Most recently used in-memory dataset of a session loaded from path."""
+        with self._lock:
+            for (session, _), dataset in reversed(self._datasets.items()):
+                if (
+                    session == session_id
+                    and dataset.get("path") == path
+                    and dataset.get("data") is not None
+                ):
+                    return dataset
+        return None
+
+    @contextmanager
+    def acquire(
+        self, session_id: str, name: Optional[str] = None
+    ) -> Iterator[Optional[dict]]:
+        """Pin a dataset against eviction for the duration of a tool call."""
+        with self._lock:
+            key = self._resolve(session_id, name)
+            if key is not None:
+                self._datasets.move_to_end(key)
+                self._refcounts[key] = self._refcounts.get(key, 0) + 1
+                dataset = self._datasets[key]
+            else:
+                dataset = None
+
+        try:
+            yield dataset
+        finally:
+            if key is not None:
+                with self._lock:
+                    self._refcounts[key] -= 1
+                    if not self._refcounts[key]:
+                        del self._refcounts[key]
+                    self._evict()
+
+    def remove(self, session_id: str, name: str) -> bool:
+        """Drop a dataset handle. Returns False if it did not exist."""
+        key = (session_id, name)
+        with self._lock:
+            if self._datasets.pop(key, None) is None:
+                return False
+            if self._active.get(session_id) == name:
+                del self._active[session_id]
+            return True
+
+    def clear(self, session_id: Optional[str] = None) -> None:
+        """Drop all datasets of a session, or of every session."""
+        with self._lock:
+            for key in list(self._datasets):
+                if session_id is None or key[0] == session_id:
+                    self.remove(*key)
+
+    def list_datasets(self, session_id: str) -> List[dict]:
+        """Summaries of the datasets loaded in a session, oldest first."""
+        with self._lock:
+            active = self._active.get(session_id)
+            return [
+                {
+                    "name": name,
+                    "path": dataset.get("path"),
+                    "num_records": dataset.get("num_records"),
+                    "streaming": dataset.get("streaming", False),
+                    "loaded_at": dataset.get("loaded_at"),
+                    "memory_mb": round(dataset["nbytes"] / (1 << 20), 2),
+                    "active": name == active,
+                }
+                for (session, name), dataset in self._datasets.items()
+                if session == session_id
+            ]
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(d["nbytes"] for d in self._datasets.values())
+
+    def _resolve(self, session_id: str, name: Optional[str]) -> Optional[_Key]:
+        if name is None:
+            name = self._active.get(session_id)
+            if name is None:
+                return None
+        key = (session_id, name)
+        return key if key in self._datasets else None
+
+    def _evict(self) -> None:
+        """Evict least recently used idle datasets until under budget."""
+        total = sum(d["nbytes"] for d in self._datasets.values())
+        # Never evict the most recently used dataset, even if it alone is over budget
+        for key in list(self._datasets)[:-1]:
+            if total <= self.memory_budget_bytes:
+                break
+            if self._refcounts.get(key):
+                continue
+            total -= self._datasets[key]["nbytes"]
+            self.remove(*key)
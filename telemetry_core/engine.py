@@ -0,0 +1,1560 @@
+"""
+Telemetry Engine for TRACE
+
+The JSON/CSV telemetry tools, independent of the agent framework serving them:
+1. Add/upload JSON files with network telemetry data
+2. Process and validate the JSON data
+3. Send the data to LLM for context-aware analysis
+4. Get intelligent recommendations based on the data
+
+The ADK tools (principal_agent.tools.json_data_processor) and the Principal
+Tools MCP server are thin wrappers around these functions, so both return the
+same results from the same loader, store, indexes and caches. Every tool takes
+a session_id keyword naming its registry session; it is left out of the
+docstrings, which the wrappers reuse as tool descriptions.
+"""
+
+import copy
+import csv
+import io
+import json
+import threading
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
+from datetime import datetime
+
+import numpy as np
+
+from .dataset_registry import DEFAULT_SESSION, DatasetRegistry
+from .parse_cache import ParseCache, file_key
+from .payload_compactor import compact_result
+from .result_cache import ResultCache, result_key
+from .telemetry_aggregates import HIGH_BANDWIDTH_PCT, TelemetryAggregates
+from .telemetry_csv import CSV_SUFFIXES, CsvRecordReader
+from .telemetry_diff import DEFAULT_BUCKET_MINUTES, diff_datasets
+from .telemetry_index import index_for
+from .telemetry_parallel import aggregate as parallel_aggregate
+from .telemetry_query import DEFAULT_LIMIT, TelemetryQuery
+from .telemetry_rollups import FLEET_KEY, TelemetryRollups
+from .telemetry_sampling import sample_indices
+from .telemetry_schema import TELEMETRY_SCHEMA, ValidationReport
+from .telemetry_snapshot import SnapshotDirectory
+from .telemetry_store import ColumnStore, NumericColumn
+from .telemetry_stream import JsonRecordReader
+from .telemetry_trends import ANOMALY_Z, SeriesTrends
+from .telemetry_warehouse import open_warehouse
+
+# Loaded telemetry, or raw records that get converted on the fly
+TelemetryData = Union[ColumnStore, List[dict], dict]
+
+# Size of a representative sample (_sample_data_intelligently)
+MAX_SAMPLE_RECORDS = 50
+# Trends use the coarsest rollup tier with at least this many buckets
+TREND_MIN_BUCKETS = 12
+PREDICTION_HORIZON_HOURS = 24
+# Rows per chunk when a dataset is processed piecewise (e.g. diffed)
+STORE_CHUNK_ROWS = 1 << 16
+# Rows a streamed dataset keeps per 1m/5m rollup tier before dropping the tier
+STREAM_ROLLUP_ROWS = 1 << 15
+# Dataset entries persisted in the warehouse along with the records
+WAREHOUSE_METADATA = (
+    "path",
+    "file_key",
+    "loaded_at",
+    "updated_at",
+    "version",
+    "streaming",
+    "validation",
+)
+
+
+@compact_result
+def add_json_data(
+    json_path: str,
+    streaming: bool = False,
+    dataset_name: Optional[str] = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Load and validate JSON (or CSV) data from a file path.
+
+    This tool reads a JSON file containing network telemetry data and validates
+    its structure. CSV exports with the same fields (*.csv) are read too, with
+    typed columns. Use this when you want to add new data for analysis. The
+    data is kept under a named handle in the current session and becomes the
+    session's active dataset.
+
+    Args:
+        json_path: Absolute or relative path to the JSON or CSV file
+        streaming: If True, parse the file record-by-record (top-level array,
+            newline-delimited JSON or CSV) and keep only running aggregates, so memory
+            stays bounded regardless of file size. Use for very large files.
+        dataset_name: Optional handle for the dataset (defaults to the file name
+            without extension). Loading under an existing name replaces it.
+
+    Returns:
+        dict: Status information including number of records loaded and sample data
+
+    Example:
+        add_json_data("data/trace_reduced_20.json")
+        add_json_data("d:/path/to/my_network_data.json")
+        add_json_data("d:/telemetry/day.ndjson", streaming=True)
+        add_json_data("data/trace_reduced_20.csv")
+        add_json_data("data/trace_reduced_20.json", dataset_name="baseline")
+    """
+    dataset, result = _open_dataset(json_path, session_id, streaming, dataset_name)
+
+    if dataset is not None and session_id == DEFAULT_SESSION:
+        global _loaded_json_data
+        _loaded_json_data = dataset
+
+    return result
+
+
+def _open_dataset(
+    json_path: str,
+    session_id: str,
+    streaming: bool = False,
+    dataset_name: Optional[str] = None,
+    register: bool = True,
+) -> Tuple[Optional[dict], dict]:
+    """
+    Load a file into the session registry. Returns (dataset, status dict).
+
+    With register=False the dataset is only returned to the caller: it is not
+    registered, persisted or made active, so no dataset of the session (of
+    the same name or otherwise) is replaced.
+    """
+    is_csv = Path(json_path).suffix.lower() in CSV_SUFFIXES
+    try:
+        json_file = _resolve_path(json_path)
+
+        # Check if file exists
+        if not json_file.exists():
+            return None, {
+                "status": "error",
+                "message": f"File not found: {json_file}",
+                "suggestion": "Please provide a valid file path",
+            }
+
+        if streaming:
+            dataset, result = _stream_json_data(json_file, is_csv)
+        else:
+            dataset, result = _read_json_data(json_file, is_csv)
+
+        if dataset is None or not register:
+            return dataset, result
+
+        name = dataset_name or json_file.stem
+        if _warehouse is not None:
+            _persist_dataset(dataset, session_id, name)
+        _registry.register(session_id, name, dataset)
+        _result_cache.invalidate(session_id, name)
+        result["dataset_name"] = name
+
+        return dataset, result
+
+    except json.JSONDecodeError as e:
+        suggestion = "Please check if the file contains valid JSON"
+        if not streaming and e.msg == "Extra data":
+            suggestion = (
+                "For newline-delimited JSON use add_json_data(path, streaming=True)"
+            )
+        return None, {
+            "status": "error",
+            "message": f"Invalid JSON format: {str(e)}",
+            "suggestion": suggestion,
+        }
+    except (ValueError, csv.Error) as e:
+        if is_csv:
+            return None, {
+                "status": "error",
+                "message": f"Invalid CSV format: {str(e)}",
+                "suggestion": (
+                    "CSV needs a header row and the same number of fields on every row"
+                ),
+            }
+        return None, {
+            "status": "error",
+            "message": f"Invalid JSON structure: {str(e)}",
+            "suggestion": "JSON should be an array of objects or a single object",
+        }
+    except Exception as e:
+        return None, {"status": "error", "message": f"Error loading file: {str(e)}"}
+
+
+def _resolve_path(json_path: str) -> Path:
+    """Resolve a data file path; relative paths are relative to the TRACE root."""
+    json_file = Path(json_path)
+
+    if not json_file.is_absolute():
+        trace_root = Path(__file__).parent.parent
+        json_file = trace_root / json_path
+
+    return json_file
+
+
+def _read_json_data(
+    json_file: Path, is_csv: bool = False
+) -> Tuple[Optional[dict], dict]:
+    """Parse a whole JSON or CSV file into a columnar dataset, via the parse cache."""
+    parse = _parse_csv_bytes if is_csv else _parse_json_bytes
+    parsed, file_key, source = _parse_cache.load(json_file, parse)
+    if parsed is None:
+        return None, {
+            "status": "error",
+            "message": "Invalid JSON structure",
+            "suggestion": "JSON should be an array of objects or a single object",
+        }
+
+    if "validation" not in parsed:  # Snapshot written before records were validated
+        parsed.update(
+            _validated_entry(parsed["store"], parsed["data_type"], parsed["sample"])[0]
+        )
+    num_records = parsed["num_records"]
+    sample = copy.deepcopy(parsed["sample"])
+    # Tower/region indexes are built once per store and reused by every filter
+    index_for(parsed["store"])
+
+    dataset = {
+        "path": str(json_file),
+        "data": parsed["store"],
+        "rollups": _load_rollups(parsed),
+        "quarantine": parsed["quarantine"],
+        "validation": parsed["validation"],
+        "file_key": file_key,
+        "loaded_at": datetime.now().isoformat(),
+        "num_records": num_records,
+    }
+
+    return dataset, {
+        "status": "success",
+        "message": f"Successfully loaded {num_records} records from {json_file.name}",
+        "file_path": str(json_file),
+        "num_records": num_records,
+        "data_type": parsed["data_type"],
+        "sample_record": sample,
+        "fields": list(sample.keys()) if isinstance(sample, dict) else [],
+        "loaded_from": source,
+        "validation": parsed["validation"],
+    }
+
+
+def _parse_json_bytes(raw: bytes) -> Tuple[Optional[dict], int]:
+    """Parse callback for the cache: raw file bytes -> (parsed entry, nbytes)."""
+    # Load JSON data
+    data = json.loads(raw.decode("utf-8"))
+
+    # Validate data structure
+    if isinstance(data, list):
+        num_records = len(data)
+        data_type = "array of records"
+        sample = data[0] if data else {}
+    elif isinstance(data, dict):
+        num_records = 1
+        data_type = "single record"
+        sample = data
+    else:
+        return None, 0
+
+    # Keep the records in columnar form; the parsed list is dropped after this
+    store = ColumnStore.from_records(data if isinstance(data, list) else [data])
+    return _validated_entry(store, data_type, sample)
+
+
+def _parse_csv_bytes(raw: bytes) -> Tuple[dict, int]:
+    """Parse callback for the cache: raw CSV bytes -> (parsed entry, nbytes)."""
+    reader = CsvRecordReader(io.StringIO(raw.decode("utf-8"), newline=""))
+    store = reader.read_store()
+    return _validated_entry(store, "CSV rows", None)
+
+
+def _validated_entry(
+    store: ColumnStore, data_type: str, sample: Any
+) -> Tuple[dict, int]:
+    """
+    Parse cache entry (and its nbytes) of a freshly read store, after validation.
+
+    Invalid rows are moved to a quarantine store; the sample record is the
+    raw first record only if validation left the store unchanged.
+    """
+    valid, quarantine, report = TELEMETRY_SCHEMA.validate_store(store)
+    if valid is not store or sample is None:
+        # Empty cells are None in CSV records, so include fields missing here
+        sample = (
+            {name: valid.value(name, 0) for name in valid.fields} if len(valid) else {}
+        )
+    parsed = {
+        "store": valid,
+        "rollups": TelemetryRollups.from_store(valid).to_table(),
+        "quarantine": quarantine,
+        "validation": report.to_dict(),
+        "num_records": len(valid),
+        "data_type": data_type,
+        "sample": sample,
+    }
+    nbytes = valid.nbytes + parsed["rollups"].nbytes
+    return parsed, nbytes + (quarantine.nbytes if quarantine is not None else 0)
+
+
+def _stream_json_data(
+    json_file: Path, is_csv: bool = False
+) -> Tuple[Optional[dict], dict]:
+    """Ingest a JSON/NDJSON/CSV file record-by-record into running aggregates."""
+    reader = CsvRecordReader(json_file) if is_csv else JsonRecordReader(json_file)
+    aggregates = TelemetryAggregates()
+    report = ValidationReport()
+    rollups = TelemetryRollups.empty()
+    batch: List[dict] = []
+    sample = {}
+    # With a warehouse, every batch is also stored, so filters work on the dataset
+    warehouse_id = _warehouse.create() if _warehouse is not None else None
+
+    def flush(batch: List[dict]) -> None:
+        nonlocal rollups, sample
+        raw = ColumnStore.from_records(batch)
+        # Validated column by column; quarantined rows are counted and skipped
+        store, _, batch_report = TELEMETRY_SCHEMA.validate_store(raw)
+        report.merge(batch_report, row_offset=report.records)
+        if not aggregates.count and len(store):
+            sample = (
+                batch[0]
+                if store is raw
+                else {name: store.value(name, 0) for name in store.fields}
+            )
+        aggregates.merge(TelemetryAggregates.from_store(store))
+        # Merged batch by batch; fine tiers only while they are small
+        rollups = rollups.merged(TelemetryRollups.from_store(store)).bounded(
+            STREAM_ROLLUP_ROWS
+        )
+        if warehouse_id is not None:
+            _warehouse.insert(warehouse_id, store)
+
+    try:
+        for record in reader:
+            # Aggregates, rollups and validation are built per batch of records
+            batch.append(record)
+            if len(batch) == STORE_CHUNK_ROWS:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    except BaseException:
+        if warehouse_id is not None:
+            _warehouse.drop(warehouse_id)
+        raise
+
+    num_records = aggregates.count
+    data_type = {
+        "array": "array of records",
+        "object": "single record",
+        "ndjson": "newline-delimited records",
+        "csv": "CSV rows",
+    }[reader.layout]
+
+    # Only the aggregates are kept; the records themselves are never materialized
+    dataset = {
+        "path": str(json_file),
+        "data": None,
+        "aggregates": aggregates,
+        "rollups": rollups,
+        "validation": report.to_dict(),
+        "loaded_at": datetime.now().isoformat(),
+        "num_records": num_records,
+        "streaming": True,
+    }
+    if warehouse_id is not None:
+        dataset["warehouse_id"] = warehouse_id
+
+    return dataset, {
+        "status": "success",
+        "message": f"Successfully streamed {num_records} records from {json_file.name}",
+        "file_path": str(json_file),
+        "num_records": num_records,
+        "data_type": data_type,
+        "sample_record": sample,
+        "fields": list(sample.keys()),
+        "streaming": True,
+        "validation": report.to_dict(),
+    }
+
+
+@compact_result
+def list_json_datasets(session_id: str = DEFAULT_SESSION) -> dict:
+    """
+    List the JSON datasets loaded in the current session.
+
+    Use the returned names as dataset_name in analyze_json_data_with_llm or
+    get_recommendations_from_json to work with a dataset other than the
+    active (most recently loaded) one.
+
+    Returns:
+        dict: Loaded datasets with record counts, memory use and which one is active
+
+    Example:
+        list_json_datasets()
+    """
+    datasets = _registry.list_datasets(session_id)
+    return {
+        "status": "success",
+        "num_datasets": len(datasets),
+        "datasets": datasets,
+    }
+
+
+@compact_result
+def analyze_json_data_with_llm(
+    analysis_type: str = "comprehensive",
+    focus_areas: Optional[List[str]] = None,
+    dataset_name: Optional[str] = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Analyze previously loaded JSON data for network insights and recommendations.
+
+    This tool provides intelligent analysis of the loaded telemetry data with
+    actionable recommendations for optimization and issue resolution.
+
+    Args:
+        analysis_type: Type of analysis to perform:
+            - "comprehensive": Full analysis (default)
+            - "energy": Energy optimization focus
+            - "congestion": Traffic management focus
+            - "health": Network health focus
+            - "prediction": Trend analysis
+        focus_areas: Optional list of aspects to focus on:
+            - "towers": Tower-specific analysis
+            - "regions": Regional analysis
+            - "errors": Error patterns
+            - "performance": Performance metrics
+            - "recommendations": Actionable items
+        dataset_name: Optional dataset handle (defaults to the active dataset)
+
+    Returns:
+        dict: Structured analysis with insights and recommendations
+
+    Example:
+        analyze_json_data_with_llm("energy", ["towers", "recommendations"])
+        analyze_json_data_with_llm("comprehensive")
+        analyze_json_data_with_llm("health", dataset_name="baseline")
+    """
+    try:
+        with _registry.acquire(session_id, dataset_name) as dataset:
+            # Check if data is loaded
+            if dataset is None:
+                return _missing_dataset_error(session_id, dataset_name)
+
+            num_records = dataset["num_records"]
+
+            # Set default focus areas if not provided
+            if focus_areas is None:
+                focus_areas = ["performance", "recommendations"]
+
+            # Repeat calls on an unchanged dataset reuse the previous result
+            key = result_key(
+                session_id, dataset, "analysis", analysis_type, focus_areas
+            )
+            cached = _result_cache.get(key)
+            if cached is not None:
+                return cached
+
+            # Perform analysis based on type (using the maintained aggregates,
+            # so the cost does not grow with the number of records)
+            analysis_results = _perform_analysis(
+                _dataset_aggregates(dataset),
+                analysis_type,
+                focus_areas,
+                rollups=_dataset_rollups(dataset),
+            )
+
+            result = {
+                "status": "success",
+                "analysis_type": analysis_type,
+                "focus_areas": focus_areas,
+                "dataset_name": dataset["name"],
+                "data_source": dataset["path"],
+                "num_records_analyzed": num_records,
+                "loaded_at": dataset["loaded_at"],
+                "analysis": analysis_results,
+            }
+            _result_cache.put(key, result)
+            return result
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Analysis error: {str(e)}",
+            "suggestion": "Try with a smaller dataset or specific analysis_type",
+        }
+
+
+@compact_result
+def get_recommendations_from_json(
+    tower_id: Optional[str] = None,
+    region_id: Optional[str] = None,
+    metric_focus: str = "all",
+    dataset_name: Optional[str] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Get specific recommendations based on loaded JSON data.
+
+    This tool provides actionable recommendations for specific towers, regions,
+    or metrics based on the patterns found in the loaded JSON data.
+
+    Args:
+        tower_id: Optional specific tower ID to focus on (e.g., "TX001")
+        region_id: Optional specific region ID to focus on (e.g., "R-A")
+        metric_focus: Which metrics to focus recommendations on:
+            - "all": All metrics
+            - "energy": Energy efficiency
+            - "bandwidth": Bandwidth optimization
+            - "latency": Latency improvements
+            - "errors": Error resolution
+        dataset_name: Optional dataset handle (defaults to the active dataset)
+        start_time: Optional start of a time window, ISO 8601 (inclusive)
+        end_time: Optional end of a time window, ISO 8601 (exclusive)
+
+    Returns:
+        dict: Specific recommendations with priorities and action items
+
+    Example:
+        get_recommendations_from_json(tower_id="TX001")
+        get_recommendations_from_json(region_id="R-A", metric_focus="energy")
+        get_recommendations_from_json(metric_focus="errors")
+        get_recommendations_from_json(
+            tower_id="TX001", start_time="2025-10-31T06:00:00Z"
+        )
+    """
+    try:
+        with _registry.acquire(session_id, dataset_name) as dataset:
+            # Check if data is loaded
+            if dataset is None:
+                return _missing_dataset_error(session_id, dataset_name)
+
+            data = dataset["data"]
+
+            key = result_key(
+                session_id,
+                dataset,
+                "recommendations",
+                tower_id,
+                region_id,
+                metric_focus,
+                start_time,
+                end_time,
+            )
+            cached = _result_cache.get(key)
+            if cached is not None:
+                return cached
+
+            if data is None and dataset.get("warehouse_id") is None:
+                result = _recommendations_from_stream(
+                    dataset, tower_id, region_id, metric_focus, start_time, end_time
+                )
+                if result["status"] == "success":
+                    _result_cache.put(key, result)
+                return result
+
+            # Filter data based on parameters
+            if data is not None:
+                filtered_data = _filter_data(
+                    data, tower_id, region_id, start_time, end_time
+                )
+            elif tower_id or region_id or start_time or end_time:
+                # Records are in the warehouse: filter and aggregate in SQL
+                filtered_data = _warehouse.aggregates(
+                    dataset["warehouse_id"], tower_id, region_id, start_time, end_time
+                )
+            else:
+                filtered_data = _dataset_aggregates(dataset)
+
+            if not _record_count(filtered_data):
+                return {
+                    "status": "warning",
+                    "message": "No data found matching the criteria",
+                    "tower_id": tower_id,
+                    "region_id": region_id,
+                    **_time_window(start_time, end_time),
+                }
+
+            # Generate recommendations; unfiltered requests reuse the aggregates
+            if filtered_data is data:
+                filtered_data = _dataset_aggregates(dataset)
+            recommendations = _generate_recommendations(filtered_data, metric_focus)
+
+            result = {
+                "status": "success",
+                "scope": {
+                    "tower_id": tower_id or "all towers",
+                    "region_id": region_id or "all regions",
+                    "metric_focus": metric_focus,
+                    **_time_window(start_time, end_time),
+                },
+                "records_analyzed": _record_count(filtered_data),
+                "recommendations": recommendations,
+            }
+            _result_cache.put(key, result)
+            return result
+
+    except Exception as e:
+        return {"status": "error", "message": f"Recommendation error: {str(e)}"}
+
+
+def _recommendations_from_stream(
+    dataset: dict,
+    tower_id: Optional[str],
+    region_id: Optional[str],
+    metric_focus: str,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+) -> dict:
+    """Serve recommendations for a streamed dataset from its aggregates."""
+    if tower_id or region_id or start_time or end_time:
+        return {
+            "status": "warning",
+            "message": "Tower/region/time filters need record-level data, but "
+            "this dataset was loaded with streaming=True",
+            "suggestion": "Reload the file without streaming to filter by tower, "
+            "region or time",
+            "tower_id": tower_id,
+            "region_id": region_id,
+            **_time_window(start_time, end_time),
+        }
+
+    aggregates = dataset["aggregates"]
+    return {
+        "status": "success",
+        "scope": {
+            "tower_id": "all towers",
+            "region_id": "all regions",
+            "metric_focus": metric_focus,
+        },
+        "records_analyzed": aggregates.count,
+        "recommendations": _generate_recommendations(aggregates, metric_focus),
+    }
+
+
+@compact_result
+def query_json_data(
+    aggregates: Optional[List[str]] = None,
+    group_by: Optional[List[str]] = None,
+    where: Optional[List[str]] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    order_by: Optional[str] = None,
+    descending: bool = True,
+    limit: int = DEFAULT_LIMIT,
+    dataset_name: Optional[str] = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Filter, group and aggregate loaded telemetry in one call.
+
+    Use this to answer a specific quantitative question directly (e.g. "p95
+    latency by region for towers with errors") instead of reading sample
+    records. Only the small result table is returned.
+
+    Args:
+        aggregates: Values to compute per group (default ["count"]):
+            "count", "count(field)", "sum(field)", "avg(field)", "min(field)",
+            "max(field)", "median(field)", "p95(field)" (any pNN) or
+            "distinct(field)" for the number of distinct values
+        group_by: Optional fields to group by (e.g. ["region_id"])
+        where: Optional conditions that must all hold, as "field op value"
+            with op one of =, !=, >, >=, <, <=, in, not in
+            (e.g. ["detected_error != none", "region_id in R-A,R-B"])
+        start_time: Optional start of a time window, ISO 8601 (inclusive)
+        end_time: Optional end of a time window, ISO 8601 (exclusive)
+        order_by: Optional result column to sort by (e.g. "p95(latency_ms)");
+            rows are sorted by the group fields otherwise
+        descending: Sort order for order_by (default largest first)
+        limit: Maximum number of rows returned
+        dataset_name: Optional dataset handle (defaults to the active dataset)
+
+    Returns:
+        dict: Result columns and rows, with the number of matching records
+
+    Example:
+        query_json_data(["p95(latency_ms)"], ["region_id"], ["detected_error != none"])
+        query_json_data(["avg(cpu_util_pct)", "count"], ["tower_id"],
+                        order_by="avg(cpu_util_pct)", limit=5)
+        query_json_data(["distinct(tower_id)"], where=["cpu_util_pct > 80"])
+    """
+    try:
+        query = TelemetryQuery(
+            aggregates or ["count"],
+            group_by or [],
+            where or [],
+            start_time,
+            end_time,
+            order_by,
+            descending,
+            limit,
+        )
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "suggestion": "Example: query_json_data(['p95(latency_ms)'], "
+            "['region_id'], ['detected_error != none'])",
+        }
+
+    try:
+        with _registry.acquire(session_id, dataset_name) as dataset:
+            if dataset is None:
+                return _missing_dataset_error(session_id, dataset_name)
+
+            key = result_key(
+                session_id,
+                dataset,
+                "query",
+                query.columns,
+                where or [],
+                start_time,
+                end_time,
+                order_by,
+                descending,
+                limit,
+            )
+            cached = _result_cache.get(key)
+            if cached is not None:
+                return cached
+
+            data = dataset["data"]
+            if data is not None:
+                store = _as_store(data)
+                table = query.run(store, index_for(store))
+            elif dataset.get("warehouse_id") is not None:
+                # Predicates, time window and projection are pushed into SQL
+                equals = query.index_equals()
+                store = _warehouse.select(
+                    dataset["warehouse_id"],
+                    equals.get("tower_id"),
+                    equals.get("region_id"),
+                    start_time,
+                    end_time,
+                    predicates=query.predicates,
+                    fields=query.fields,
+                )
+                table = query.run(store)
+            else:
+                return {
+                    "status": "warning",
+                    "message": "Queries need record-level data, but this dataset "
+                    "was loaded with streaming=True",
+                    "suggestion": "Reload the file without streaming, or use "
+                    "analyze_json_data_with_llm for dataset-wide aggregates",
+                }
+
+            result = {
+                "status": "success",
+                "dataset_name": dataset["name"],
+                **_time_window(start_time, end_time),
+                **table,
+            }
+            if where:
+                result["where"] = where
+            _result_cache.put(key, result)
+            return result
+
+    except Exception as e:
+        return {"status": "error", "message": f"Query error: {str(e)}"}
+
+
+@compact_result
+def compare_json_datasets(
+    json_path1: str,
+    json_path2: str,
+    streaming: bool = False,
+    bucket_minutes: int = DEFAULT_BUCKET_MINUTES,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Compare two JSON datasets to identify changes, trends, and anomalies.
+
+    This tool is useful for comparing before/after scenarios, different time periods,
+    or different network configurations. Records are joined per tower on
+    time-of-day buckets, giving per-tower and per-region metric deltas, new and
+    removed towers, and error-type shifts. Files already loaded in this session
+    are reused; other files are read for the comparison only, so the session's
+    datasets (and its active one) are left unchanged.
+
+    Args:
+        json_path1: Path to first JSON file (baseline)
+        json_path2: Path to second JSON file (comparison)
+        streaming: If True, files that are not loaded yet are diffed straight
+            from disk without loading them (for very large files)
+        bucket_minutes: Width of the time-of-day buckets towers are joined on
+
+    Returns:
+        dict: Comparison analysis with changes and trends
+
+    Example:
+        compare_json_datasets("data/trace_reduced_20.json", "data/trace_llm_20.json")
+    """
+    try:
+        # Reuse loaded datasets; anything else is read without registering it
+        datasets = []
+        for json_path in (json_path1, json_path2):
+            json_file = _resolve_path(json_path)
+            dataset = _registry.find_by_path(session_id, str(json_file))
+            # Re-read files that changed on disk since they were loaded
+            if (
+                dataset is None
+                or not json_file.exists()
+                or dataset.get("file_key") != file_key(json_file)
+            ):
+                if streaming and json_file.exists():
+                    # Read the file during the diff; nothing is kept in memory
+                    dataset = {"path": str(json_file), "data": None}
+                else:
+                    dataset, result = _open_dataset(
+                        json_path, session_id, register=False
+                    )
+                    if dataset is None:
+                        return result
+            datasets.append(dataset)
+
+        with ExitStack() as pins:
+            # Pin registered datasets against eviction while comparing
+            for dataset in datasets:
+                if "name" in dataset:
+                    pins.enter_context(_registry.acquire(session_id, dataset["name"]))
+
+            # Perform comparison
+            comparison = diff_datasets(
+                _iter_stores(datasets[0]),
+                _iter_stores(datasets[1]),
+                bucket_minutes=bucket_minutes,
+            )
+
+        return {
+            "status": "success",
+            "dataset1": {
+                "path": json_path1,
+                "records": comparison["records"]["dataset1"],
+            },
+            "dataset2": {
+                "path": json_path2,
+                "records": comparison["records"]["dataset2"],
+            },
+            "comparison": comparison,
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Comparison error: {str(e)}"}
+
+
+@compact_result
+def append_json_data(
+    json_path: str,
+    dataset_name: Optional[str] = None,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """
+    Append new telemetry records to a loaded dataset.
+
+    Use this when new telemetry arrives for data that is already loaded. Only
+    the new records are read; the dataset's running aggregates (counts, sums,
+    tower sets, error histogram) are updated incrementally, so later analyses
+    cover old and new records without recomputing from scratch.
+
+    Args:
+        json_path: File with the new records (JSON array/object, NDJSON or CSV)
+        dataset_name: Optional dataset handle (defaults to the active dataset)
+
+    Returns:
+        dict: Number of records appended and the new size of the dataset
+
+    Example:
+        append_json_data("data/trace_delta.json")
+        append_json_data("data/latest.csv", dataset_name="trace_reduced_20")
+    """
+    is_csv = Path(json_path).suffix.lower() in CSV_SUFFIXES
+    try:
+        json_file = _resolve_path(json_path)
+        if not json_file.exists():
+            return {
+                "status": "error",
+                "message": f"File not found: {json_file}",
+                "suggestion": "Please provide a valid file path",
+            }
+
+        if is_csv:
+            delta = CsvRecordReader(json_file).read_store()
+        else:
+            delta = ColumnStore.from_records(list(JsonRecordReader(json_file)))
+        delta, quarantine, report = TELEMETRY_SCHEMA.validate_store(delta)
+
+        with _append_lock:
+            dataset = _registry.get(session_id, dataset_name)
+            if dataset is None:
+                return _missing_dataset_error(session_id, dataset_name)
+            if dataset.get("warehouse_id") is not None:
+                _dataset_rollups(dataset)  # Stored rollups are merged with the delta's
+            # Readers holding the current dataset keep a consistent view
+            updated = _append_to_dataset(dataset, delta, quarantine, report)
+            if updated.get("warehouse_id") is not None:
+                _warehouse.insert(updated["warehouse_id"], delta)
+                _persist_metadata(updated, session_id, updated["name"])
+            _registry.register(session_id, dataset["name"], updated, activate=False)
+            _result_cache.invalidate(session_id, dataset["name"])
+
+        return {
+            "status": "success",
+            "message": f"Appended {len(delta)} records from {json_file.name} "
+            f"to {updated['name']}",
+            "dataset_name": updated["name"],
+            "records_appended": len(delta),
+            "num_records": updated["num_records"],
+            "version": updated["version"],
+            "validation": report.to_dict(),
+        }
+
+    except json.JSONDecodeError as e:
+        return {
+            "status": "error",
+            "message": f"Invalid JSON format: {str(e)}",
+            "suggestion": "Please check if the file contains valid JSON",
+        }
+    except (ValueError, csv.Error) as e:
+        kind = "CSV" if is_csv else "JSON"
+        return {"status": "error", "message": f"Invalid {kind} format: {str(e)}"}
+    except Exception as e:
+        return {"status": "error", "message": f"Append error: {str(e)}"}
+
+
+def _append_to_dataset(
+    dataset: dict,
+    delta: ColumnStore,
+    quarantine: Optional[ColumnStore] = None,
+    report: Optional[ValidationReport] = None,
+) -> dict:
+    """New version of a dataset with delta's (validated) records appended."""
+    updated = dict(dataset)
+    if report is not None:
+        # Source rows keep counting across everything loaded into the dataset
+        validation = ValidationReport.from_dict(dataset.get("validation") or {})
+        offset = validation.records
+        validation.merge(report, row_offset=offset)
+        updated["validation"] = validation.to_dict()
+        if quarantine is not None:
+            rows = quarantine.columns["source_row"].values + offset
+            quarantine.columns["source_row"] = NumericColumn(rows)
+            if dataset.get("quarantine") is not None:
+                quarantine = ColumnStore.concat([dataset["quarantine"], quarantine])
+            updated["quarantine"] = quarantine
+
+    if dataset.get("aggregates") is not None:
+        # Merge the delta's aggregates into a copy; readers keep the original
+        delta_aggregates = TelemetryAggregates.from_store(delta)
+        updated["aggregates"] = dataset["aggregates"].copy().merge(delta_aggregates)
+
+    if dataset["data"] is not None:
+        # Shares the current store's buffers, which readers see unchanged
+        updated["data"] = _as_store(dataset["data"]).append(delta)
+    if dataset.get("rollups") is not None:
+        rollups = dataset["rollups"].merged(TelemetryRollups.from_store(delta))
+        if dataset.get("streaming"):
+            rollups = rollups.bounded(STREAM_ROLLUP_ROWS)
+        updated["rollups"] = rollups
+
+    updated["num_records"] = dataset["num_records"] + len(delta)
+    updated["version"] = dataset.get("version", 0) + 1
+    updated["file_key"] = None  # No longer the content of its source file
+    updated["updated_at"] = datetime.now().isoformat()
+    return updated
+
+
+def _dataset_aggregates(dataset: dict) -> TelemetryAggregates:
+    """Aggregates of a dataset, computed on first use and kept up to date."""
+    aggregates = dataset.get("aggregates")
+    if aggregates is None:
+        if dataset["data"] is None:
+            # Restored from the warehouse: aggregate inside SQLite
+            aggregates = _warehouse.aggregates(dataset["warehouse_id"])
+        else:
+            aggregates = _aggregate(dataset["data"])
+        dataset["aggregates"] = aggregates
+    return aggregates
+
+
+def _dataset_rollups(dataset: dict) -> Optional[TelemetryRollups]:
+    """Time-bucketed rollups of a dataset (built at ingest; None if unavailable)."""
+    rollups = dataset.get("rollups")
+    if rollups is None and dataset["data"] is not None:
+        rollups = dataset["rollups"] = TelemetryRollups.from_store(
+            _as_store(dataset["data"])
+        )
+    elif rollups is None and dataset.get("warehouse_id") is not None:
+        rollups = dataset["rollups"] = _warehouse.rollups(dataset["warehouse_id"])
+    return rollups
+
+
+def _load_rollups(parsed: dict) -> TelemetryRollups:
+    """Rollups of a parsed file, from its persisted table when there is one."""
+    table = parsed.get("rollups")
+    if table is None:  # Parsed before rollups were persisted
+        return TelemetryRollups.from_store(parsed["store"])
+    return TelemetryRollups.from_table(table)
+
+
+def _record_count(data: Union[TelemetryData, TelemetryAggregates]) -> int:
+    if isinstance(data, TelemetryAggregates):
+        return data.count
+    return len(data)
+
+
+def _missing_dataset_error(session_id: str, dataset_name: Optional[str]) -> dict:
+    """Error payload for a tool call that found no dataset to work on."""
+    if dataset_name:
+        return {
+            "status": "error",
+            "message": f"No dataset named '{dataset_name}' is loaded",
+            "available_datasets": [
+                d["name"] for d in _registry.list_datasets(session_id)
+            ],
+        }
+    return {
+        "status": "error",
+        "message": "No JSON data loaded",
+        "suggestion": "Please use add_json_data() first to load a JSON file",
+    }
+
+
+# Helper function to perform analysis
+def _perform_analysis(
+    data: Union[TelemetryData, TelemetryAggregates],
+    analysis_type: str,
+    focus_areas: List[str],
+    rollups: Optional[TelemetryRollups] = None,
+) -> dict:
+    """
+    Perform efficient analysis on the data without sending raw data to LLM.
+
+    All counters, sums, tower sets and the error histogram are computed once
+    into a TelemetryAggregates, and every section of the report (summary,
+    insights, key findings, recommendations) is rendered from that shared
+    result, so the data is scanned once whatever the analysis_type. Trend
+    predictions read time-bucketed rollups, built from the records if not given.
+    """
+    if (
+        rollups is None
+        and analysis_type == "prediction"
+        and not isinstance(data, TelemetryAggregates)
+    ):
+        rollups = TelemetryRollups.from_store(_as_store(data))
+    return _analysis_from_aggregates(_aggregate(data), analysis_type, rollups)
+
+
+def _aggregate(data: Union[TelemetryData, TelemetryAggregates]) -> TelemetryAggregates:
+    """Compute the shared analysis aggregates for records, a store, or pass through."""
+    if isinstance(data, TelemetryAggregates):
+        return data
+    # Large stores are aggregated in a process pool, small ones serially
+    return parallel_aggregate(_as_store(data))
+
+
+def _analysis_from_aggregates(
+    aggregates: TelemetryAggregates,
+    analysis_type: str,
+    rollups: Optional[TelemetryRollups] = None,
+) -> dict:
+    """Render the full analysis report from precomputed aggregates."""
+    results = {"summary": {}, "insights": [], "recommendations": [], "key_findings": []}
+
+    count = aggregates.count
+    if not count:
+        return results
+
+    results["summary"] = {
+        "total_records": count,
+        "unique_towers": len(aggregates.towers),
+        "unique_regions": len(aggregates.regions),
+        "time_span": {
+            "start": aggregates.first_timestamp,
+            "end": aggregates.last_timestamp,
+        },
+        "avg_bandwidth_utilization": round(aggregates.bandwidth_sum / count, 2),
+        "avg_latency_ms": round(aggregates.latency_sum / count, 2),
+    }
+
+    energy = _energy_insights_from_aggregates(aggregates)
+    congestion = _congestion_insights_from_aggregates(aggregates)
+    health = _health_insights_from_aggregates(aggregates)
+
+    if analysis_type == "energy":
+        results["insights"] = energy[0]
+        results["key_findings"] = energy[1]
+    elif analysis_type == "congestion":
+        results["insights"] = congestion[0]
+        results["key_findings"] = congestion[1]
+    elif analysis_type == "health":
+        results["insights"] = health[0]
+        results["key_findings"] = health[1]
+    elif analysis_type == "prediction":
+        results["insights"], results["key_findings"] = (
+            _prediction_insights_from_aggregates(aggregates, rollups)
+        )
+    else:  # comprehensive
+        results["insights"] = energy[0] + congestion[0] + health[0]
+        results["key_findings"] = energy[1] + congestion[1] + health[1]
+
+    results["recommendations"] = _recommendations_from_aggregates(aggregates, "all")
+
+    return results
+
+
+def _tower_list(towers: set) -> str:
+    """Format up to five tower IDs for a finding string."""
+    ordered = sorted(towers)
+    return f"{', '.join(ordered[:5])}{'...' if len(ordered) > 5 else ''}"
+
+
+def _energy_insights_from_aggregates(aggregates: TelemetryAggregates) -> tuple:
+    """Energy insights and key findings from aggregates."""
+    insights, findings = [], []
+    count = aggregates.count
+
+    if aggregates.low_bandwidth_count:
+        low = aggregates.low_bandwidth_count
+        insights.append(
+            f"Energy Opportunity: {low} records ({low / count * 100:.1f}%) show low bandwidth "
+            f"utilization (<30%), indicating potential for energy savings through radius reduction."
+        )
+        findings.append(
+            f"🔋 {low}/{count} records show energy-saving opportunity. "
+            f"Towers: {_tower_list(aggregates.low_bandwidth_towers)}"
+        )
+
+    if aggregates.shrink_count:
+        shrink = aggregates.shrink_count
+        insights.append(
+            f"Energy Actions: {shrink} records ({shrink / count * 100:.1f}%) recommend shrinking "
+            f"tower radius for energy efficiency. Average potential savings: 30-40%."
+        )
+
+    return insights, findings
+
+
+def _congestion_insights_from_aggregates(aggregates: TelemetryAggregates) -> tuple:
+    """Congestion insights and key findings from aggregates."""
+    insights, findings = [], []
+    count = aggregates.count
+
+    if aggregates.high_bandwidth_count:
+        high = aggregates.high_bandwidth_count
+        insights.append(
+            f"Congestion Risk: {high} records ({high / count * 100:.1f}%) show high bandwidth "
+            f"utilization (>70%), indicating potential congestion risk."
+        )
+        findings.append(
+            f"⚠️ {high}/{count} records show congestion risk. "
+            f"Towers: {_tower_list(aggregates.high_bandwidth_towers)}"
+        )
+
+    if aggregates.expand_count:
+        insights.append(
+            f"Coverage Expansion: {aggregates.expand_count} records recommend expanding coverage. "
+            f"Affected towers: {', '.join(sorted(aggregates.expand_towers))}"
+        )
+
+    top_error = aggregates.top_error()
+    if top_error:
+        insights.append(
+            f"Errors Detected: {aggregates.error_count} error events found. "
+            f"Most common: {top_error[0]} ({top_error[1]} occurrences)"
+        )
+
+    return insights, findings
+
+
+def _health_insights_from_aggregates(aggregates: TelemetryAggregates) -> tuple:
+    """Health insights and key findings from aggregates."""
+    insights, findings = [], []
+    count = aggregates.count
+
+    if aggregates.poor_rsrq_count:
+        poor = aggregates.poor_rsrq_count
+        insights.append(
+            f"Signal Quality: {poor} records ({poor / count * 100:.1f}%) show poor RSRQ "
+            f"(<-10 dB), indicating signal quality issues."
+        )
+
+    if aggregates.high_latency_count:
+        avg_latency = aggregates.high_latency_sum / aggregates.high_latency_count
+        insights.append(
+            f"Latency Issues: {aggregates.high_latency_count} records show high latency (>80ms). "
+            f"Average: {avg_latency:.1f}ms"
+        )
+
+    if aggregates.packet_loss_count:
+        avg_loss = aggregates.packet_loss_sum / aggregates.packet_loss_count
+        insights.append(
+            f"Packet Loss: {aggregates.packet_loss_count} records show significant packet loss (>1%). "
+            f"Average: {avg_loss:.2f}%"
+        )
+
+    top_error = aggregates.top_error()
+    if top_error:
+        findings.append(
+            f"🔴 {aggregates.error_count}/{count} records with errors. "
+            f"Most common: {top_error[0]}"
+        )
+
+    return insights, findings
+
+
+def _prediction_insights_from_aggregates(
+    aggregates: TelemetryAggregates, rollups: Optional[TelemetryRollups] = None
+) -> tuple:
+    """
+    Prediction insights and key findings from aggregates and rollups.
+
+    With rollups covering enough time buckets, trends come from the
+    vectorized engine over every tower's series; otherwise (short spans, or
+    no rollups) the first records are compared as before.
+    """
+    insights, findings = [], []
+    count = aggregates.count
+    trends = _rollup_trends(rollups) if rollups is not None else None
+
+    if count >= 5:
+        insights.append(
+            f"Pattern Analysis: Analyzing {count} records for trend detection. "
+            f"Data spans from {aggregates.first_timestamp} to "
+            f"{aggregates.last_timestamp}"
+        )
+        if trends is None:
+            first, last = aggregates.head_bandwidth[0], aggregates.last_bandwidth
+            trend = "increasing" if last > first else "decreasing"
+            insights.append(f"Bandwidth Trend: {trend} ({first:.1f}% → {last:.1f}%)")
+
+    if count >= 3 and trends is None:
+        first, third = aggregates.head_bandwidth[0], aggregates.head_bandwidth[2]
+        if third > first * 1.2:
+            findings.append(
+                f"📈 Bandwidth trending upward: {first:.1f}% → {third:.1f}%"
+            )
+        elif third < first * 0.8:
+            findings.append(
+                f"📉 Bandwidth trending downward: {first:.1f}% → {third:.1f}%"
+            )
+
+    if trends is not None:
+        insights.extend(trends[0])
+        findings.extend(trends[1])
+
+    return insights, findings
+
+
+def _rollup_trends(rollups: TelemetryRollups) -> Optional[tuple]:
+    """
+    Fleet, region and tower trends from the coarsest useful rollup tier.
+
+    Every tower is analyzed in one batched pass (regression slopes, EWMA,
+    robust z-scores). Returns None when no tier has enough buckets.
+    """
+    tier = rollups.tier_for(TREND_MIN_BUCKETS)
+    if tier is None:  # Too short a time span for a trend
+        return None
+    insights, findings = [], []
+
+    fleet = SeriesTrends(*rollups.matrix("fleet", tier, "bandwidth_sum")).get(FLEET_KEY)
+    latency = SeriesTrends(*rollups.matrix("fleet", tier, "latency_sum")).get(FLEET_KEY)
+    slope = fleet["slope_per_hour"]
+    if abs(slope) * 24 < 1:  # Less than one point per day
+        direction = "stable"
+    else:
+        direction = "increasing" if slope > 0 else "decreasing"
+    insights.append(
+        f"Bandwidth Trend: {direction} ({slope:+.2f}%/h over {fleet['buckets']} "
+        f"x {tier} buckets, EWMA {fleet['ewma_last']:.1f}%); latency "
+        f"{latency['slope_per_hour']:+.2f} ms/h"
+    )
+
+    regions = SeriesTrends(*rollups.matrix("region", tier, "bandwidth_sum"))
+    rising = regions.top("slope_per_hour", 1, regions.slope_per_hour > 0)
+    if rising:
+        trend = regions.get(rising[0])
+        insights.append(
+            f"Fastest-Rising Region: {rising[0]} "
+            f"({trend['slope_per_hour']:+.2f}%/h bandwidth)"
+        )
+
+    towers = SeriesTrends(*rollups.matrix("tower", tier, "bandwidth_sum"))
+    horizon = PREDICTION_HORIZON_HOURS
+    enough = towers.buckets >= TREND_MIN_BUCKETS
+    projected = towers.fitted_last + towers.slope_per_hour * horizon
+    at_risk = (
+        enough
+        & (towers.slope_per_hour > 0)
+        & (towers.fitted_last < HIGH_BANDWIDTH_PCT)
+        & (projected >= HIGH_BANDWIDTH_PCT)
+    )
+    if at_risk.any():
+        findings.append(
+            f"🔮 {int(at_risk.sum())} towers projected to exceed "
+            f"{HIGH_BANDWIDTH_PCT}% bandwidth within {horizon}h: "
+            f"{_tower_list({towers.keys[i] for i in np.flatnonzero(at_risk)})}"
+        )
+
+    anomalous = enough & towers.anomalous_last
+    if anomalous.any():
+        findings.append(
+            f"⚠️ {int(anomalous.sum())} towers with anomalous bandwidth in the "
+            f"latest {tier} bucket (robust z > {ANOMALY_Z}): "
+            f"{_tower_list({towers.keys[i] for i in np.flatnonzero(anomalous)})}"
+        )
+
+    return insights, findings
+
+
+def _recommendations_from_aggregates(
+    aggregates: TelemetryAggregates, metric_focus: str
+) -> List[dict]:
+    """Render recommendations from precomputed aggregates."""
+    recommendations = []
+
+    if not aggregates.count:
+        return recommendations
+
+    if metric_focus in ["all", "energy"] and aggregates.low_bandwidth_count:
+        recommendations.append(
+            {
+                "priority": "HIGH",
+                "category": "Energy Optimization",
+                "title": "Implement Power Saving Mode",
+                "affected_towers": sorted(aggregates.low_bandwidth_towers)[:5],
+                "count": aggregates.low_bandwidth_count,
+                "expected_impact": "30-40% energy savings",
+                "action": "Schedule TRX shutdowns during low-traffic periods",
+            }
+        )
+
+    if metric_focus in ["all", "latency"] and aggregates.high_latency_count:
+        avg_latency = aggregates.high_latency_sum / aggregates.high_latency_count
+        recommendations.append(
+            {
+                "priority": "MEDIUM",
+                "category": "Performance",
+                "title": "Reduce Network Latency",
+                "affected_towers": sorted(aggregates.high_latency_towers)[:5],
+                "count": aggregates.high_latency_count,
+                "avg_latency_ms": round(avg_latency, 1),
+                "expected_impact": "20-30% latency reduction",
+                "action": "Optimize routing and check backhaul",
+            }
+        )
+
+    if metric_focus in ["all", "bandwidth"] and aggregates.high_bandwidth_count:
+        recommendations.append(
+            {
+                "priority": "HIGH",
+                "category": "Congestion Management",
+                "title": "Prevent Network Congestion",
+                "affected_towers": sorted(aggregates.high_bandwidth_towers)[:5],
+                "count": aggregates.high_bandwidth_count,
+                "expected_impact": "Maintain QoS",
+                "action": "Enable load balancing and expand coverage",
+            }
+        )
+
+    top_error = aggregates.top_error()
+    if metric_focus in ["all", "errors"] and top_error:
+        recommendations.append(
+            {
+                "priority": "HIGH",
+                "category": "Reliability",
+                "title": "Address Network Errors",
+                "error_count": aggregates.error_count,
+                "top_error": top_error[0],
+                "top_error_count": top_error[1],
+                "expected_impact": "Improved stability",
+                "action": f"Investigate {top_error[0]} errors and schedule maintenance",
+            }
+        )
+
+    return recommendations[:5]
+
+
+def _sample_data_intelligently(data: TelemetryData, max_records: int) -> List[dict]:
+    """Sample data intelligently to reduce payload while preserving insights."""
+    if len(data) <= max_records:
+        return data if isinstance(data, list) else list(data)
+
+    # Errors first, then bandwidth outliers, then evenly spaced records; picks
+    # are tracked by row index so each record appears at most once
+    rows = sample_indices(_as_store(data), max_records).tolist()
+    if isinstance(data, ColumnStore):
+        return data.take(np.asarray(rows)).to_records()
+    return [data[i] for i in rows]
+
+
+def _extract_energy_findings(records: TelemetryData) -> List[str]:
+    """Extract key energy findings."""
+    return _energy_insights_from_aggregates(_aggregate(records))[1]
+
+
+def _extract_congestion_findings(records: TelemetryData) -> List[str]:
+    """Extract key congestion findings."""
+    return _congestion_insights_from_aggregates(_aggregate(records))[1]
+
+
+def _extract_health_findings(records: TelemetryData) -> List[str]:
+    """Extract key health findings."""
+    return _health_insights_from_aggregates(_aggregate(records))[1]
+
+
+def _extract_prediction_findings(records: TelemetryData) -> List[str]:
+    """Extract prediction insights."""
+    return _prediction_insights_from_aggregates(_aggregate(records))[1]
+
+
+def _analyze_energy(records: TelemetryData) -> List[str]:
+    """Analyze energy optimization opportunities."""
+    return _energy_insights_from_aggregates(_aggregate(records))[0]
+
+
+def _analyze_congestion(records: TelemetryData) -> List[str]:
+    """Analyze congestion and traffic patterns."""
+    return _congestion_insights_from_aggregates(_aggregate(records))[0]
+
+
+def _analyze_health(records: TelemetryData) -> List[str]:
+    """Analyze network health indicators."""
+    return _health_insights_from_aggregates(_aggregate(records))[0]
+
+
+def _analyze_predictions(records: TelemetryData) -> List[str]:
+    """Analyze patterns for predictions."""
+    return _prediction_insights_from_aggregates(_aggregate(records))[0]
+
+
+def _generate_recommendations(
+    records: Union[TelemetryData, TelemetryAggregates], metric_focus: str
+) -> List[dict]:
+    """Generate actionable recommendations (limited to top 5 to reduce payload)."""
+    return _recommendations_from_aggregates(_aggregate(records), metric_focus)
+
+
+def _filter_data(
+    data: TelemetryData,
+    tower_id: Optional[str],
+    region_id: Optional[str],
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+) -> ColumnStore:
+    """Filter data by tower_id, region_id and time window, using the indexes."""
+    records = _as_store(data)
+    return index_for(records).select(
+        {"tower_id": tower_id or None, "region_id": region_id or None},
+        start_time or None,
+        end_time or None,
+    )
+
+
+def _time_window(start_time: Optional[str], end_time: Optional[str]) -> dict:
+    """Time window entries for a response, only when one was requested."""
+    window = {}
+    if start_time:
+        window["start_time"] = start_time
+    if end_time:
+        window["end_time"] = end_time
+    return window
+
+
+def _iter_stores(dataset: dict) -> Iterator[ColumnStore]:
+    """A dataset in ColumnStore chunks, sliced from memory or read from its file."""
+    data = dataset["data"]
+    if data is None and dataset.get("warehouse_id") is not None:
+        yield from _warehouse.iter_stores(dataset["warehouse_id"], STORE_CHUNK_ROWS)
+        return
+    if data is None:
+        path = Path(dataset["path"])
+        if path.suffix.lower() in CSV_SUFFIXES:
+            yield from CsvRecordReader(path).iter_stores()
+            return
+        batch: List[dict] = []
+        for record in JsonRecordReader(path):
+            batch.append(record)
+            if len(batch) == STORE_CHUNK_ROWS:
+                yield ColumnStore.from_records(batch)
+                batch = []
+        if batch:
+            yield ColumnStore.from_records(batch)
+        return
+    store = _as_store(data)
+    for start in range(0, len(store), STORE_CHUNK_ROWS):
+        yield store.slice(start, start + STORE_CHUNK_ROWS)
+
+
+def _persist_dataset(dataset: dict, session_id: str, name: str) -> None:
+    """Store a freshly loaded dataset in the warehouse (streamed ones already are)."""
+    if dataset.get("warehouse_id") is None:
+        warehouse_id = _warehouse.create()
+        try:
+            _warehouse.insert(warehouse_id, _as_store(dataset["data"]))
+        except BaseException:
+            _warehouse.drop(warehouse_id)
+            raise
+        dataset["warehouse_id"] = warehouse_id
+    _persist_metadata(dataset, session_id, name)
+
+
+def _persist_metadata(dataset: dict, session_id: str, name: str) -> None:
+    """Publish a warehouse dataset under its name, with its metadata and rollups."""
+    _warehouse.commit(
+        dataset["warehouse_id"],
+        session_id,
+        name,
+        {key: dataset[key] for key in WAREHOUSE_METADATA if key in dataset},
+        rollups=dataset.get("rollups"),
+    )
+
+
+def _restore_datasets() -> int:
+    """
+    Register every dataset stored in the warehouse, e.g. after a restart.
+
+    Only metadata is read: records stay in SQLite, and aggregates, rollups
+    and samples are read from it on first use. Returns the number restored.
+    """
+    restored = _warehouse.datasets()
+    for entry in restored:
+        dataset = dict(entry["metadata"])
+        if dataset.get("file_key") is not None:
+            dataset["file_key"] = tuple(dataset["file_key"])
+        dataset.update(
+            data=None, warehouse_id=entry["id"], num_records=entry["num_records"]
+        )
+        _registry.register(entry["session_id"], entry["name"], dataset)
+    return len(restored)
+
+
+def _as_store(data: TelemetryData) -> ColumnStore:
+    """Return data as a ColumnStore, converting raw records if needed."""
+    if isinstance(data, ColumnStore):
+        return data
+    return ColumnStore.from_records(data if isinstance(data, list) else [data])
+
+
+# Loaded datasets, keyed by (session, dataset name)
+_registry = DatasetRegistry()
+# Serializes appends, which replace a dataset with an extended copy
+_append_lock = threading.Lock()
+_parse_cache = ParseCache(persistent=SnapshotDirectory())
+# Analysis and recommendation results per dataset generation and parameters
+_result_cache = ResultCache()
+# Persistent SQLite copy of every loaded dataset (None unless configured)
+_warehouse = open_warehouse()
+if _warehouse is not None:
+    _restore_datasets()
+
+# Most recently loaded dataset of the default session, kept for scripts that
+# read it directly; the tools themselves always go through _registry
+_loaded_json_data = None
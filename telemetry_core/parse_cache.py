@@ -0,0 +1,151 @@
+"""
+Content-Addressed Parse Cache for TRACE JSON Analysis
+
+Operators load and compare the same baseline files over and over. This cache
+keeps the parsed (columnar) form of each file so repeat loads skip the parse:
+1. A warm hit costs one stat() call: (path, size, mtime) maps to a content hash
+2. On a stat miss the file is read and hashed once; identical content under a
+   different path or after a touch is still served from the cache
+3. Files that change on disk get a new hash and are re-parsed automatically
+4. Entries are evicted least recently used first beyond a byte budget
+5. An optional persistent tier (e.g. binary snapshots) is consulted before a
+   file is read at all, and filled after every parse
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+
+DEFAULT_CACHE_BUDGET_MB = int(os.environ.get("JSON_PARSE_CACHE_MB", "256"))
+
+# (size, mtime_ns) of a file, cheap to obtain and compare
+FileKey = Tuple[int, int]
+
+
+def file_key(path: Union[str, Path]) -> FileKey:
+    """Size and modification time of a file, as used for cache validation."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ParseCache:
+    """
+    Thread-safe cache of parsed files keyed by content hash.
+
+    `parse` callbacks receive the raw file bytes and return (value, nbytes),
+    where nbytes is the memory the value holds and is charged to the budget.
+
+    A `persistent` tier must provide load(path, file_key) returning
+    (digest, value, nbytes) or None, and save(path, file_key, digest, value).
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = DEFAULT_CACHE_BUDGET_MB << 20,
+        persistent: Optional[Any] = None,
+    ):
+        self.budget_bytes = budget_bytes
+        self.persistent = persistent
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._paths: Dict[str, Tuple[FileKey, str]] = {}
+
+    def load(
+        self, path: Union[str, Path], parse: Callable[[bytes], Tuple[Any, int]]
+    ) -> Tuple[Any, FileKey, str]:
+        """
+        Return the parsed value of a file, parsing it only if not cached.
+
+        Returns:
+            (value, file_key, source) where source is "memory", "snapshot"
+            (persistent tier) or "parse"
+        """
+        path = str(path)
+        key = file_key(path)
+
+        with self._lock:
+            known = self._paths.get(path)
+            if known is not None and known[0] == key:
+                value = self._touch(known[1])
+                if value is not None:
+                    self.hits += 1
+                    return value, key, "memory"
+
+        if self.persistent is not None:
+            stored = self.persistent.load(path, key)
+            if stored is not None:
+                digest, value, nbytes = stored
+                with self._lock:
+                    self._paths[path] = (key, digest)
+                    self._insert(digest, value, nbytes)
+                    self.hits += 1
+                return value, key, "snapshot"
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+        with self._lock:
+            # Only trust the stat key if the file did not change while reading
+            unchanged = file_key(path) == key
+            if unchanged:
+                self._paths[path] = (key, digest)
+            value = self._touch(digest)
+            if value is not None:
+                self.hits += 1
+                return value, key, "memory"
+            self.misses += 1
+
+        # Parse outside the lock; parse errors propagate and nothing is cached
+        value, nbytes = parse(raw)
+        del raw
+
+        with self._lock:
+            self._insert(digest, value, nbytes)
+        if self.persistent is not None and unchanged:
+            self.persistent.save(path, key, digest, value)
+
+        return value, key, "parse"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(nbytes for _, nbytes in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _touch(self, digest: str) -> Optional[Any]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        self._entries.move_to_end(digest)
+        return entry[0]
+
+    def _insert(self, digest: str, value: Any, nbytes: int) -> None:
+        if value is not None and nbytes <= self.budget_bytes:
+            self._entries[digest] = (value, nbytes)
+            self._entries.move_to_end(digest)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(nbytes for _, nbytes in self._entries.values())
+        while total > self.budget_bytes:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            total -= nbytes
+        # Forget path mappings whose content is gone
+        live = self._entries.keys()
+        for path in [p for p, (_, d) in self._paths.items() if d not in live]:
+            del self._paths[path]
@@ -0,0 +1,273 @@
+"""
+Token-Budgeted Compaction of Tool Results
+
+Tool results go straight into the model context, so their size drives LLM
+latency and cost on every monitoring cycle. Each result is measured as compact
+JSON and, when it exceeds the tool's token budget, shrunk in stages:
+1. Tabulate: lists (or mappings) of flat records sharing the same keys become
+   {"columns": [...], "rows": [[...]]}, so keys are not repeated per record
+2. Deduplicate: a subtree repeated verbatim (e.g. the same tower list in two
+   recommendations) is replaced by a reference to its first path
+3. Truncate: lists, large mappings and long strings are cut to shrinking
+   limits, always saying how many items were left out. Record-like dicts keep
+   all their fields
+4. Elide: if the result is still too large at the smallest limits, the bulkiest
+   remaining subtrees are replaced by a note of their size
+
+Results within budget are returned unchanged. Budgets are set with
+TOOL_TOKEN_BUDGET (default for every tool, 0 disables compaction) and
+TOOL_TOKEN_BUDGETS ("tool_name=tokens,..." per-tool overrides).
+"""
+
+import functools
+import json
+import os
+from typing import Any, Callable, Dict, Optional
+
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("TOOL_TOKEN_BUDGET", "2000"))
+# Rough size of a token in characters of JSON, for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+# Subtrees shorter than this (serialized) are cheaper to repeat than to reference
+MIN_DEDUPE_CHARS = 48
+# Each truncation round keeps this share of the previous round's limits
+SHRINK_FACTOR = 0.75
+# Truncation never goes below these limits
+MIN_ITEMS = 3
+MIN_STRING_CHARS = 80
+# Dicts with more keys than this are mappings (e.g. per tower) and get truncated
+MAX_RECORD_FIELDS = 16
+
+# Top-level keys describing the call itself are never compacted
+_PROTECTED_KEYS = ("status", "message", "suggestion")
+
+
+def _parse_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for entry in value.split(","):
+        name, _, tokens = entry.partition("=")
+        if name.strip() and tokens.strip():
+            budgets[name.strip()] = int(tokens)
+    return budgets
+
+
+TOOL_TOKEN_BUDGETS = _parse_budgets(os.environ.get("TOOL_TOKEN_BUDGETS", ""))
+
+
+def token_budget(tool_name: str) -> int:
+    """Token budget of a tool's results (0 means unlimited)."""
+    return TOOL_TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate token count of a value serialized as compact JSON."""
+    return -(-len(_dumps(value)) // CHARS_PER_TOKEN)
+
+
+def compact(result: Any, budget: int) -> Any:
+    """
+    Fit a tool result to a token budget.
+
+    Args:
+        result: JSON-like tool result (dicts, lists, strings, numbers)
+        budget: Maximum tokens; results already within it (or budget <= 0)
+            are returned unchanged
+
+    Returns:
+        The result, or a compacted copy with a "compaction" entry recording
+        the token counts before and after
+    """
+    if budget <= 0 or not isinstance(result, dict):
+        return result
+    tokens = estimate_tokens(result)
+    if tokens <= budget:
+        return result
+
+    compacted = _dedupe(_tabulate(result))
+    max_items = max(_longest_collection(compacted), MIN_ITEMS)
+    max_chars = max(_longest_string(compacted), MIN_STRING_CHARS)
+    candidate = compacted
+    while estimate_tokens(candidate) > budget:
+        if max_items == MIN_ITEMS and max_chars == MIN_STRING_CHARS:
+            break
+        max_items = max(int(max_items * SHRINK_FACTOR), MIN_ITEMS)
+        max_chars = max(int(max_chars * SHRINK_FACTOR), MIN_STRING_CHARS)
+        candidate = _truncate(compacted, max_items, max_chars)
+    while estimate_tokens(candidate) > budget and _elide(
+        candidate, estimate_tokens(candidate) - budget
+    ):
+        pass
+
+    candidate["compaction"] = {
+        "tokens_before": tokens,
+        "tokens_after": estimate_tokens(candidate),
+        "budget": budget,
+    }
+    return candidate
+
+
+def compact_result(func: Callable[..., dict]) -> Callable[..., dict]:
+    """
+    Decorate a tool so its results are compacted to the tool's token budget.
+
+    The wrapper keeps the tool's name, docstring and signature, so agents
+    declare it exactly as the undecorated function.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return compact(func(*args, **kwargs), token_budget(func.__name__))
+
+    return wrapper
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _dedupe(value: Any, path: str = "", seen: Optional[Dict[str, str]] = None) -> Any:
+    """Replace repeated subtrees by a reference to their first occurrence."""
+    if seen is None:
+        seen = {}
+    if isinstance(value, (dict, list)) and path:
+        # Tables are deduplicated whole: a row reference would break the layout
+        serialized = _dumps(value)
+        if len(serialized) >= MIN_DEDUPE_CHARS:
+            if serialized in seen:
+                return f"(same as {seen[serialized]})"
+            seen[serialized] = path
+    if _is_table(value):
+        return value
+    if isinstance(value, dict):
+        return {
+            key: item if path == "" and key in _PROTECTED_KEYS
+            else _dedupe(item, f"{path}.{key}" if path else str(key), seen)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_dedupe(item, f"{path}[{i}]", seen) for i, item in enumerate(value)]
+    return value
+
+
+def _tabulate(value: Any) -> Any:
+    """Turn lists or mappings of flat dicts with identical keys into tables."""
+    if isinstance(value, dict):
+        if _is_uniform(list(value.values())):
+            # A mapping's keys become the first column
+            columns = ["key"] + list(next(iter(value.values())))
+            rows = [[key] + list(item.values()) for key, item in value.items()]
+            if "key" not in columns[1:]:
+                return {"columns": columns, "rows": rows}
+        return {key: _tabulate(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if _is_uniform(value):
+            return {
+                "columns": list(value[0]),
+                "rows": [list(item.values()) for item in value],
+            }
+        return [_tabulate(item) for item in value]
+    return value
+
+
+def _is_uniform(items: list) -> bool:
+    """Whether items are at least two flat dicts with the same keys in order."""
+    if len(items) < 2 or not all(_is_flat_dict(item) for item in items):
+        return False
+    columns = list(items[0])
+    return bool(columns) and all(list(item) == columns for item in items)
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and list(value) == ["columns", "rows"]
+
+
+def _is_flat_dict(value: Any) -> bool:
+    return isinstance(value, dict) and not any(
+        isinstance(item, (dict, list)) for item in value.values()
+    )
+
+
+def _truncate(value: Any, max_items: int, max_chars: int, top: bool = True) -> Any:
+    """Copy of a value with lists, mappings and strings cut to the limits."""
+    if _is_table(value):
+        # Cut rows, never columns: every row must still line up with the header
+        rows = value["rows"]
+        kept = {"columns": value["columns"], "rows": rows[:max_items]}
+        if len(rows) > max_items:
+            kept["omitted"] = f"{len(rows) - max_items} more of {len(rows)} rows"
+        return kept
+    if isinstance(value, dict):
+        items = list(value.items())
+        if len(items) > max(MAX_RECORD_FIELDS, max_items):
+            items = items[:max_items]
+        kept = {
+            key: item if top and key in _PROTECTED_KEYS
+            else _truncate(item, max_items, max_chars, False)
+            for key, item in items
+        }
+        if len(value) > len(kept):
+            kept["omitted"] = f"{len(value) - len(kept)} more of {len(value)} entries"
+        return kept
+    if isinstance(value, list):
+        kept = [
+            _truncate(item, max_items, max_chars, False) for item in value[:max_items]
+        ]
+        if len(value) > max_items:
+            kept.append(f"... {len(value) - max_items} more of {len(value)} items")
+        return kept
+    if isinstance(value, str) and len(value) > max_chars:
+        return f"{value[:max_chars]}... (+{len(value) - max_chars} chars)"
+    return value
+
+
+def _elide(value: Any, excess: int) -> bool:
+    """
+    Replace one bulky subtree of value (in place) by a note of its size.
+
+    Follows the largest child down from the root while it alone is larger than
+    the excess, then elides it, so no more is dropped than needed. Returns
+    False when nothing is left to elide.
+    """
+    node = value
+    while True:
+        children = [
+            (estimate_tokens(child), key)
+            for key, child in _children(node)
+            if isinstance(child, (dict, list))
+            and not (node is value and key in _PROTECTED_KEYS)
+        ]
+        if not children:
+            return False
+        tokens, key = max(children, key=lambda child: child[0])
+        child = node[key]
+        if tokens <= excess or not any(
+            isinstance(grandchild, (dict, list)) for _, grandchild in _children(child)
+        ):
+            size = len(child["rows"]) if _is_table(child) else len(child)
+            node[key] = f"(omitted: {size} entries, ~{tokens} tokens)"
+            return True
+        node = child
+
+
+def _children(value: Any) -> list:
+    if isinstance(value, dict):
+        return list(value.items())
+    if isinstance(value, list):
+        return list(enumerate(value))
+    return []
+
+
+def _longest_collection(value: Any) -> int:
+    if isinstance(value, dict):
+        return max([len(value)] + [_longest_collection(v) for v in value.values()])
+    if isinstance(value, list):
+        return max([len(value)] + [_longest_collection(v) for v in value])
+    return 0
+
+
+def _longest_string(value: Any) -> int:
+    if isinstance(value, dict):
+        return max([0] + [_longest_string(v) for v in value.values()])
+    if isinstance(value, list):
+        return max([0] + [_longest_string(v) for v in value])
+    return len(value) if isinstance(value, str) else 0
@@ -0,0 +1,87 @@
+"""
+Memoized Tool Results for TRACE JSON Analysis
+
+The monitoring loop asks the same questions of unchanged data on every cycle.
+This cache keeps the result of each analysis/recommendation call, so a repeat
+call costs a dictionary lookup:
+1. Keys are (session, dataset name, dataset generation, tool, parameters); the
+   registry gives a dataset a new generation on every load and append, so a
+   stale result can never be served
+2. Entries of a dataset are also dropped as soon as it is reloaded or appended
+   to, instead of waiting to age out
+3. Least recently used entries are evicted beyond a maximum entry count
+4. Callers get a copy, so mutating a result never alters the cached one
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_ENTRIES", "256"))
+
+
+def result_key(session_id: str, dataset: dict, tool: str, *params: Any) -> tuple:
+    """Cache key of a tool call on a dataset; list parameters become tuples."""
+    return (
+        session_id,
+        dataset["name"],
+        dataset.get("generation"),
+        tool,
+        tuple(tuple(p) if isinstance(p, list) else p for p in params),
+    )
+
+
+class ResultCache:
+    """Thread-safe LRU cache of tool results."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], dict]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[dict]:
+        """A copy of the cached result for key, or None."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key: tuple, result: dict) -> None:
+        """Cache a result (a copy of it), evicting the oldest entries if full."""
+        if self.max_entries <= 0:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str, name: Optional[str] = None) -> int:
+        """Drop the entries of a dataset (or a whole session). Returns the count."""
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == session_id and (name is None or key[1] == name)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
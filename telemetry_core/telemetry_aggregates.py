@@ -0,0 +1,260 @@
+"""
+Running Telemetry Aggregates for TRACE JSON Analysis
+
+Holds every counter, sum and tower set the JSON analysis report is built from,
+so telemetry can be summarized record-by-record without keeping the records
+themselves in memory.
+"""
+
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .telemetry_store import ColumnStore
+
+
+# Thresholds shared by every analyzer in json_data_processor
+LOW_BANDWIDTH_PCT = 30
+HIGH_BANDWIDTH_PCT = 70
+HIGH_LATENCY_MS = 80
+POOR_RSRQ_DB = -10
+HIGH_PACKET_LOSS_PCT = 1.0
+
+# detected_error values that mean "no error"
+NO_ERROR_VALUES = ("none", None, "")
+
+
+class TelemetryAggregates:
+    """Running aggregates over a stream of telemetry records."""
+
+    # Fields combined by addition / set union when merging partial aggregates
+    _SUMMED = (
+        "bandwidth_sum",
+        "latency_sum",
+        "low_bandwidth_count",
+        "high_bandwidth_count",
+        "shrink_count",
+        "expand_count",
+        "error_count",
+        "poor_rsrq_count",
+        "high_latency_count",
+        "high_latency_sum",
+        "packet_loss_count",
+        "packet_loss_sum",
+    )
+    _UNIONED = (
+        "towers",
+        "regions",
+        "low_bandwidth_towers",
+        "high_bandwidth_towers",
+        "expand_towers",
+        "high_latency_towers",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.towers: Set[Any] = set()
+        self.regions: Set[Any] = set()
+        self.first_timestamp: Any = "unknown"
+        self.last_timestamp: Any = "unknown"
+
+        self.bandwidth_sum = 0
+        self.latency_sum = 0
+
+        self.low_bandwidth_count = 0
+        self.low_bandwidth_towers: Set[Any] = set()
+        self.high_bandwidth_count = 0
+        self.high_bandwidth_towers: Set[Any] = set()
+
+        self.shrink_count = 0
+        self.expand_count = 0
+        self.expand_towers: Set[Any] = set()
+
+        self.error_count = 0
+        self.error_types: Dict[Any, int] = {}
+
+        self.poor_rsrq_count = 0
+        self.high_latency_count = 0
+        self.high_latency_sum = 0
+        self.high_latency_towers: Set[Any] = set()
+        self.packet_loss_count = 0
+        self.packet_loss_sum = 0
+
+        # Bandwidth of the first three and the last record, for trend checks
+        self.head_bandwidth: List[Any] = []
+        self.last_bandwidth: Any = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "TelemetryAggregates":
+        """Build aggregates from an iterable of records in one pass."""
+        aggregates = cls()
+        for record in records:
+            aggregates.update(record)
+        return aggregates
+
+    @classmethod
+    def from_store(cls, store: ColumnStore) -> "TelemetryAggregates":
+        """
+        Build aggregates from a column store.
+
+        Every threshold mask is evaluated exactly once over its column and
+        shared by all counters, tower sets and sums that depend on it.
+        """
+        aggregates = cls()
+        count = len(store)
+        if not count:
+            return aggregates
+
+        aggregates.count = count
+        aggregates.towers = store.distinct("tower_id")
+        aggregates.regions = store.distinct("region_id")
+        aggregates.first_timestamp = store.value("timestamp", 0, "unknown")
+        aggregates.last_timestamp = store.value("timestamp", -1, "unknown")
+
+        aggregates.bandwidth_sum = store.sum("bandwidth_utilization_pct")
+        aggregates.latency_sum = store.sum("latency_ms")
+
+        low = store.below("bandwidth_utilization_pct", LOW_BANDWIDTH_PCT)
+        aggregates.low_bandwidth_count = store.count(low)
+        aggregates.low_bandwidth_towers = store.distinct("tower_id", low)
+
+        high = store.above("bandwidth_utilization_pct", HIGH_BANDWIDTH_PCT)
+        aggregates.high_bandwidth_count = store.count(high)
+        aggregates.high_bandwidth_towers = store.distinct("tower_id", high)
+
+        aggregates.shrink_count = store.count(
+            store.equals("adjust_radius_action", "shrink")
+        )
+        expand = store.equals("adjust_radius_action", "expand")
+        aggregates.expand_count = store.count(expand)
+        aggregates.expand_towers = store.distinct("tower_id", expand)
+
+        errors = store.not_in("detected_error", NO_ERROR_VALUES)
+        aggregates.error_count = store.count(errors)
+        aggregates.error_types = store.value_counts("detected_error", errors)
+
+        aggregates.poor_rsrq_count = store.count(store.below("rsrq_db", POOR_RSRQ_DB))
+
+        high_latency = store.above("latency_ms", HIGH_LATENCY_MS)
+        aggregates.high_latency_count = store.count(high_latency)
+        aggregates.high_latency_sum = store.sum("latency_ms", high_latency)
+        aggregates.high_latency_towers = store.distinct("tower_id", high_latency)
+
+        packet_loss = store.above("packet_loss_pct", HIGH_PACKET_LOSS_PCT)
+        aggregates.packet_loss_count = store.count(packet_loss)
+        aggregates.packet_loss_sum = store.sum("packet_loss_pct", packet_loss)
+
+        aggregates.head_bandwidth = [
+            store.value("bandwidth_utilization_pct", i, 0) for i in range(min(3, count))
+        ]
+        aggregates.last_bandwidth = store.value("bandwidth_utilization_pct", -1, 0)
+
+        return aggregates
+
+    def update(self, record: dict) -> None:
+        """Fold a single telemetry record into the aggregates."""
+        tower = record.get("tower_id", "unknown")
+        timestamp = record.get("timestamp", "unknown")
+        bandwidth = record.get("bandwidth_utilization_pct")
+        latency = record.get("latency_ms")
+
+        if self.count == 0:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.count += 1
+
+        self.towers.add(tower)
+        self.regions.add(record.get("region_id", "unknown"))
+
+        if bandwidth is not None:
+            self.bandwidth_sum += bandwidth
+            if bandwidth < LOW_BANDWIDTH_PCT:
+                self.low_bandwidth_count += 1
+                self.low_bandwidth_towers.add(tower)
+            if bandwidth > HIGH_BANDWIDTH_PCT:
+                self.high_bandwidth_count += 1
+                self.high_bandwidth_towers.add(tower)
+        else:
+            bandwidth = 0
+        if len(self.head_bandwidth) < 3:
+            self.head_bandwidth.append(bandwidth)
+        self.last_bandwidth = bandwidth
+
+        if latency is not None:
+            self.latency_sum += latency
+            if latency > HIGH_LATENCY_MS:
+                self.high_latency_count += 1
+                self.high_latency_sum += latency
+                self.high_latency_towers.add(tower)
+
+        action = record.get("adjust_radius_action")
+        if action == "shrink":
+            self.shrink_count += 1
+        elif action == "expand":
+            self.expand_count += 1
+            self.expand_towers.add(tower)
+
+        error = record.get("detected_error")
+        if error not in NO_ERROR_VALUES:
+            self.error_count += 1
+            self.error_types[error] = self.error_types.get(error, 0) + 1
+
+        rsrq = record.get("rsrq_db")
+        if rsrq is not None and rsrq < POOR_RSRQ_DB:
+            self.poor_rsrq_count += 1
+
+        packet_loss = record.get("packet_loss_pct")
+        if packet_loss is not None and packet_loss > HIGH_PACKET_LOSS_PCT:
+            self.packet_loss_count += 1
+            self.packet_loss_sum += packet_loss
+
+    def merge(self, other: "TelemetryAggregates") -> "TelemetryAggregates":
+        """
+        Fold in the aggregates of the records that come right after ours.
+
+        Merging the partials of consecutive chunks in order gives the same
+        counts, sets, first/last values and error ordering as a single pass;
+        float sums may differ from a single pass in the last bits.
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.first_timestamp = other.first_timestamp
+        self.last_timestamp = other.last_timestamp
+        self.count += other.count
+
+        for name in self._SUMMED:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in self._UNIONED:
+            getattr(self, name).update(getattr(other, name))
+
+        for error, count in other.error_types.items():
+            self.error_types[error] = self.error_types.get(error, 0) + count
+
+        self.head_bandwidth = (self.head_bandwidth + other.head_bandwidth)[:3]
+        self.last_bandwidth = other.last_bandwidth
+        return self
+
+    @classmethod
+    def merge_all(
+        cls, partials: Iterable["TelemetryAggregates"]
+    ) -> "TelemetryAggregates":
+        """Merge the partial aggregates of consecutive chunks, in order."""
+        merged = cls()
+        for partial in partials:
+            merged.merge(partial)
+        return merged
+
+    def copy(self) -> "TelemetryAggregates":
+        """Independent copy, e.g. to merge into while readers use the original."""
+        clone = copy.copy(self)
+        for name in self._UNIONED:
+            setattr(clone, name, set(getattr(self, name)))
+        clone.error_types = dict(self.error_types)
+        clone.head_bandwidth = list(self.head_bandwidth)
+        return clone
+
+    def top_error(self) -> Optional[tuple]:
+        """Most common error as (error_type, count), first seen wins ties."""
+        if not self.error_types:
+            return None
+        return max(self.error_types.items(), key=lambda x: x[1])
@@ -0,0 +1,350 @@
+"""
+CSV Telemetry Reader for TRACE
+
+Reads OSS telemetry CSV exports, which carry the same fields as the JSON
+records, into typed values:
+1. Each column's type (bool, int, float, list or str) is inferred from the
+   first chunk that has values for it, and cached per header, so files with
+   a known header skip inference
+2. Rows are read and converted chunk by chunk, column at a time; for the
+   columnar path pandas' C reader parses numbers and booleans, and strings
+   are dictionary-encoded directly
+3. Stringified lists such as "['TX003', 'TX010']" become real lists
+4. A value that does not fit the inferred type widens the column
+   (int -> float -> str, anything else -> str) instead of failing
+
+Empty cells become None, like JSON nulls.
+"""
+
+import ast
+import csv
+import io
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .telemetry_store import (
+    CategoricalColumn,
+    Column,
+    ColumnStore,
+    NumericColumn,
+    ObjectColumn,
+    build_column,
+    concat_columns,
+)
+
+
+CSV_SUFFIXES = (".csv",)
+DEFAULT_CHUNK_ROWS = 1 << 16
+INFERENCE_SAMPLE = 1024  # Non-empty values per column used to infer its type
+
+BOOL, INT, FLOAT, LIST, STR = "bool", "int", "float", "list", "str"
+
+# Candidate types in inference order, and what each widens to on a mismatch
+_INFERENCE_ORDER = (BOOL, INT, FLOAT, LIST)
+_WIDENS_TO = {BOOL: STR, INT: FLOAT, FLOAT: STR, LIST: STR}
+
+_BOOLEANS = {"True": True, "False": False, "true": True, "false": False}
+_SIMPLE_LIST = re.compile(r"\[\s*(?:'[^'\\]*'\s*(?:,\s*'[^'\\]*'\s*)*)?\]")
+_LIST_ITEM = re.compile(r"'([^'\\]*)'")
+
+# Column types already inferred, keyed by the header row
+_schema_cache: Dict[Tuple[str, ...], List[Optional[str]]] = {}
+_schema_lock = threading.Lock()
+
+
+def _parse_bool(value: str) -> bool:
+    try:
+        return _BOOLEANS[value]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value!r}") from None
+
+
+def _parse_list(value: str) -> list:
+    # Fast path for the common ['a', 'b'] form, full literal parsing otherwise
+    if _SIMPLE_LIST.fullmatch(value):
+        return _LIST_ITEM.findall(value)
+    if not value.startswith("["):
+        raise ValueError(f"Not a list: {value!r}")
+    try:
+        parsed = ast.literal_eval(value)
+    except (SyntaxError, ValueError):
+        raise ValueError(f"Not a list: {value!r}") from None
+    if not isinstance(parsed, list):
+        raise ValueError(f"Not a list: {value!r}")
+    return parsed
+
+
+def _parse_int(value: str) -> int:
+    if "_" in value:  # int() accepts digit separators, CSV exports do not
+        raise ValueError(f"Not an integer: {value!r}")
+    return int(value)
+
+
+_PARSERS: Dict[str, Callable[[str], Any]] = {
+    BOOL: _parse_bool,
+    INT: _parse_int,
+    FLOAT: float,
+    LIST: _parse_list,
+    STR: str,
+}
+
+
+def infer_type(values: Sequence[str]) -> Optional[str]:
+    """
+    Narrowest column type that every sampled non-empty value parses as.
+
+    Returns None if every value is empty, so the type is decided later.
+    """
+    sample = []
+    for value in values:
+        if value != "":
+            sample.append(value)
+            if len(sample) == INFERENCE_SAMPLE:
+                break
+    if not sample:
+        return None
+    for kind in _INFERENCE_ORDER:
+        try:
+            for value in sample:
+                _PARSERS[kind](value)
+        except ValueError:
+            continue
+        return kind
+    return STR
+
+
+def convert_column(values: Sequence[str], kind: str) -> List[Any]:
+    """
+    Parse the raw strings of one column into Python values.
+
+    Empty cells become None.
+
+    Raises:
+        ValueError: If a value does not parse as kind
+    """
+    if kind == STR:
+        return [v if v != "" else None for v in values]
+    if kind == LIST:
+        parsed = _parse_unique(values, _parse_list)
+        return [list(parsed[v]) if v != "" else None for v in values]
+    parse = _PARSERS[kind]
+    return [parse(v) if v != "" else None for v in values]
+
+
+def frame_column(series: "pd.Series", kind: Optional[str]) -> Tuple[Column, str]:
+    """
+    Turn one column of a pandas chunk into a store column.
+
+    Returns the column and the (possibly widened) column type.
+    """
+    if kind in (STR, LIST):
+        # Read as str; factorize keeps categories in first-seen order and
+        # gives empty cells (NaN) code -1, which is remapped to a None category
+        codes, uniques = pd.factorize(series)
+        codes = codes.astype(np.int32)
+        if kind == LIST:
+            try:
+                parsed = [_parse_list(v) for v in uniques] + [None]
+            except ValueError:
+                return frame_column(series, STR)
+            return ObjectColumn([_copy(parsed[c]) for c in codes.tolist()]), LIST
+        categories = uniques.tolist()
+        if (codes < 0).any():
+            codes[codes < 0] = len(categories)
+            categories.append(None)
+        return CategoricalColumn(codes, categories), STR
+
+    values = series.to_numpy()
+    if values.dtype == np.bool_:
+        return NumericColumn(values), kind or BOOL
+    if values.dtype == np.int64:
+        return NumericColumn(values), kind if kind == FLOAT else INT
+    if values.dtype == np.float64:
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        present = None if present.all() else present
+        if kind in (INT, None) and np.array_equal(filled, np.trunc(filled)):
+            if np.abs(filled).max(initial=0) < 2**53:  # Exact as int64
+                return NumericColumn(filled.astype(np.int64), present), INT
+        return NumericColumn(filled, present), FLOAT
+
+    # Text in a numeric or boolean column (or booleans mixed with blanks)
+    column = build_column([None if v is None or v != v else v for v in values])
+    if isinstance(column, NumericColumn) and column.values.dtype == np.bool_:
+        return column, BOOL
+    return column, STR if isinstance(column, CategoricalColumn) else kind
+
+
+def _parse_unique(values: Sequence[str], parse: Callable[[str], Any]) -> Dict[str, Any]:
+    # Telemetry lists repeat a lot, so parse each distinct string once
+    return {v: parse(v) for v in set(values) if v != ""}
+
+
+def _copy(value: Optional[list]) -> Optional[list]:
+    return None if value is None else list(value)
+
+
+class CsvRecordReader:
+    """
+    Read a telemetry CSV file in typed chunks.
+
+    Iterating yields one dict per row. `fields` and `schema` (one type per
+    field) are available once the first chunk has been read.
+    """
+
+    layout = "csv"
+
+    def __init__(
+        self,
+        source: Union[str, Path, io.TextIOBase],
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ):
+        self.source = source
+        self.chunk_rows = chunk_rows
+        self.fields: List[str] = []
+        self.schema: List[Optional[str]] = []
+        self.schema_cached = False
+
+    def iter_chunks(self) -> Iterator[Dict[str, List[Any]]]:
+        """Yield chunks as {field: Python values}, at most chunk_rows rows each."""
+        for raw_columns in self._raw_chunks():
+            yield {
+                name: self._convert(i, values, convert_column)
+                for i, (name, values) in enumerate(zip(self.fields, raw_columns))
+            }
+
+    def __iter__(self) -> Iterator[dict]:
+        for chunk in self.iter_chunks():
+            columns = [chunk[name] for name in self.fields]
+            for row in zip(*columns):
+                yield dict(zip(self.fields, row))
+
+    def read_store(self) -> ColumnStore:
+        """
+        Read the whole file into a ColumnStore.
+
+        Chunks are tokenized and parsed by pandas' C reader; string and list
+        columns of the cached schema are read as text so they never get
+        reinterpreted as numbers.
+        """
+        chunks = list(self.iter_stores())
+        num_rows = sum(len(chunk) for chunk in chunks)
+        columns = {
+            name: concat_columns([chunk.columns[name] for chunk in chunks], num_rows)
+            for name in self.fields
+        }
+        return ColumnStore(columns, num_rows)
+
+    def iter_stores(self) -> Iterator[ColumnStore]:
+        """Yield the file as one ColumnStore per chunk of up to chunk_rows rows."""
+        if isinstance(self.source, (str, Path)):
+            with open(self.source, "r", encoding="utf-8", newline="") as f:
+                yield from self._iter_stores(f)
+        else:
+            yield from self._iter_stores(self.source)
+
+    def _iter_stores(self, f: io.TextIOBase) -> Iterator[ColumnStore]:
+        header = self._read_header(f)
+        if header is None:
+            return
+        if None in self.schema:
+            start = f.tell()
+            sample = pd.read_csv(
+                f, header=None, names=header, dtype=str, keep_default_na=False,
+                nrows=INFERENCE_SAMPLE, skip_blank_lines=True,
+            )
+            self.schema = [
+                kind if kind is not None else infer_type(sample[name].tolist())
+                for name, kind in zip(header, self.schema)
+            ]
+            f.seek(start)
+
+        frames = pd.read_csv(
+            f,
+            header=None,
+            names=header,
+            dtype={name: str for name, kind in zip(header, self.schema) if kind in (STR, LIST)},
+            keep_default_na=False,
+            na_values=[""],
+            float_precision="round_trip",
+            chunksize=self.chunk_rows,
+        )
+        try:
+            for frame in frames:
+                columns = {}
+                for i, name in enumerate(header):
+                    columns[name], self.schema[i] = frame_column(
+                        frame[name], self.schema[i]
+                    )
+                yield ColumnStore(columns, len(frame))
+        except pd.errors.ParserError as e:
+            raise ValueError(str(e)) from None
+
+        self._cache_schema(header)
+
+    def _convert(self, i: int, values: Sequence[str], convert: Callable) -> Any:
+        """Convert one column of a chunk, widening its type until it fits."""
+        if self.schema[i] is None:
+            self.schema[i] = infer_type(values)
+        while True:
+            try:
+                return convert(values, self.schema[i] or STR)
+            except ValueError:
+                self.schema[i] = _WIDENS_TO[self.schema[i]]
+
+    def _raw_chunks(self) -> Iterator[List[Tuple[str, ...]]]:
+        if isinstance(self.source, (str, Path)):
+            with open(self.source, "r", encoding="utf-8", newline="") as f:
+                yield from self._read_raw_chunks(f)
+        else:
+            yield from self._read_raw_chunks(self.source)
+
+    def _read_header(self, f: io.TextIOBase) -> Optional[List[str]]:
+        """Read the header line and pick up the cached schema for it."""
+        line = f.readline()
+        header = next(csv.reader([line]), None) if line.strip() else None
+        if not header:
+            return None
+        if len(set(header)) != len(header):
+            raise ValueError("CSV header has duplicate column names")
+        self.fields = header
+
+        with _schema_lock:
+            cached = _schema_cache.get(tuple(header))
+        self.schema_cached = cached is not None
+        self.schema = list(cached) if cached else [None] * len(header)
+        return header
+
+    def _cache_schema(self, header: List[str]) -> None:
+        with _schema_lock:
+            _schema_cache[tuple(header)] = list(self.schema)
+
+    def _read_raw_chunks(self, f: io.TextIOBase) -> Iterator[List[Tuple[str, ...]]]:
+        """Yield chunks of raw string columns; keeps self.schema up to date."""
+        header = self._read_header(f)
+        if header is None:
+            return
+
+        reader = csv.reader(f)
+        rows: List[List[str]] = []
+        for row in reader:
+            if len(row) != len(header):
+                if not row:
+                    continue  # Blank line
+                raise ValueError(
+                    f"Line {reader.line_num + 1} has {len(row)} fields, "
+                    f"expected {len(header)}"
+                )
+            rows.append(row)
+            if len(rows) == self.chunk_rows:
+                yield list(zip(*rows))
+                rows = []
+        if rows:
+            yield list(zip(*rows))
+
+        self._cache_schema(header)
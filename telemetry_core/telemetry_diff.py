@@ -0,0 +1,531 @@
+"""
+Streaming Dataset Diff for TRACE
+
+Compares two telemetry datasets chunk by chunk, without holding either one in
+memory:
+1. Each chunk (a ColumnStore of a few thousand rows) is grouped with numpy
+   into per-(tower, time bucket) accumulators, where a bucket is a slot of
+   the day (e.g. 14:15-14:30), so different days line up
+2. When the accumulators outgrow a key budget they are hash-partitioned by
+   tower and spilled to temporary files; the join then runs one partition at
+   a time, so memory is bounded by the budget rather than the data
+3. Joined buckets give per-tower metric deltas on like-for-like time slots;
+   per-region deltas, new/removed towers and error-type shifts come from
+   running totals
+
+The result contains only JSON-serializable values (lists, dicts, numbers).
+"""
+
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .telemetry_aggregates import NO_ERROR_VALUES
+from .telemetry_index import NOT_A_TIME, epoch_ns
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    ColumnStore,
+    NumericColumn,
+)
+
+
+# Metrics compared per tower and region
+DIFF_METRICS = (
+    "bandwidth_utilization_pct",
+    "latency_ms",
+    "cpu_util_pct",
+    "packet_loss_pct",
+)
+# Dataset-wide averages, kept in the original comparison format
+SUMMARY_METRICS = ("bandwidth_utilization_pct", "latency_ms", "cpu_util_pct")
+
+DEFAULT_BUCKET_MINUTES = 15
+DEFAULT_SPILL_KEYS = int(os.environ.get("DIFF_SPILL_KEYS", "500000"))
+SPILL_PARTITIONS = 16
+MAX_LISTED_TOWERS = 50  # New/removed tower IDs listed in a result
+DEFAULT_TOP_TOWERS = 10
+
+_NUM_METRICS = len(DIFF_METRICS)
+
+# Accumulator layout: [count, sum_0, n_0, sum_1, n_1, ...] over DIFF_METRICS
+Accumulator = List[float]
+BucketKey = Tuple[Any, int]
+
+
+def diff_datasets(
+    chunks1: Iterable[ColumnStore],
+    chunks2: Iterable[ColumnStore],
+    bucket_minutes: int = DEFAULT_BUCKET_MINUTES,
+    top_towers: int = DEFAULT_TOP_TOWERS,
+    spill_keys: int = DEFAULT_SPILL_KEYS,
+) -> dict:
+    """
+    Diff two datasets, each given as a stream of ColumnStore chunks.
+
+    Args:
+        chunks1: Baseline data (consumed once)
+        chunks2: Comparison data
+        bucket_minutes: Width of the time-of-day buckets towers are joined on
+        top_towers: Number of towers with the largest changes to report
+        spill_keys: (tower, bucket) keys held in memory per dataset before
+            spilling to disk
+
+    Returns:
+        dict: JSON-serializable comparison
+    """
+    if bucket_minutes <= 0 or 24 * 60 % bucket_minutes:
+        raise ValueError("bucket_minutes must be a positive divisor of 1440")
+
+    with tempfile.TemporaryDirectory(prefix="trace-diff-") as spill_dir:
+        sides = [
+            _Side(os.path.join(spill_dir, str(i)), bucket_minutes * 60, spill_keys)
+            for i in (1, 2)
+        ]
+        for side, chunks in zip(sides, (chunks1, chunks2)):
+            for chunk in chunks:
+                side.add(chunk)
+        join = _join(*sides)
+
+    return _report(sides[0], sides[1], join, bucket_minutes, top_towers)
+
+
+class _Side:
+    """Running totals of one dataset, with spillable per-bucket accumulators."""
+
+    def __init__(self, spill_path: str, bucket_seconds: int, spill_keys: int):
+        self.spill_path = spill_path
+        self.bucket_seconds = bucket_seconds
+        self.buckets_per_day = 24 * 3600 // bucket_seconds
+        self.spill_keys = spill_keys
+        self.spilled = False
+
+        self.count = 0
+        self.unbucketed = 0
+        self.total = _new_accumulator()
+        self.errors: Dict[Any, int] = {}
+        self.towers: Dict[Any, list] = {}  # tower -> [region, accumulator]
+        self.regions: Dict[Any, list] = {}  # region -> [towers, acc, errors]
+        self.buckets: Dict[BucketKey, Accumulator] = {}
+        self.time_buckets: Dict[Any, int] = {}  # timestamp -> bucket
+
+    def add(self, store: ColumnStore) -> None:
+        """Fold one chunk into the running totals."""
+        n = len(store)
+        if n == 0:
+            return
+        self.count += n
+        metrics = [_metric(store, name) for name in DIFF_METRICS]
+        _, counts, sums, present = _group(np.zeros(n, dtype=np.int64), 1, metrics)
+        _fold(self.total, counts, sums, present, 0)
+
+        tower_codes, towers = _encode(store, "tower_id")
+        region_codes, regions = _encode(store, "region_id")
+        error_codes, errors = _encode(store, "detected_error", NO_ERROR_VALUES)
+
+        for code, count in _counts(error_codes):
+            error = errors[code]
+            self.errors[error] = self.errors.get(error, 0) + count
+
+        # Regions: accumulators, tower sets and error counts
+        keys, counts, sums, present = _group(region_codes, len(regions), metrics)
+        for i, code in enumerate(keys.tolist()):
+            stats = self.regions.get(regions[code])
+            if stats is None:
+                stats = [set(), _new_accumulator(), {}]
+                self.regions[regions[code]] = stats
+            _fold(stats[1], counts, sums, present, i)
+        pairs = region_codes * (len(towers) + 1) + tower_codes
+        valid = (region_codes >= 0) & (tower_codes >= 0)
+        for pair in np.unique(pairs[valid]).tolist():
+            region, tower = divmod(pair, len(towers) + 1)
+            self.regions[regions[region]][0].add(towers[tower])
+        pairs = region_codes * (len(errors) + 1) + error_codes
+        valid = (region_codes >= 0) & (error_codes >= 0)
+        for pair, count in _counts(pairs[valid]):
+            region, error = divmod(pair, len(errors) + 1)
+            region_errors = self.regions[regions[region]][2]
+            error = errors[error]
+            region_errors[error] = region_errors.get(error, 0) + count
+
+        # Towers, with the region of their first record
+        keys, counts, sums, present = _group(tower_codes, len(towers), metrics)
+        first_rows = _first_rows(tower_codes, keys)
+        for i, code in enumerate(keys.tolist()):
+            stats = self.towers.get(towers[code])
+            if stats is None:
+                region_code = region_codes[first_rows[i]]
+                region = regions[region_code] if region_code >= 0 else None
+                stats = self.towers[towers[code]] = [region, _new_accumulator()]
+            _fold(stats[1], counts, sums, present, i)
+
+        # (tower, time-of-day bucket)
+        bucket_codes = self._time_buckets(store)
+        with_tower = tower_codes >= 0
+        self.unbucketed += int(np.count_nonzero(with_tower & (bucket_codes < 0)))
+        valid = with_tower & (bucket_codes >= 0)
+        pair_codes = np.where(
+            valid, tower_codes * self.buckets_per_day + bucket_codes, -1
+        )
+        keys, counts, sums, present = _group(
+            pair_codes, len(towers) * self.buckets_per_day, metrics
+        )
+        for i, pair in enumerate(keys.tolist()):
+            tower, bucket = divmod(pair, self.buckets_per_day)
+            key = (towers[tower], bucket)
+            acc = self.buckets.get(key)
+            if acc is None:
+                if len(self.buckets) >= self.spill_keys:
+                    self.spill()
+                acc = self.buckets[key] = _new_accumulator()
+            _fold(acc, counts, sums, present, i)
+
+    def spill(self) -> None:
+        """Append the in-memory buckets to their partition files."""
+        partitions: Dict[int, list] = {}
+        for key, acc in self.buckets.items():
+            partitions.setdefault(_partition(key[0]), []).append((key, acc))
+        os.makedirs(self.spill_path, exist_ok=True)
+        for partition, items in partitions.items():
+            with open(self._partition_file(partition), "ab") as f:
+                pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.buckets = {}
+        self.spilled = True
+
+    def partition(self, partition: int) -> Dict[BucketKey, Accumulator]:
+        """Buckets of one partition, merged across spills."""
+        buckets: Dict[BucketKey, Accumulator] = {}
+        try:
+            f = open(self._partition_file(partition), "rb")
+        except FileNotFoundError:
+            return buckets
+        with f:
+            while True:
+                try:
+                    items = pickle.load(f)
+                except EOFError:
+                    return buckets
+                for key, acc in items:
+                    known = buckets.get(key)
+                    if known is None:
+                        buckets[key] = acc
+                    else:
+                        _merge(known, acc)
+
+    def _partition_file(self, partition: int) -> str:
+        return os.path.join(self.spill_path, f"{partition:02d}.pkl")
+
+    def _time_buckets(self, store: ColumnStore) -> np.ndarray:
+        """Time-of-day bucket of every row, -1 without a valid timestamp."""
+        codes, timestamps = _encode(store, "timestamp")
+        used = np.unique(codes[codes >= 0]).tolist()
+        # Chunks of a stream share most timestamps: parse only the unseen ones,
+        # keeping the memo within the key budget
+        known = self.time_buckets
+        if len(known) > self.spill_keys:
+            known.clear()
+        new = [timestamps[code] for code in used if timestamps[code] not in known]
+        if new:
+            known.update(zip(new, _time_of_day_buckets(new, self.bucket_seconds)))
+        lookup = np.full(len(timestamps) + 1, -1, dtype=np.int64)
+        lookup[used] = [known[timestamps[code]] for code in used]
+        return lookup[codes]  # Code -1 picks the trailing -1
+
+
+def _join(side1: _Side, side2: _Side) -> dict:
+    """Join both sides on (tower, bucket), one partition at a time."""
+    if side1.spilled or side2.spilled:
+        side1.spill()
+        side2.spill()
+        partitions = (
+            (side1.partition(p), side2.partition(p)) for p in range(SPILL_PARTITIONS)
+        )
+    else:
+        partitions = iter([(side1.buckets, side2.buckets)])
+
+    matched = only1 = only2 = 0
+    # tower -> [matched buckets, delta_sum_0, n_0, delta_sum_1, n_1, ...]
+    tower_deltas: Dict[Any, list] = {}
+    for buckets1, buckets2 in partitions:
+        for key, acc1 in buckets1.items():
+            acc2 = buckets2.get(key)
+            if acc2 is None:
+                only1 += 1
+                continue
+            matched += 1
+            deltas = tower_deltas.get(key[0])
+            if deltas is None:
+                deltas = tower_deltas[key[0]] = _new_accumulator()
+            deltas[0] += 1
+            for i in range(_NUM_METRICS):
+                n1, n2 = acc1[2 + 2 * i], acc2[2 + 2 * i]
+                if n1 and n2:
+                    mean1 = acc1[1 + 2 * i] / n1
+                    mean2 = acc2[1 + 2 * i] / n2
+                    deltas[1 + 2 * i] += mean2 - mean1
+                    deltas[2 + 2 * i] += 1
+        only2 += sum(1 for key in buckets2 if key not in buckets1)
+
+    return {
+        "matched": matched,
+        "only1": only1,
+        "only2": only2,
+        "tower_deltas": tower_deltas,
+    }
+
+
+def _report(
+    side1: _Side, side2: _Side, join: dict, bucket_minutes: int, top_towers: int
+) -> dict:
+    metrics = {}
+    if side1.count and side2.count:
+        for metric in SUMMARY_METRICS:
+            # Missing values count as 0, as in the dataset-wide summaries
+            i = DIFF_METRICS.index(metric)
+            avg1 = side1.total[1 + 2 * i] / side1.count
+            avg2 = side2.total[1 + 2 * i] / side2.count
+            change = ((avg2 - avg1) / avg1 * 100) if avg1 != 0 else 0
+            metrics[metric] = {
+                "dataset1_avg": round(avg1, 2),
+                "dataset2_avg": round(avg2, 2),
+                "change_percent": round(change, 2),
+            }
+
+    towers1, towers2 = side1.towers.keys(), side2.towers.keys()
+    new = sorted(towers2 - towers1, key=str)
+    removed = sorted(towers1 - towers2, key=str)
+
+    return {
+        "records": {"dataset1": side1.count, "dataset2": side2.count},
+        "size_change": side2.count - side1.count,
+        "metrics": metrics,
+        "towers": {
+            "dataset1": len(towers1),
+            "dataset2": len(towers2),
+            "common": len(towers1 & towers2),
+            "new": new[:MAX_LISTED_TOWERS],
+            "new_count": len(new),
+            "removed": removed[:MAX_LISTED_TOWERS],
+            "removed_count": len(removed),
+        },
+        "regions": {
+            str(region): _region_diff(
+                side1.regions.get(region), side2.regions.get(region)
+            )
+            for region in sorted(side1.regions.keys() | side2.regions.keys(), key=str)
+        },
+        "errors": _error_shift(side1.errors, side2.errors),
+        "tower_changes": _tower_changes(side1, side2, join, top_towers),
+        "time_buckets": {
+            "bucket_minutes": bucket_minutes,
+            "alignment": "time_of_day",
+            "matched": join["matched"],
+            "only_dataset1": join["only1"],
+            "only_dataset2": join["only2"],
+            "records_without_timestamp": side1.unbucketed + side2.unbucketed,
+        },
+    }
+
+
+def _region_diff(stats1: Optional[list], stats2: Optional[list]) -> dict:
+    empty = [set(), _new_accumulator(), {}]
+    towers1, acc1, errors1 = stats1 or empty
+    towers2, acc2, errors2 = stats2 or empty
+    return {
+        "records": {"dataset1": int(acc1[0]), "dataset2": int(acc2[0])},
+        "towers": {"dataset1": len(towers1), "dataset2": len(towers2)},
+        "metrics": {
+            metric: _metric_change(acc1, acc2, i)
+            for i, metric in enumerate(DIFF_METRICS)
+            if acc1[2 + 2 * i] or acc2[2 + 2 * i]
+        },
+        "errors": _error_shift(errors1, errors2),
+    }
+
+
+def _tower_changes(side1: _Side, side2: _Side, join: dict, top: int) -> List[dict]:
+    """Towers with the largest like-for-like bandwidth (then latency) change."""
+    changes = []
+    for tower, deltas in join["tower_deltas"].items():
+        mean_deltas = {
+            metric: round(deltas[1 + 2 * i] / deltas[2 + 2 * i], 2)
+            for i, metric in enumerate(DIFF_METRICS)
+            if deltas[2 + 2 * i]
+        }
+        changes.append(
+            {
+                "tower_id": tower,
+                "region_id": side2.towers[tower][0],
+                "records": {
+                    "dataset1": int(side1.towers[tower][1][0]),
+                    "dataset2": int(side2.towers[tower][1][0]),
+                },
+                "matched_buckets": int(deltas[0]),
+                "deltas": mean_deltas,
+            }
+        )
+
+    def magnitude(change: dict) -> tuple:
+        deltas = change["deltas"]
+        return tuple(-abs(deltas.get(metric, 0)) for metric in DIFF_METRICS)
+
+    changes.sort(key=lambda c: (magnitude(c), str(c["tower_id"])))
+    return changes[:top]
+
+
+def _metric_change(acc1: Accumulator, acc2: Accumulator, i: int) -> dict:
+    """Averages over the records that report the metric, and their change."""
+    n1, n2 = acc1[2 + 2 * i], acc2[2 + 2 * i]
+    avg1 = acc1[1 + 2 * i] / n1 if n1 else None
+    avg2 = acc2[1 + 2 * i] / n2 if n2 else None
+    change = None
+    if avg1 is not None and avg2 is not None:
+        change = round(avg2 - avg1, 2)
+    return {
+        "dataset1_avg": None if avg1 is None else round(avg1, 2),
+        "dataset2_avg": None if avg2 is None else round(avg2, 2),
+        "change": change,
+    }
+
+
+def _error_shift(errors1: Dict[Any, int], errors2: Dict[Any, int]) -> Dict[str, dict]:
+    shift = {}
+    for error in sorted(errors1.keys() | errors2.keys(), key=str):
+        count1, count2 = errors1.get(error, 0), errors2.get(error, 0)
+        shift[str(error)] = {
+            "dataset1": count1,
+            "dataset2": count2,
+            "change": count2 - count1,
+        }
+    return shift
+
+
+# ----------------------------------------------------------------------
+# Vectorized grouping
+# ----------------------------------------------------------------------
+
+
+def _metric(store: ColumnStore, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(values, present) of a metric; non-numeric values count as missing."""
+    n = len(store)
+    column = store.columns.get(name)
+    if isinstance(column, NumericColumn) and column.values.dtype != np.bool_:
+        present = column.present
+        if present is None:
+            present = np.ones(n, dtype=bool)
+        return column.values.astype(np.float64), present
+    if column is None or isinstance(column, CategoricalColumn):
+        return np.zeros(n), np.zeros(n, dtype=bool)
+    # Mixed-type column: keep the numbers only
+    values = [
+        v if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+        for v in column.tolist()
+    ]
+    present = np.array([v is not None for v in values], dtype=bool)
+    return np.array([v or 0 for v in values], dtype=np.float64), present
+
+
+def _encode(
+    store: ColumnStore, name: str, missing: tuple = (None,)
+) -> Tuple[np.ndarray, list]:
+    """(codes, values) of a field; -1 for absent rows and values in missing."""
+    column = store.columns.get(name)
+    if column is None:
+        return np.full(len(store), -1, dtype=np.int64), []
+    if isinstance(column, CategoricalColumn):
+        codes = column.codes.astype(np.int64)
+        values = column.categories
+    else:
+        index: Dict[Any, int] = {}
+        codes = np.fromiter(
+            (
+                index.setdefault(v, len(index)) if _hashable(v) else -1
+                for v in column.tolist()
+            ),
+            dtype=np.int64,
+            count=len(store),
+        )
+        values = list(index)
+    excluded = [code for code, value in enumerate(values) if value in missing]
+    if excluded:
+        codes = np.where(np.isin(codes, excluded), -1, codes)
+    return codes, values
+
+
+def _group(codes: np.ndarray, num_codes: int, metrics: list) -> tuple:
+    """
+    Per-code row counts and metric sums/counts, skipping rows with code -1.
+
+    Returns (present codes, counts, sums, present counts); the last three are
+    indexed by position in the first.
+    """
+    valid = codes >= 0
+    if num_codes > 4 * len(codes):
+        # Sparse codes: compact them before counting
+        keys, inverse = np.unique(codes[valid], return_inverse=True)
+    else:
+        keys, inverse = None, codes[valid]
+    size = len(keys) if keys is not None else num_codes
+    counts = np.bincount(inverse, minlength=size)
+    sums = [
+        np.bincount(inverse, weights=np.where(p, v, 0)[valid], minlength=size)
+        for v, p in metrics
+    ]
+    present = [
+        np.bincount(inverse, weights=p[valid], minlength=size) for _, p in metrics
+    ]
+    if keys is None:
+        keys = np.flatnonzero(counts)
+        counts = counts[keys]
+        sums = [s[keys] for s in sums]
+        present = [p[keys] for p in present]
+    return keys, counts, sums, present
+
+
+def _fold(acc: Accumulator, counts, sums, present, i: int) -> None:
+    acc[0] += int(counts[i])
+    for m in range(_NUM_METRICS):
+        acc[1 + 2 * m] += float(sums[m][i])
+        acc[2 + 2 * m] += int(present[m][i])
+
+
+def _counts(codes: np.ndarray) -> List[Tuple[int, int]]:
+    """(code, count) of every code present, skipping -1."""
+    keys, counts = np.unique(codes[codes >= 0], return_counts=True)
+    return list(zip(keys.tolist(), counts.tolist()))
+
+
+def _first_rows(codes: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Row of the first occurrence of each key (keys: sorted codes present)."""
+    rows = np.flatnonzero(codes >= 0)
+    _, first = np.unique(codes[rows], return_index=True)
+    return rows[first]
+
+
+def _new_accumulator() -> Accumulator:
+    return [0] * (1 + 2 * _NUM_METRICS)
+
+
+def _merge(acc: Accumulator, other: Accumulator) -> None:
+    for i, value in enumerate(other):
+        acc[i] += value
+
+
+def _hashable(value: Any) -> bool:
+    return value is not MISSING and not isinstance(value, (list, dict, set))
+
+
+def _time_of_day_buckets(timestamps: List[Any], bucket_seconds: int) -> List[int]:
+    """Time-of-day buckets of ISO 8601 timestamps (UTC), -1 where invalid."""
+    ns = epoch_ns(timestamps)
+    seconds = ns // 1_000_000_000 % (24 * 3600)
+    return np.where(ns == NOT_A_TIME, -1, seconds // bucket_seconds).tolist()
+
+
+def _partition(tower: Any) -> int:
+    # crc32 rather than hash(): stable across processes and string hash seeds
+    return zlib.crc32(str(tower).encode("utf-8")) % SPILL_PARTITIONS
@@ -0,0 +1,441 @@
+"""
+Stateful Tower Fleet Model for TRACE
+
+Keeps the recent state of every tower, so tools answer from one shared,
+consistent picture of the fleet instead of fresh random numbers per call:
+1. A registry of towers per region, filled in as towers first report
+2. A fixed-size ring buffer of recent KPI samples per tower (all numeric KPIs
+   in one numpy array), so the latest sample is O(1) and a window O(window)
+3. A pluggable record source: replay of a recorded trace (data/*.json, *.csv)
+   in timestamp order, looped with shifted timestamps, or the seeded
+   synthetic generator
+4. A simulated clock: on creation the source fills every ring, then records
+   are consumed up to the last warm-up timestamp + elapsed wall time x speed,
+   lazily on each read. State only changes as simulated time passes, so
+   reads in between are repeatable and cacheable. After an idle period the
+   source skips ahead to the rounds the rings keep, so catching up costs
+   O(ring size x towers) however long the fleet was idle
+5. Hourly load forecasts per tower, from the trend over its ring, so they
+   follow the telemetry's own timeline rather than the wall clock
+
+Configured with FLEET_SOURCE ("synthetic" or a trace path), FLEET_TOWERS and
+FLEET_SEED (synthetic fleet), FLEET_RING_SIZE and FLEET_SPEED.
+"""
+
+import bisect
+import itertools
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .telemetry_csv import CSV_SUFFIXES, CsvRecordReader
+from .telemetry_stream import JsonRecordReader
+from .telemetry_synthetic import (
+    DEFAULT_INTERVAL_S,
+    DEFAULT_SEED,
+    DEFAULT_START,
+    stream_records,
+)
+
+
+FLEET_SOURCE = os.environ.get("FLEET_SOURCE", "synthetic")
+FLEET_TOWERS = int(os.environ.get("FLEET_TOWERS", "200"))
+FLEET_SEED = int(os.environ.get("FLEET_SEED", str(DEFAULT_SEED)))
+# Samples kept per tower; at the synthetic 1-minute interval, about 5 hours
+DEFAULT_RING_SIZE = int(os.environ.get("FLEET_RING_SIZE", "288"))
+# Simulated seconds per wall-clock second
+DEFAULT_SPEED = float(os.environ.get("FLEET_SPEED", "1"))
+
+# Numeric KPIs kept in the ring buffers, one column each
+KPI_FIELDS = (
+    "bandwidth_utilization_pct",
+    "connected_users",
+    "latency_ms",
+    "packet_loss_pct",
+    "rsrq_db",
+    "cpu_util_pct",
+    "power_voltage_v",
+    "coverage_gap_pct",
+)
+# Replayed traces with a single timestamp are repeated this far apart
+DEFAULT_REPLAY_STEP_S = 60.0
+# Records ingested per hold of the fleet lock while catching up
+SYNC_BATCH_RECORDS = 4096
+
+_KPI_COLUMN = {name: i for i, name in enumerate(KPI_FIELDS)}
+
+
+def epoch_seconds(timestamp: str) -> float:
+    """Seconds since the epoch of an ISO 8601 timestamp (naive means UTC)."""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def trace_records(path: Union[str, Path]) -> List[dict]:
+    """Read a recorded trace (JSON, NDJSON or CSV), sorted by timestamp."""
+    path = Path(path)
+    if path.suffix.lower() in CSV_SUFFIXES:
+        records = list(CsvRecordReader(path))
+    else:
+        records = list(JsonRecordReader(path))
+    # Stable, so records of one tower with equal timestamps keep file order
+    records.sort(key=lambda record: epoch_seconds(record["timestamp"]))
+    return records
+
+
+class RecordSource:
+    """
+    Records in timestamp order that can skip ahead without producing the rest.
+
+    Iterates like a generator over open_at(-inf); skip_to(seconds) (forward
+    only) continues with open_at(seconds), the records from the first one
+    timestamped at or after seconds.
+    """
+
+    def __init__(self, open_at: Callable[[float], Iterator[dict]]):
+        self._open_at = open_at
+        self._records = open_at(-math.inf)
+
+    def __iter__(self) -> "RecordSource":
+        return self
+
+    def __next__(self) -> dict:
+        return next(self._records)
+
+    def skip_to(self, seconds: float) -> None:
+        self._records = self._open_at(seconds)
+
+
+def replay_source(path: Union[str, Path], loop: bool = True) -> RecordSource:
+    """
+    Records of a trace in timestamp order.
+
+    With loop, the trace repeats without end; each pass is shifted by the
+    trace's span plus its smallest gap between timestamps, so timestamps keep
+    increasing. Skipping ahead finds the pass and the record by bisection.
+    """
+    records = trace_records(path)
+    times = np.array([epoch_seconds(r["timestamp"]) for r in records])
+    gaps = np.diff(np.unique(times))
+    step = float(gaps.min()) if len(gaps) else DEFAULT_REPLAY_STEP_S
+    period = float(times[-1] - times[0]) + step if records else 0.0
+    times = times.tolist()
+
+    def records_from(seconds: float) -> Iterator[dict]:
+        if not records:
+            return
+        first_lap = 0
+        if loop and seconds > times[0]:
+            first_lap = int((seconds - times[0]) // period)
+        first = bisect.bisect_left(times, seconds - first_lap * period)
+        for lap in itertools.count(first_lap) if loop else range(1):
+            for i in range(first, len(records)):
+                record = records[i]
+                if lap:
+                    record = dict(record)
+                    record["timestamp"] = datetime.fromtimestamp(
+                        times[i] + lap * period, timezone.utc
+                    ).isoformat()
+                yield record
+            first = 0
+
+    return RecordSource(records_from)
+
+
+def synthetic_source(
+    num_towers: int = FLEET_TOWERS, seed: int = FLEET_SEED
+) -> RecordSource:
+    """Seeded synthetic fleet telemetry without end."""
+    origin = DEFAULT_START.timestamp()
+
+    def records_from(seconds: float) -> Iterator[dict]:
+        first_round = 0
+        if seconds > origin:
+            first_round = math.ceil((seconds - origin) / DEFAULT_INTERVAL_S)
+        return stream_records(num_towers, seed, first_round=first_round)
+
+    return RecordSource(records_from)
+
+
+class TowerHistory:
+    """Recent KPI samples of one tower, in a ring buffer."""
+
+    def __init__(self, record: dict, ring_size: int):
+        self.tower_id = record["tower_id"]
+        self.region_id = record.get("region_id")
+        self.capacity_users = record.get("capacity_users")
+        self.times = np.zeros(ring_size)
+        self.values = np.full((ring_size, len(KPI_FIELDS)), np.nan)
+        self.errors = np.zeros(ring_size, dtype=bool)
+        # Samples ever appended; the next one goes to slot count % ring_size
+        self.count = 0
+        self.latest: dict = record
+
+    def append(self, seconds: float, record: dict) -> None:
+        slot = self.count % len(self.times)
+        self.times[slot] = seconds
+        row = self.values[slot]
+        for i, name in enumerate(KPI_FIELDS):
+            value = record.get(name)
+            row[i] = value if isinstance(value, (int, float)) else np.nan
+        self.errors[slot] = record.get("detected_error") not in ("none", None, "")
+        self.count += 1
+        self.latest = record
+
+    def window(
+        self, samples: Optional[int] = None, seconds: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Copy of the most recent samples, oldest first.
+
+        Args:
+            samples: Keep at most this many samples
+            seconds: Keep only samples this close to the latest one
+
+        Returns:
+            {"times": ..., "errors": ..., kpi: ...} arrays of equal length
+        """
+        size = len(self.times)
+        n = min(self.count, size, samples if samples is not None else size)
+        end = self.count % size
+        rows = np.arange(end - n, end) % size
+        times = self.times[rows]
+        if seconds is not None and n:
+            keep = times >= times[-1] - seconds
+            rows, times = rows[keep], times[keep]
+        window = {"times": times, "errors": self.errors[rows]}
+        values = self.values[rows]
+        for name, column in _KPI_COLUMN.items():
+            window[name] = values[:, column]
+        return window
+
+
+class TowerFleet:
+    """
+    Shared state of the tower fleet, fed by a record source.
+
+    Args:
+        source: Telemetry records in timestamp order (e.g. replay_source or
+            synthetic_source); a RecordSource lets a catch-up skip rounds
+            without reading them
+        ring_size: Samples kept per tower
+        speed: Simulated seconds per wall-clock second
+        clock: Wall clock in seconds (time.monotonic; replaceable in tests)
+    """
+
+    def __init__(
+        self,
+        source: Iterable[dict],
+        ring_size: int = DEFAULT_RING_SIZE,
+        speed: float = DEFAULT_SPEED,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ring_size = ring_size
+        self.speed = speed
+        self._clock = clock
+        self._source = iter(source)
+        self._pending: Optional[Tuple[float, dict]] = None
+        self._last_stamp, self._last_seconds = None, 0.0
+        self._round_seconds: Optional[float] = None  # Last round ingested
+        self._round_step = 0.0  # Widest gap seen between consecutive rounds
+        self._towers: Dict[str, TowerHistory] = {}
+        self._regions: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.records_ingested = 0
+
+        # Fill the rings: read the first ring_size distinct timestamps
+        rounds, last = 0, None
+        while True:
+            seconds, record = self._peek()
+            if record is None:
+                break
+            if seconds != last:
+                if rounds == ring_size:
+                    break
+                rounds, last = rounds + 1, seconds
+            self._take(seconds, record)
+        self._origin = last if last is not None else 0.0
+        self._wall_origin = clock()
+
+    def now(self) -> float:
+        """Simulated time, in epoch seconds."""
+        return self._origin + (self._clock() - self._wall_origin) * self.speed
+
+    def sync(self) -> int:
+        """
+        Consume the records due by the simulated clock. Returns their number.
+
+        Rounds older than the rings keep are skipped, and the lock is released
+        every SYNC_BATCH_RECORDS records, so a catch-up after a long idle
+        period is short and does not hold up readers throughout.
+        """
+        until = self.now()
+        ingested = 0
+        while True:
+            with self._lock:
+                batch = self._advance(until, SYNC_BATCH_RECORDS)
+            ingested += batch
+            if batch < SYNC_BATCH_RECORDS:
+                return ingested
+
+    def ingest(self, record: dict) -> None:
+        """Add one record from outside the source (e.g. a replay engine)."""
+        with self._lock:
+            self._ingest(epoch_seconds(record["timestamp"]), record)
+
+    def regions(self) -> List[str]:
+        self.sync()
+        with self._lock:
+            return list(self._regions)
+
+    def towers(self, region_id: Optional[str] = None) -> List[str]:
+        """Tower IDs of a region (or of the whole fleet), in order of first report."""
+        self.sync()
+        with self._lock:
+            if region_id is None:
+                return list(self._towers)
+            return list(self._regions.get(region_id, ()))
+
+    def __contains__(self, tower_id: str) -> bool:
+        return tower_id in self._towers
+
+    def latest(self, tower_id: str) -> Optional[dict]:
+        """Last record reported by a tower, as reported (O(1))."""
+        self.sync()
+        with self._lock:
+            history = self._towers.get(tower_id)
+            return dict(history.latest) if history is not None else None
+
+    def window(
+        self,
+        tower_id: str,
+        samples: Optional[int] = None,
+        seconds: Optional[float] = None,
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Recent KPI samples of a tower (see TowerHistory.window), O(window)."""
+        self.sync()
+        with self._lock:
+            history = self._towers.get(tower_id)
+            return history.window(samples, seconds) if history is not None else None
+
+    def forecast(self, tower_id: str, hours_ahead: int) -> Optional[dict]:
+        """
+        Hourly load forecast of a tower, None if the tower is unknown.
+
+        Extrapolates the linear trend of the tower's bandwidth over its sample
+        window, from its latest sample on; confidence drops with the horizon
+        and the scatter around the trend.
+        """
+        self.sync()
+        with self._lock:
+            history = self._towers.get(tower_id)
+            if history is None:
+                return None
+            latest, window = history.latest, history.window()
+        times, load = window["times"], window["bandwidth_utilization_pct"]
+        valid = np.isfinite(load)
+        current = latest.get("bandwidth_utilization_pct")
+        level, slope, scatter = current, 0.0, 0.0
+        if valid.sum() >= 2 and np.ptp(times[valid]) > 0:
+            hours = (times[valid] - times[-1]) / 3600
+            slope, level = np.polyfit(hours, load[valid], 1)
+            scatter = float(np.std(load[valid] - (level + slope * hours)))
+
+        forecast = []
+        for i in range(1, hours_ahead + 1):
+            forecast.append(
+                {
+                    "timestamp": datetime.fromtimestamp(
+                        times[-1] + i * 3600, timezone.utc
+                    ).isoformat(),
+                    "predicted_load_pct": round(
+                        float(np.clip(level + slope * i, 0, 100)), 1
+                    ),
+                    "confidence": round(
+                        float(np.clip(0.95 - 0.03 * i - scatter / 100, 0.5, 0.95)), 2
+                    ),
+                }
+            )
+        return {
+            "tower_id": tower_id,
+            "forecast_timestamp": latest["timestamp"],
+            "hours_ahead": hours_ahead,
+            "current_load_pct": current,
+            "forecast": forecast,
+        }
+
+    def _advance(self, until: float, limit: int) -> int:
+        seconds, record = self._peek()
+        horizon = until - self.ring_size * self._round_step
+        if record is not None and self._round_step and seconds < horizon:
+            self._skip(horizon)
+        ingested = 0
+        while ingested < limit:
+            seconds, record = self._peek()
+            if record is None or seconds > until:
+                break
+            self._take(seconds, record)
+            ingested += 1
+        return ingested
+
+    def _skip(self, seconds: float) -> None:
+        """Pass over the source's records before seconds, unread if it can skip."""
+        self._pending = None
+        skip_to = getattr(self._source, "skip_to", None)
+        if skip_to is not None:
+            skip_to(seconds)
+        else:
+            while True:
+                peeked, record = self._peek()
+                if record is None or peeked >= seconds:
+                    break
+                self._pending = None
+        self._round_seconds = None  # The skipped gap is not a round step
+
+    def _peek(self) -> Tuple[Optional[float], Optional[dict]]:
+        if self._pending is None:
+            record = next(self._source, None)
+            if record is None:
+                return None, None
+            # Records of one reporting round share their timestamp string
+            stamp = record["timestamp"]
+            if stamp != self._last_stamp:
+                self._last_stamp, self._last_seconds = stamp, epoch_seconds(stamp)
+            self._pending = (self._last_seconds, record)
+        return self._pending
+
+    def _take(self, seconds: float, record: dict) -> None:
+        """Ingest the pending record of the source."""
+        if self._round_seconds is not None and seconds > self._round_seconds:
+            self._round_step = max(self._round_step, seconds - self._round_seconds)
+        self._round_seconds = seconds
+        self._ingest(seconds, record)
+        self._pending = None
+
+    def _ingest(self, seconds: float, record: dict) -> None:
+        tower_id = record["tower_id"]
+        history = self._towers.get(tower_id)
+        if history is None:
+            history = self._towers[tower_id] = TowerHistory(record, self.ring_size)
+            self._regions.setdefault(history.region_id, []).append(tower_id)
+        history.append(seconds, record)
+        self.records_ingested += 1
+
+
+def open_fleet(source: str = FLEET_SOURCE) -> TowerFleet:
+    """Create the fleet from FLEET_SOURCE: "synthetic" or a trace file path."""
+    if source == "synthetic":
+        return TowerFleet(synthetic_source())
+    path = Path(source)
+    if not path.is_absolute():
+        path = Path(__file__).parent.parent / path
+    return TowerFleet(replay_source(path))
+
@@ -0,0 +1,266 @@
+"""
+Secondary Indexes for TRACE Telemetry
+
+Serves tower/region/time filters from indexes instead of scanning every row:
+1. Hash indexes on tower_id and region_id: the row positions of each value are
+   stored contiguously (grouped by dictionary code), so a lookup is one dict
+   access plus a slice
+2. A sorted timestamp index answers time-window queries with two binary searches
+3. Compound filters start from the most selective index and check the other
+   conditions on those rows only, so a query costs O(matches), not O(rows)
+
+Indexes are built once per ColumnStore and shared by every dataset holding it.
+Hash indexes are built up front; the timestamp index (which has to parse every
+distinct timestamp) is built by the first time-window query.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .telemetry_store import MISSING, CategoricalColumn, ColumnStore
+
+
+HASH_INDEX_FIELDS = ("tower_id", "region_id")
+TIME_FIELD = "timestamp"
+
+NOT_A_TIME = np.iinfo(np.int64).min  # NaT as int64
+_TIME_DRIVER = object()  # Marks the time window as the most selective condition
+
+_indexes: "weakref.WeakKeyDictionary[ColumnStore, TelemetryIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+_indexes_lock = threading.Lock()
+
+
+def index_for(store: ColumnStore) -> "TelemetryIndex":
+    """Return the (cached) index of a store, building it on first use."""
+    with _indexes_lock:
+        index = _indexes.get(store)
+        if index is None:
+            index = _indexes[store] = TelemetryIndex(store)
+        return index
+
+
+class TelemetryIndex:
+    """
+    Hash indexes on tower/region fields plus a sorted timestamp index.
+
+    Example:
+        index = index_for(store)
+        rows = index.rows({"tower_id": "TX001"}, start="2025-10-31T00:00:00Z")
+        subset = index.select({"region_id": "R-A"})
+    """
+
+    def __init__(
+        self,
+        store: ColumnStore,
+        fields: Sequence[str] = HASH_INDEX_FIELDS,
+        time_field: str = TIME_FIELD,
+    ):
+        # Weak, so that caching the index does not keep the store alive
+        self._store = weakref.ref(store)
+        self.time_field = time_field
+        self._hash = {
+            field: _HashIndex(store.columns[field])
+            for field in fields
+            if field in store.columns
+        }
+        self._time: Optional[_TimeIndex] = None
+        self._time_lock = threading.Lock()
+
+    @property
+    def store(self) -> ColumnStore:
+        store = self._store()
+        if store is None:
+            raise RuntimeError("The indexed store no longer exists")
+        return store
+
+    def rows(
+        self,
+        equals: Optional[Dict[str, Any]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Ascending positions of the rows matching every condition.
+
+        Args:
+            equals: Field -> required value (fields without an index are
+                checked on the candidate rows; None values are ignored)
+            start: Inclusive lower bound of the time window (ISO 8601)
+            end: Exclusive upper bound of the time window (ISO 8601)
+
+        Returns:
+            np.ndarray of row positions, or None when there is no condition
+
+        Raises:
+            ValueError: If start or end is not a valid timestamp
+        """
+        equals = {k: v for k, v in (equals or {}).items() if v is not None}
+        timed = start is not None or end is not None
+        if not equals and not timed:
+            return None
+
+        # Start from the most selective index...
+        rows, driver = None, None
+        for field, value in equals.items():
+            if field in self._hash:
+                postings = self._hash[field].lookup(value)
+                if rows is None or len(postings) < len(rows):
+                    rows, driver = postings, field
+        if timed:
+            time_index = self.time_index()
+            bounds = time_bounds(start, end)
+            lo, hi = time_index.window(*bounds)
+            if rows is None or hi - lo < len(rows):
+                rows, driver = np.sort(time_index.order[lo:hi]), _TIME_DRIVER
+        if rows is None:
+            rows = np.arange(len(self.store))
+
+        # ...and check the other conditions on its rows only
+        for field, value in equals.items():
+            if field != driver:
+                rows = rows[self._matches(field, value, rows)]
+        if timed and driver is not _TIME_DRIVER:
+            rows = rows[time_index.contains(rows, *bounds)]
+        return rows
+
+    def select(
+        self,
+        equals: Optional[Dict[str, Any]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> ColumnStore:
+        """Store of the rows matching every condition (see rows())."""
+        rows = self.rows(equals, start, end)
+        return self.store if rows is None else self.store.take(rows)
+
+    def time_index(self) -> "_TimeIndex":
+        with self._time_lock:
+            if self._time is None:
+                self._time = _TimeIndex(self.store, self.time_field)
+            return self._time
+
+    def _matches(self, field: str, value: Any, rows: np.ndarray) -> np.ndarray:
+        index = self._hash.get(field)
+        if index is not None:
+            return index.matches(value, rows)
+        return self.store.take(rows).equals(field, value)
+
+
+class _HashIndex:
+    """Row positions grouped by value, stored as one CSR-style array."""
+
+    __slots__ = ("codes", "lookup_code", "order", "offsets")
+
+    def __init__(self, column: Any):
+        if isinstance(column, CategoricalColumn):
+            codes = column.codes
+            categories = column.categories
+            self.lookup_code = {value: code for code, value in enumerate(categories)}
+        else:
+            # Numeric or object column: dictionary-encode the values first
+            self.lookup_code = {}
+            codes = np.fromiter(
+                (self._code(v) for v in column.tolist()), dtype=np.int64
+            )
+        self.codes = codes
+        # Stable sort keeps rows ascending within each value; missing (-1) first
+        self.order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes + 1, minlength=len(self.lookup_code) + 1)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def lookup(self, value: Any) -> np.ndarray:
+        code = self._find(value)
+        if code < 0:
+            return self.order[:0]
+        return self.order[self.offsets[code + 1] : self.offsets[code + 2]]
+
+    def matches(self, value: Any, rows: np.ndarray) -> np.ndarray:
+        return self.codes[rows] == self._find(value)
+
+    def _find(self, value: Any) -> int:
+        try:
+            return self.lookup_code.get(value, -2)
+        except TypeError:
+            return -2  # Unhashable values match nothing
+
+    def _code(self, value: Any) -> int:
+        if value is MISSING:
+            return -1
+        try:
+            return self.lookup_code.setdefault(value, len(self.lookup_code))
+        except TypeError:
+            return -1  # Unhashable values (lists, dicts) are never matched
+
+
+class _TimeIndex:
+    """Rows with a parseable timestamp, sorted by time (epoch nanoseconds)."""
+
+    __slots__ = ("times", "order", "sorted_times")
+
+    def __init__(self, store: ColumnStore, field: str):
+        times = row_times(store, field)
+        self.times = times
+        valid = np.flatnonzero(times != NOT_A_TIME)
+        self.order = valid[np.argsort(times[valid], kind="stable")]
+        self.sorted_times = times[self.order]
+
+    def window(self, lo: int, hi: int) -> Tuple[int, int]:
+        """Positions in the sorted order of the times in [lo, hi)."""
+        first = int(np.searchsorted(self.sorted_times, lo, side="left"))
+        last = int(np.searchsorted(self.sorted_times, hi, side="left"))
+        return first, max(first, last)
+
+    def contains(self, rows: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        times = self.times[rows]
+        return (times >= lo) & (times < hi)
+
+
+def row_times(store: ColumnStore, field: str = TIME_FIELD) -> np.ndarray:
+    """
+    UTC epoch nanoseconds of every row's timestamp.
+
+    Rows without a parseable ISO 8601 timestamp get NOT_A_TIME.
+    """
+    column = store.columns.get(field)
+    if column is None:
+        return np.full(len(store), NOT_A_TIME, dtype=np.int64)
+    if isinstance(column, CategoricalColumn):
+        # Parse each distinct timestamp once
+        parsed = np.append(epoch_ns(column.categories), NOT_A_TIME)
+        return parsed[column.codes]  # Code -1 picks the trailing NaT
+    return epoch_ns(column.tolist())
+
+
+def epoch_ns(values: List[Any]) -> np.ndarray:
+    """Parse ISO 8601 strings to UTC epoch nanoseconds (NaT for anything else)."""
+    strings = pd.Series(
+        [v if isinstance(v, str) else None for v in values], dtype=object
+    )
+    parsed = pd.to_datetime(strings, utc=True, errors="coerce", format="ISO8601")
+    return parsed.dt.tz_convert(None).astype("datetime64[ns]").to_numpy().view(np.int64)
+
+
+def time_bounds(start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+    """[lo, hi) in epoch nanoseconds; open ends never include missing times."""
+    lo = NOT_A_TIME + 1 if start is None else _parse_bound(start)
+    hi = np.iinfo(np.int64).max if end is None else _parse_bound(end)
+    return lo, hi
+
+
+def _parse_bound(value: Any) -> int:
+    """Epoch nanoseconds of a query bound; naive timestamps are taken as UTC."""
+    try:
+        stamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        stamp = pd.NaT
+    if stamp is pd.NaT:
+        raise ValueError(f"Invalid timestamp: {value!r} (expected ISO 8601)")
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return stamp.tz_convert("UTC").as_unit("ns").value
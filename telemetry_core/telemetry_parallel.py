@@ -0,0 +1,139 @@
+"""
+Parallel Map/Reduce Aggregation for TRACE JSON Analysis
+
+Splits a large ColumnStore into row ranges, aggregates each range in a
+process pool and merges the partial TelemetryAggregates in order:
+1. Workers memory-map the dataset's binary snapshot and slice their row range
+   out of it, so no record data is pickled between processes
+2. Stores that have no snapshot yet get a temporary one, written once
+3. Below a size threshold (or with a single worker) aggregation stays serial
+
+Counts, tower sets, first/last values and error ordering are identical to a
+serial pass; float sums are added per chunk and may differ in the last bits.
+"""
+
+import atexit
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .telemetry_aggregates import TelemetryAggregates
+from .telemetry_snapshot import open_snapshot, write_snapshot
+from .telemetry_store import ColumnStore
+
+
+DEFAULT_MIN_ROWS = int(os.environ.get("PARALLEL_ANALYSIS_MIN_ROWS", "1000000"))
+# 0 means one worker per CPU
+DEFAULT_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "0")) or os.cpu_count() or 1
+CHUNKS_PER_WORKER = 4  # Smaller chunks even out stragglers
+MAX_OPEN_SNAPSHOTS = 8  # Per worker process
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_temp_dir: Optional[tempfile.TemporaryDirectory] = None
+
+# Snapshots opened by this (worker) process, keyed by path
+_open_stores: Dict[str, ColumnStore] = {}
+
+
+def aggregate(
+    store: ColumnStore,
+    workers: Optional[int] = None,
+    min_rows: Optional[int] = None,
+) -> TelemetryAggregates:
+    """
+    Aggregate a store, in parallel when it is large enough.
+
+    Args:
+        store: Telemetry to aggregate
+        workers: Worker processes (default ANALYSIS_WORKERS or the CPU count)
+        min_rows: Stores smaller than this are aggregated serially
+            (default PARALLEL_ANALYSIS_MIN_ROWS)
+
+    Returns:
+        TelemetryAggregates: Same as TelemetryAggregates.from_store(store)
+    """
+    workers = workers or DEFAULT_WORKERS
+    min_rows = DEFAULT_MIN_ROWS if min_rows is None else min_rows
+    if workers <= 1 or len(store) < max(min_rows, 1):
+        return TelemetryAggregates.from_store(store)
+
+    try:
+        snapshot = _ensure_snapshot(store)
+        ranges = _split(len(store), workers * CHUNKS_PER_WORKER)
+        tasks = [(snapshot, start, stop) for start, stop in ranges]
+        partials = _get_pool(workers).map(_aggregate_range, tasks)
+        return TelemetryAggregates.merge_all(partials)
+    except Exception:
+        # Unwritable temp dir, broken pool, replaced snapshot: do it serially
+        return TelemetryAggregates.from_store(store)
+
+
+def _split(num_rows: int, num_chunks: int) -> List[Tuple[int, int]]:
+    """Contiguous (start, stop) row ranges covering num_rows."""
+    bounds = [num_rows * i // num_chunks for i in range(num_chunks + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _aggregate_range(task: Tuple[Tuple[str, str], int, int]) -> TelemetryAggregates:
+    """Worker: aggregate rows start..stop-1 of a snapshot."""
+    (path, snapshot_id), start, stop = task
+    store = _open_stores.get(path)
+    if store is None or store.snapshot[1] != snapshot_id:
+        store, _ = open_snapshot(path)
+        if store.snapshot[1] != snapshot_id:
+            raise RuntimeError(f"Snapshot {path} was replaced during analysis")
+        _open_stores.pop(path, None)
+        _open_stores[path] = store
+        while len(_open_stores) > MAX_OPEN_SNAPSHOTS:
+            del _open_stores[next(iter(_open_stores))]
+    return TelemetryAggregates.from_store(store.slice(start, stop))
+
+
+def _ensure_snapshot(store: ColumnStore) -> Tuple[str, str]:
+    """Snapshot backing the store, writing a temporary one if needed."""
+    if store.snapshot is not None and os.path.exists(store.snapshot[0]):
+        return store.snapshot
+
+    global _temp_dir
+    with _pool_lock:
+        if _temp_dir is None:
+            _temp_dir = tempfile.TemporaryDirectory(prefix="trace-snapshots-")
+        path = os.path.join(_temp_dir.name, f"{uuid.uuid4().hex}.snap")
+    write_snapshot(path, store)
+    # The temporary snapshot lives exactly as long as the store
+    weakref.finalize(store, _remove_file, path)
+    return store.snapshot
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn is safe in threaded servers and the only option on Windows
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
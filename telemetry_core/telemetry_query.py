@@ -0,0 +1,428 @@
+"""
+Filter / Group-By / Aggregate Queries over TRACE Telemetry
+
+Answers questions such as "p95 latency by region where detected_error != none"
+in a single call, returning only the small result table:
+1. Predicates are "field op value" strings (=, !=, >, >=, <, <=, in, not in);
+   missing values never match, as in SQL
+2. Aggregates are count, count(field), sum, avg, min, max, median, pNN
+   (e.g. p95) and distinct over a field, grouped by any number of fields
+3. Planning: equality predicates on tower_id/region_id and the time window are
+   answered from the store's indexes, the remaining predicates are evaluated
+   as vectorized masks over the matching rows only
+4. Grouping and aggregation are numpy group-by reductions; percentiles use
+   one sort per field and linear interpolation (numpy's default)
+
+Warehouse-backed datasets get the same predicates pushed down into SQL, so
+only the matching rows of the referenced columns are read.
+"""
+
+import math
+import operator
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .telemetry_index import HASH_INDEX_FIELDS, TIME_FIELD, TelemetryIndex
+from .telemetry_schema import BOOL, FLOAT, INT, TELEMETRY_FIELDS, TIMESTAMP
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    Column,
+    ColumnStore,
+    NumericColumn,
+)
+
+
+# Result rows returned by default; the total number of groups is always reported
+DEFAULT_LIMIT = 20
+# Decimal places of aggregate values
+RESULT_DECIMALS = 2
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda value, values: value in values,
+    "not in": lambda value, values: value not in values,
+}
+_PREDICATE = re.compile(
+    r"^\s*(\w+)\s*(==|!=|>=|<=|=|>|<|\bnot\s+in\b|\bin\b)\s*(.+?)\s*$", re.I
+)
+_AGGREGATE = re.compile(r"^\s*(\w+)\s*(?:\(\s*(\w*)\s*\))?\s*$")
+_FUNCTIONS = ("count", "sum", "avg", "min", "max", "median", "distinct")
+
+# A parsed predicate: (field, operator, value or tuple of values)
+Predicate = Tuple[str, str, Any]
+# A parsed aggregate: (function, field or None, quantile or None)
+Aggregate = Tuple[str, Optional[str], Optional[float]]
+
+
+class TelemetryQuery:
+    """
+    A parsed query, runnable against any ColumnStore.
+
+    Example:
+        query = TelemetryQuery(
+            aggregates=["p95(latency_ms)", "count"],
+            group_by=["region_id"],
+            where=["detected_error != none"],
+        )
+        result = query.run(store, index_for(store))
+
+    Raises:
+        ValueError: On a malformed predicate or aggregate, with what was expected
+    """
+
+    def __init__(
+        self,
+        aggregates: Sequence[str] = ("count",),
+        group_by: Sequence[str] = (),
+        where: Sequence[str] = (),
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = DEFAULT_LIMIT,
+    ):
+        self.predicates = [parse_predicate(text) for text in where]
+        self.aggregates = [parse_aggregate(text) for text in aggregates or ["count"]]
+        self.group_by = list(group_by)
+        self.start_time = start_time or None
+        self.end_time = end_time or None
+        self.columns = self.group_by + [_column_name(a) for a in self.aggregates]
+        if order_by is not None and order_by not in self.columns:
+            name = _column_name(parse_aggregate(order_by))
+            if name not in self.columns:
+                raise ValueError(
+                    f"order_by must be one of the result columns: {self.columns}"
+                )
+            order_by = name
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = max(1, limit)
+
+    @property
+    def fields(self) -> List[str]:
+        """Every field the query reads."""
+        fields = [field for field, _, _ in self.predicates] + self.group_by
+        fields += [field for _, field, _ in self.aggregates if field]
+        if self.start_time or self.end_time:
+            fields.append(TIME_FIELD)
+        return list(dict.fromkeys(fields))
+
+    def index_equals(self) -> Dict[str, Any]:
+        """Equality predicates an index (or SQL index) can answer directly."""
+        return {
+            field: value
+            for field, op, value in self.predicates
+            if op == "=" and field in HASH_INDEX_FIELDS
+        }
+
+    def run(self, store: ColumnStore, index: Optional[TelemetryIndex] = None) -> dict:
+        """
+        Execute the query.
+
+        Args:
+            store: Records to query
+            index: Optional index of the store, used for the equality
+                predicates on indexed fields and the time window
+
+        Returns:
+            dict: records_matched, num_groups, columns and rows (at most limit)
+
+        Raises:
+            ValueError: If start_time or end_time is not a valid timestamp, or an
+                aggregate needs a numeric field
+        """
+        rows: Optional[np.ndarray] = None
+        if index is not None:
+            rows = index.rows(self.index_equals(), self.start_time, self.end_time)
+        elif self.start_time or self.end_time:
+            rows = TelemetryIndex(store, fields=()).rows(
+                None, self.start_time, self.end_time
+            )
+        if rows is not None:
+            store = store.take(rows)
+
+        mask = np.ones(len(store), dtype=bool)
+        for predicate in self.predicates:
+            mask &= _matches(store.columns.get(predicate[0]), predicate, len(store))
+        if not mask.all():
+            store = store.take(np.flatnonzero(mask))
+
+        num_rows = len(store)
+        if self.group_by:
+            keys = [_codes(store.columns.get(f), num_rows) for f in self.group_by]
+            stacked = np.stack([codes for codes, _ in keys], axis=1)
+            unique, groups = np.unique(stacked, axis=0, return_inverse=True)
+            groups = groups.reshape(-1)
+            labels = [
+                [values[code] if code >= 0 else None for code in unique[:, i]]
+                for i, (_, values) in enumerate(keys)
+            ]
+            num_groups = len(unique)
+        else:
+            groups = np.zeros(num_rows, dtype=np.int64)
+            labels = []
+            num_groups = 1  # Ungrouped queries always return one row
+
+        results = [
+            _aggregate(store, aggregate, groups, num_groups)
+            for aggregate in self.aggregates
+        ]
+        table = [
+            [label[g] for label in labels] + [_rounded(values[g]) for values in results]
+            for g in range(num_groups)
+        ]
+        table = self._ordered(table)
+        result = {
+            "records_matched": num_rows,
+            "num_groups": num_groups,
+            "columns": self.columns,
+            "rows": table[: self.limit],
+        }
+        if num_groups > self.limit:
+            result["omitted"] = f"{num_groups - self.limit} more of {num_groups} rows"
+        return result
+
+    def _ordered(self, table: List[list]) -> List[list]:
+        """Rows sorted by order_by, else by the group keys; None sorts last."""
+        width = len(self.group_by)
+        table = sorted(table, key=lambda row: [_sort_key(v) for v in row[:width]])
+        if self.order_by is not None:
+            # Stable, so ties stay in group key order
+            position = self.columns.index(self.order_by)
+            present = [row for row in table if row[position] is not None]
+            absent = [row for row in table if row[position] is None]
+            present.sort(
+                key=lambda row: _sort_key(row[position]), reverse=self.descending
+            )
+            return present + absent
+        return table
+
+
+def parse_predicate(text: str) -> Predicate:
+    """Parse "field op value" into (field, op, typed value)."""
+    match = _PREDICATE.match(text)
+    if match is None:
+        raise ValueError(
+            f"Invalid predicate {text!r}: expected 'field op value' with op one of "
+            f"{', '.join(_OPERATORS)} (e.g. 'latency_ms > 80')"
+        )
+    field, op, value = match.groups()
+    op = " ".join(op.lower().split())
+    op = "=" if op == "==" else op
+    kind = TELEMETRY_FIELDS.get(field, (None,))[0]
+    if kind == TIMESTAMP and op not in ("=", "!=", "in", "not in"):
+        raise ValueError(
+            f"Invalid predicate {text!r}: use start_time/end_time for time ranges"
+        )
+    if op in ("in", "not in"):
+        items = value.strip("()[]").split(",")
+        return field, op, tuple(_typed(kind, item, text) for item in items)
+    return field, op, _typed(kind, value, text)
+
+
+def parse_aggregate(text: str) -> Aggregate:
+    """Parse "count", "count(field)", "avg(field)", "p95(field)", ... ."""
+    match = _AGGREGATE.match(text)
+    function = match.group(1).lower() if match else ""
+    field = match.group(2) if match else None
+    quantile = None
+    if function == "mean":
+        function = "avg"
+    elif function == "median":
+        quantile = 0.5
+    elif re.fullmatch(r"p\d{1,2}", function):
+        quantile = int(function[1:]) / 100
+    elif function not in _FUNCTIONS:
+        function = ""
+    if not function or (not field and function != "count"):
+        raise ValueError(
+            f"Invalid aggregate {text!r}: expected count, or one of "
+            "count/sum/avg/min/max/median/pNN/distinct applied to a field, "
+            "e.g. 'p95(latency_ms)'"
+        )
+    return function, field or None, quantile
+
+
+def _column_name(aggregate: Aggregate) -> str:
+    function, field, _ = aggregate
+    return f"{function}({field})" if field else function
+
+
+def _typed(kind: Optional[str], text: str, predicate: str) -> Any:
+    """Predicate value converted to the field's type."""
+    text = text.strip().strip("'\"")
+    if kind in (FLOAT, INT) or (kind is None and _is_number(text)):
+        if not _is_number(text):
+            raise ValueError(
+                f"Invalid predicate {predicate!r}: {text!r} is not a number"
+            )
+        return float(text)
+    if kind == BOOL:
+        if text.lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"Invalid predicate {predicate!r}: expected true or false")
+        return text.lower() in ("true", "1")
+    return text
+
+
+def _is_number(text: str) -> bool:
+    try:
+        return math.isfinite(float(text))
+    except ValueError:
+        return False
+
+
+def _matches(
+    column: Optional[Column], predicate: Predicate, num_rows: int
+) -> np.ndarray:
+    """Rows whose (present) value satisfies a predicate."""
+    _, op, value = predicate
+    if column is None:
+        return np.zeros(num_rows, dtype=bool)
+    compare = _OPERATORS[op]
+    if isinstance(column, NumericColumn):
+        values = column.values
+        present = column.present
+        if op in ("in", "not in"):
+            result = np.isin(values, [v for v in value if not isinstance(v, str)])
+            result = result if op == "in" else ~result
+        elif isinstance(value, str):
+            result = np.zeros(num_rows, dtype=bool)
+        else:
+            result = compare(values, value)
+        return result if present is None else result & present
+    if isinstance(column, CategoricalColumn):
+        # Evaluate once per distinct value, then map through the codes
+        per_value = [_safe(compare, v, value) for v in column.categories]
+        return np.array(per_value + [False], dtype=bool)[column.codes]
+    return np.fromiter(
+        (v is not MISSING and v is not None and _safe(compare, v, value)
+         for v in column.tolist()),
+        dtype=bool,
+        count=num_rows,
+    )
+
+
+def _safe(compare: Callable[[Any, Any], bool], left: Any, right: Any) -> bool:
+    if left is None:
+        return False
+    try:
+        return bool(compare(left, right))
+    except TypeError:  # e.g. a text value against a numeric bound
+        return False
+
+
+def _codes(column: Optional[Column], num_rows: int) -> Tuple[np.ndarray, list]:
+    """Dictionary codes of a column (-1 for missing) and the value of each code."""
+    if column is None:
+        return np.full(num_rows, -1, dtype=np.int64), []
+    if isinstance(column, CategoricalColumn):
+        return column.codes.astype(np.int64), column.categories
+    if isinstance(column, NumericColumn):
+        values, codes = np.unique(column.values, return_inverse=True)
+        codes = codes.reshape(-1).astype(np.int64)
+        if column.present is not None:
+            codes[~column.present] = -1
+        return codes, values.tolist()
+    lookup: Dict[Any, int] = {}
+    codes = np.fromiter(
+        (
+            -1
+            if v is MISSING or v is None
+            else lookup.setdefault(_hashable(v), len(lookup))
+            for v in column.tolist()
+        ),
+        dtype=np.int64,
+        count=num_rows,
+    )
+    return codes, list(lookup)
+
+
+def _hashable(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _aggregate(
+    store: ColumnStore, aggregate: Aggregate, groups: np.ndarray, num_groups: int
+) -> List[Any]:
+    """Value of an aggregate for each group (None where it is undefined)."""
+    function, field, quantile = aggregate
+    if field is None:
+        return np.bincount(groups, minlength=num_groups).tolist()
+
+    column = store.columns.get(field)
+    if function == "distinct":
+        codes, _ = _codes(column, len(store))
+        keep = codes >= 0
+        pairs = np.unique(np.stack([groups[keep], codes[keep]], axis=1), axis=0)
+        return np.bincount(pairs[:, 0], minlength=num_groups).tolist()
+
+    if column is None:
+        present = np.zeros(len(store), dtype=bool)
+        values = np.zeros(len(store))
+    elif isinstance(column, NumericColumn):
+        present = column.present
+        if present is None:
+            present = np.ones(len(store), dtype=bool)
+        values = column.values.astype(np.float64)
+    elif function == "count":
+        present = _codes(column, len(store))[0] >= 0
+        values = np.zeros(len(store))
+    else:
+        raise ValueError(f"{function}({field}) needs a numeric field")
+
+    groups, values = groups[present], values[present]
+    counts = np.bincount(groups, minlength=num_groups)
+    if function == "count":
+        return counts.tolist()
+    if function == "sum":
+        return np.bincount(groups, values, minlength=num_groups).tolist()
+    if function == "avg":
+        sums = np.bincount(groups, values, minlength=num_groups)
+        return [s / n if n else None for s, n in zip(sums.tolist(), counts.tolist())]
+
+    # min, max and quantiles: one sort by (group, value)
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    if function in ("min", "max"):
+        picks = starts if function == "min" else starts + counts - 1
+        return [
+            float(ordered[p]) if n else None
+            for p, n in zip(picks.tolist(), counts.tolist())
+        ]
+    position = quantile * np.maximum(counts - 1, 0)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+    results = []
+    for start, n, lo, hi, pos in zip(
+        starts.tolist(), counts.tolist(), low.tolist(), high.tolist(), position.tolist()
+    ):
+        if not n:
+            results.append(None)
+            continue
+        below, above = ordered[start + lo], ordered[start + hi]
+        results.append(float(below + (above - below) * (pos - lo)))
+    return results
+
+
+def _rounded(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, RESULT_DECIMALS)
+    return value
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """Sort key putting None last and ordering mixed types without errors."""
+    if value is None:
+        return (2, "")
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value))
@@ -0,0 +1,302 @@
+"""
+Trace Replay Engine for TRACE
+
+Plays recorded (or synthetic) tower telemetry through a pipeline of stages at
+an accelerated wall-clock speed, to load-test the agent hierarchy and measure
+its end-to-end decision latency without live towers:
+1. Pacing: a record is released when the wall clock reaches its timestamp,
+   scaled by the speed (1x real time to 1000x and beyond; None releases
+   records as fast as the pipeline accepts them)
+2. Per-tower ordering: every tower is pinned to one worker thread with a FIFO
+   queue, so a tower's records pass the stages in timestamp order while
+   towers run in parallel; a record older than its tower's last one is dropped,
+   as is one without a valid timestamp
+3. Backpressure: worker queues are bounded (REPLAY_QUEUE records), so a slow
+   pipeline blocks the producer and the replay falls behind schedule instead
+   of buffering without limit; blocked puts and the lag are reported
+4. Counters per stage (calls, failures, errors, throughput, latency
+   percentiles) and end to end, from a record's due time to its last stage;
+   percentiles come from a fixed-size uniform sample of the latencies, so
+   memory does not grow with the length of the replay
+
+A stage is a name and a handler taking the record's context: {"record": ...}
+plus the result of each earlier stage under the stage's name. A handler
+returning None ends the record's pipeline (nothing left to do); a result with
+"success" False or status "error" counts as a failure and ends it too, unless
+the stage is one whose failures the replay continues past. A handler raising
+counts as an error and ends the record's pipeline, never its worker.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .telemetry_fleet import TowerFleet, epoch_seconds
+from .telemetry_sampling import ReservoirSampler
+
+
+REPLAY_WORKERS = int(os.environ.get("REPLAY_WORKERS", "4"))
+# Records waiting per worker before the producer blocks
+REPLAY_QUEUE = int(os.environ.get("REPLAY_QUEUE", "256"))
+LATENCY_PERCENTILES = (50, 95, 99)
+# Latencies sampled per counter for the percentiles (count, mean, max are exact)
+LATENCY_SAMPLES = 10_000
+
+Handler = Callable[[dict], Optional[dict]]
+
+
+class LatencyStats:
+    """Count, mean and maximum of latencies, percentiles from a uniform sample."""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._sample = ReservoirSampler(samples)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._sample.add(seconds)
+
+    def summary(self) -> dict:
+        """Mean, percentiles and maximum, in milliseconds."""
+        if not self.count:
+            return {"mean_ms": None, "max_ms": None}
+        summary = {"mean_ms": round(self.total / self.count * 1000, 3)}
+        ms = np.asarray(self._sample.sample) * 1000
+        percentiles = np.percentile(ms, LATENCY_PERCENTILES)
+        for p, value in zip(LATENCY_PERCENTILES, percentiles):
+            summary[f"p{p}_ms"] = round(float(value), 3)
+        summary["max_ms"] = round(self.max * 1000, 3)
+        return summary
+
+
+class StageCounters:
+    """Calls, outcomes and latencies of one pipeline stage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.latency = LatencyStats()
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, outcome: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            self.latency.add(seconds)
+            if outcome == "failed":
+                self.failed += 1
+            elif outcome == "error":
+                self.errors += 1
+                self.last_error = error
+
+    def summary(self, elapsed: float) -> dict:
+        with self._lock:
+            summary = {
+                "calls": self.calls,
+                "failed": self.failed,
+                "errors": self.errors,
+                "calls_per_s": round(self.calls / elapsed, 1) if elapsed else None,
+                **self.latency.summary(),
+            }
+            if self.last_error is not None:
+                summary["last_error"] = self.last_error
+            return summary
+
+
+class TraceReplay:
+    """
+    Replays telemetry records through a pipeline of stages.
+
+    Args:
+        stages: (name, handler) pairs, run in order for every record
+        speed: Simulated seconds per wall-clock second; None for unpaced
+        workers: Worker threads (towers are spread over them)
+        queue_size: Records waiting per worker before the producer blocks
+        fleet: Fleet state to ingest every record into before its stages run,
+            so tools reading the fleet see the replayed telemetry; reported
+            as a first "ingest" stage
+        continue_on_failure: Names of stages whose failures are counted but
+            do not end the record's pipeline
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Tuple[str, Handler]],
+        speed: Optional[float] = 1.0,
+        workers: int = REPLAY_WORKERS,
+        queue_size: int = REPLAY_QUEUE,
+        fleet: Optional[TowerFleet] = None,
+        continue_on_failure: Iterable[str] = (),
+    ):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Replay speed must be positive, got {speed}")
+        if not stages:
+            raise ValueError("A replay needs at least one stage")
+        self.stages = list(stages)
+        self.speed = speed
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.fleet = fleet
+        self.continue_on_failure = set(continue_on_failure)
+        if fleet is not None:
+            self.stages.insert(0, ("ingest", self._ingest))
+
+    def run(self, records: Iterable[dict], limit: Optional[int] = None) -> dict:
+        """
+        Replay records (in timestamp order) through the stages.
+
+        Args:
+            records: Telemetry records, e.g. telemetry_fleet.replay_source
+            limit: Stop after this many records (needed for endless sources)
+
+        Returns:
+            Replay counters: records, speed reached, backpressure, per-stage
+            and end-to-end latency
+        """
+        counters = {name: StageCounters() for name, _ in self.stages}
+        completed = StageCounters()
+        queues = [queue.Queue(self.queue_size) for _ in range(self.workers)]
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(queues[i], counters, completed),
+                name=f"replay-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        worker_of: Dict[str, int] = {}
+        last_seen: Dict[str, float] = {}
+        released = out_of_order = invalid = blocked_puts = 0
+        blocked_seconds = max_lag = 0.0
+        first = last = None
+        stamp, seconds = None, 0.0
+        start = time.perf_counter()
+        try:
+            for record in records:
+                if limit is not None and released + out_of_order + invalid >= limit:
+                    break
+                # Records of one reporting round share their timestamp string
+                if record.get("timestamp") != stamp:
+                    try:
+                        seconds = epoch_seconds(record.get("timestamp"))
+                    except (TypeError, ValueError):
+                        invalid += 1
+                        continue
+                    stamp = record["timestamp"]
+                tower_id = record["tower_id"]
+                if seconds < last_seen.get(tower_id, seconds):
+                    out_of_order += 1
+                    continue
+                last_seen[tower_id] = seconds
+                if first is None:
+                    first = seconds
+                last = seconds if last is None else max(last, seconds)
+
+                now = time.perf_counter()
+                due = now
+                if self.speed is not None:
+                    due = start + max(seconds - first, 0.0) / self.speed
+                    if due > now:
+                        time.sleep(due - now)
+                    else:
+                        max_lag = max(max_lag, now - due)
+
+                worker = worker_of.setdefault(tower_id, len(worker_of) % self.workers)
+                try:
+                    queues[worker].put_nowait((due, record))
+                except queue.Full:
+                    blocked_puts += 1
+                    waited = time.perf_counter()
+                    queues[worker].put((due, record))
+                    blocked_seconds += time.perf_counter() - waited
+                released += 1
+        finally:
+            for q in queues:
+                q.put(None)
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+
+        simulated = (last - first) if first is not None else 0.0
+        return {
+            "status": "success",
+            "records": released,
+            "towers": len(worker_of),
+            "out_of_order_dropped": out_of_order,
+            "invalid_dropped": invalid,
+            "workers": self.workers,
+            "speed": self.speed,
+            "elapsed_seconds": round(elapsed, 3),
+            "simulated_seconds": round(simulated, 3),
+            "achieved_speed": round(simulated / elapsed, 1) if elapsed else None,
+            "records_per_s": round(released / elapsed, 1) if elapsed else None,
+            "backpressure": {
+                "queue_size": self.queue_size,
+                "blocked_puts": blocked_puts,
+                "blocked_seconds": round(blocked_seconds, 3),
+                "max_lag_seconds": round(max_lag, 3),
+            },
+            "stages": {
+                name: counters[name].summary(elapsed) for name, _ in self.stages
+            },
+            "end_to_end": {
+                "records": completed.calls,
+                **completed.latency.summary(),
+            },
+        }
+
+    def _work(
+        self,
+        records: "queue.Queue",
+        counters: Dict[str, StageCounters],
+        completed: StageCounters,
+    ) -> None:
+        while True:
+            item = records.get()
+            if item is None:
+                return
+            due, record = item
+            if self._run_stages(record, counters):
+                completed.add(time.perf_counter() - due, "ok")
+
+    def _ingest(self, context: dict) -> dict:
+        self.fleet.ingest(context["record"])
+        return {"status": "success"}
+
+    def _run_stages(self, record: dict, counters: Dict[str, StageCounters]) -> bool:
+        """Pass one record through the stages; False if a stage failed."""
+        context = {"record": record}
+        for name, handler in self.stages:
+            started = time.perf_counter()
+            try:
+                result = handler(context)
+            except Exception as e:
+                counters[name].add(
+                    time.perf_counter() - started, "error", f"{type(e).__name__}: {e}"
+                )
+                return False
+            if result is not None and (
+                result.get("success") is False or result.get("status") == "error"
+            ):
+                counters[name].add(time.perf_counter() - started, "failed")
+                if name not in self.continue_on_failure:
+                    return False
+            else:
+                counters[name].add(time.perf_counter() - started, "ok")
+            if result is None:
+                return True
+            context[name] = result
+        return True
@@ -0,0 +1,369 @@
+"""
+Time-Windowed Rollups for TRACE Telemetry
+
+Pre-aggregates telemetry into fixed time buckets so trend analyses read a few
+thousand rollup rows instead of every raw record:
+1. Four tiers: 1 minute, 5 minutes, 1 hour and 1 day buckets
+2. One series per scope: the whole fleet, each region and each tower
+3. Per bucket: record and error counts, bandwidth/latency/CPU sums and
+   bandwidth/latency peaks (missing values count as 0, like the analysis
+   aggregates, so mean = sum / count)
+
+Rollups are built with numpy group-by reductions when a dataset is ingested,
+merge associatively (streamed chunks, appended records), and round-trip
+through a ColumnStore table so they can be persisted next to a snapshot.
+The 1m and 5m tiers hold about a row per tower and minute, so where memory
+must not grow with the record count (streamed datasets) bounded() drops them
+once they get large; a dropped tier stays dropped through later merges.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .telemetry_aggregates import NO_ERROR_VALUES
+from .telemetry_index import NOT_A_TIME, row_times
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    ColumnStore,
+    NumericColumn,
+    build_column,
+)
+
+
+# Tier name -> bucket width in seconds, finest first
+TIERS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+# Tiers bounded() never drops
+COARSE_TIERS = ("1h", "1d")
+SCOPES = ("fleet", "region", "tower")
+SCOPE_FIELDS = {"region": "region_id", "tower": "tower_id"}
+FLEET_KEY = "all"
+
+# Rollup metric -> (source field, reduction)
+METRICS = {
+    "bandwidth_sum": ("bandwidth_utilization_pct", "sum"),
+    "bandwidth_max": ("bandwidth_utilization_pct", "max"),
+    "latency_sum": ("latency_ms", "sum"),
+    "latency_max": ("latency_ms", "max"),
+    "cpu_sum": ("cpu_util_pct", "sum"),
+}
+COUNTS = ("count", "error_count")
+
+_NS_PER_SECOND = 10**9
+_Tier = Dict[str, np.ndarray]
+
+
+class TelemetryRollups:
+    """
+    Rollup rows of every tier, keyed by (series, bucket start).
+
+    Series are (scope, key) pairs, e.g. ("tower", "TX001") or ("fleet", "all");
+    bucket starts are UTC epoch seconds. Tiers dropped by bounded() are not in
+    `tiers`.
+
+    Example:
+        rollups = TelemetryRollups.from_store(store)
+        tier = rollups.tier_for(min_buckets=12)
+        hourly = rollups.series("region", "R-A", "1h")
+        keys, hours, values = rollups.matrix("tower", tier, "bandwidth_sum")
+    """
+
+    def __init__(self, series: List[Tuple[str, Any]], tiers: Dict[str, _Tier]):
+        self.series_keys = series
+        self.tiers = tiers
+        self._series_ids = {key: i for i, key in enumerate(series)}
+        self._scope_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls) -> "TelemetryRollups":
+        return cls([], {name: _empty_tier() for name in TIERS})
+
+    @classmethod
+    def from_store(cls, store: ColumnStore) -> "TelemetryRollups":
+        """Build every tier from raw records (rows without a timestamp are skipped)."""
+        times = row_times(store)
+        valid = times != NOT_A_TIME
+        minutes = times[valid] // (TIERS["1m"] * _NS_PER_SECOND) * TIERS["1m"]
+
+        values = {
+            metric: _numeric(store, field)[valid]
+            for metric, (field, _) in METRICS.items()
+        }
+        values["count"] = np.ones(len(minutes), dtype=np.int64)
+        values["error_count"] = store.not_in("detected_error", NO_ERROR_VALUES)[
+            valid
+        ].astype(np.int64)
+
+        # Stack the rows of every scope, tagged with their series id
+        series: List[Tuple[str, Any]] = [("fleet", FLEET_KEY)]
+        ids = [np.zeros(len(minutes), dtype=np.int64)]
+        rows = [np.arange(len(minutes))]
+        for scope, field in SCOPE_FIELDS.items():
+            keys, codes = _keys(store, field)
+            codes = codes[valid]
+            keep = np.flatnonzero(codes >= 0)
+            ids.append(codes[keep] + len(series))
+            rows.append(keep)
+            series.extend((scope, key) for key in keys)
+        rows = np.concatenate(rows)
+
+        finest = _reduce(
+            np.concatenate(ids),
+            minutes[rows],
+            {name: column[rows] for name, column in values.items()},
+        )
+        return cls(series, _coarsen(finest)).compact()
+
+    @classmethod
+    def from_table(cls, table: ColumnStore) -> "TelemetryRollups":
+        """Rebuild rollups from their to_table() form."""
+        if not len(table):
+            return cls.empty()
+        series: Dict[Tuple[str, Any], int] = {}
+        ids = np.fromiter(
+            (
+                series.setdefault(pair, len(series))
+                for pair in zip(
+                    table.columns["scope"].tolist(), table.columns["key"].tolist()
+                )
+            ),
+            dtype=np.int64,
+            count=len(table),
+        )
+        tier_names = np.asarray(table.columns["tier"].tolist(), dtype=object)
+        tiers = {}
+        for name in TIERS:
+            rows = np.flatnonzero(tier_names == name)
+            if not len(rows):
+                continue  # Dropped (a kept tier has rows if the table has any)
+            tier = {"series": ids[rows]}
+            for column in ("bucket",) + COUNTS + tuple(METRICS):
+                tier[column] = np.asarray(table.columns[column].values)[rows]
+            tiers[name] = tier
+        return cls(list(series), tiers)
+
+    def to_table(self) -> ColumnStore:
+        """All tiers as one ColumnStore (tier, scope, key, bucket, metrics...)."""
+        names = [name for name in TIERS if name in self.tiers]
+        sizes = [len(self.tiers[name]["bucket"]) for name in names]
+        ids = np.concatenate([self.tiers[name]["series"] for name in names])
+        columns = {
+            "tier": CategoricalColumn(
+                np.repeat(np.arange(len(names), dtype=np.int32), sizes), names
+            ),
+            "scope": build_column([self.series_keys[i][0] for i in ids]),
+            "key": build_column([self.series_keys[i][1] for i in ids]),
+        }
+        for column in ("bucket",) + COUNTS + tuple(METRICS):
+            columns[column] = NumericColumn(
+                np.concatenate([self.tiers[name][column] for name in names])
+            )
+        return ColumnStore(columns, len(ids))
+
+    def merged(self, *others: "TelemetryRollups") -> "TelemetryRollups":
+        """New rollups covering the records of self and others (in common tiers)."""
+        ids = dict(self._series_ids)
+        remaps = []
+        for other in (self,) + others:
+            remaps.append(
+                np.array(
+                    [ids.setdefault(key, len(ids)) for key in other.series_keys],
+                    dtype=np.int64,
+                )
+            )
+        series = list(ids)
+
+        tiers = {}
+        for name in self.tiers:
+            if any(name not in other.tiers for other in others):
+                continue
+            parts = [other.tiers[name] for other in (self,) + others]
+            tiers[name] = _reduce(
+                np.concatenate(
+                    [remap[part["series"]] for remap, part in zip(remaps, parts)]
+                ),
+                np.concatenate([part["bucket"] for part in parts]),
+                {
+                    column: np.concatenate([part[column] for part in parts])
+                    for column in COUNTS + tuple(METRICS)
+                },
+            )
+        return TelemetryRollups(series, tiers)
+
+    @classmethod
+    def merge_all(cls, rollups: Iterable["TelemetryRollups"]) -> "TelemetryRollups":
+        parts = list(rollups)
+        if not parts:
+            return cls.empty()
+        return parts[0].merged(*parts[1:])
+
+    def bounded(self, max_rows: int) -> "TelemetryRollups":
+        """These rollups without the tiers finer than COARSE_TIERS over max_rows."""
+        dropped = [
+            name
+            for name, tier in self.tiers.items()
+            if name not in COARSE_TIERS and len(tier["bucket"]) > max_rows
+        ]
+        if not dropped:
+            return self
+        tiers = {
+            name: tier for name, tier in self.tiers.items() if name not in dropped
+        }
+        return TelemetryRollups(self.series_keys, tiers)
+
+    def compact(self) -> "TelemetryRollups":
+        """Drop series without rows (e.g. keys only present in untimed records)."""
+        used = np.unique(
+            np.concatenate([tier["series"] for tier in self.tiers.values()])
+        )
+        if len(used) == len(self.series_keys):
+            return self
+        remap = np.full(len(self.series_keys), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        tiers = {
+            name: dict(tier, series=remap[tier["series"]])
+            for name, tier in self.tiers.items()
+        }
+        return TelemetryRollups([self.series_keys[i] for i in used], tiers)
+
+    def __len__(self) -> int:
+        return sum(len(tier["bucket"]) for tier in self.tiers.values())
+
+    def _scopes(self) -> np.ndarray:
+        """Index into SCOPES of every series."""
+        if self._scope_ids is None:
+            self._scope_ids = np.array(
+                [SCOPES.index(scope) for scope, _ in self.series_keys], dtype=np.int8
+            )
+        return self._scope_ids
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes for tier in self.tiers.values() for array in tier.values()
+        )
+
+    def series(self, scope: str, key: Any, tier: str) -> _Tier:
+        """Rows of one series in one tier, ordered by bucket."""
+        rows = self.tiers[tier]
+        series_id = self._series_ids.get((scope, key), -1)
+        mask = rows["series"] == series_id
+        return {column: values[mask] for column, values in rows.items()}
+
+    def tier_for(self, min_buckets: int) -> Optional[str]:
+        """Coarsest tier whose fleet series has at least min_buckets buckets."""
+        for name in reversed([name for name in TIERS if name in self.tiers]):
+            if len(self.series("fleet", FLEET_KEY, name)["bucket"]) >= min_buckets:
+                return name
+        return None
+
+    def matrix(self, scope: str, tier: str, metric: str = "bandwidth_sum") -> tuple:
+        """
+        Dense [series x bucket] matrix of one metric for every series of a scope.
+
+        Sums are turned into per-bucket means (sum / count); buckets without
+        records are NaN.
+
+        Returns:
+            tuple: (keys, bucket start hours since the epoch, values)
+        """
+        rows = self.tiers[tier]
+        mask = self._scopes()[rows["series"]] == SCOPES.index(scope)
+        # Rows are ordered by series, then bucket (see _reduce)
+        ids = rows["series"][mask]
+        starts = np.r_[True, ids[1:] != ids[:-1]] if len(ids) else np.zeros(0, bool)
+        series_ids = ids[starts]
+        rows_of = np.cumsum(starts) - 1
+        # Every timed record is in the fleet series, so it has every bucket
+        buckets = self.series("fleet", FLEET_KEY, tier)["bucket"]
+        columns = np.searchsorted(buckets, rows["bucket"][mask])
+
+        values = rows[metric][mask].astype(np.float64)
+        if metric.endswith("_sum"):
+            values = values / rows["count"][mask]
+        matrix = np.full((len(series_ids), len(buckets)), np.nan)
+        matrix[rows_of, columns] = values
+        keys = [self.series_keys[i][1] for i in series_ids]
+        return keys, buckets / 3600.0, matrix
+
+
+def _empty_tier() -> _Tier:
+    tier = {
+        "series": np.empty(0, dtype=np.int64),
+        "bucket": np.empty(0, dtype=np.int64),
+    }
+    for column in COUNTS:
+        tier[column] = np.empty(0, dtype=np.int64)
+    for column in METRICS:
+        tier[column] = np.empty(0, dtype=np.float64)
+    return tier
+
+
+def _reduce(
+    ids: np.ndarray, buckets: np.ndarray, values: Dict[str, np.ndarray]
+) -> _Tier:
+    """Group rows by (series, bucket), ordered by series then bucket."""
+    if not len(ids):
+        return _empty_tier()
+    order = np.lexsort((buckets, ids))
+    ids, buckets = ids[order], buckets[order]
+    starts = np.flatnonzero(
+        np.r_[True, (ids[1:] != ids[:-1]) | (buckets[1:] != buckets[:-1])]
+    )
+    tier = {"series": ids[starts], "bucket": buckets[starts]}
+    for column, array in values.items():
+        reduction = METRICS[column][1] if column in METRICS else "sum"
+        ufunc = np.maximum if reduction == "max" else np.add
+        tier[column] = ufunc.reduceat(array[order], starts)
+    return tier
+
+
+def _coarsen(finest: _Tier) -> Dict[str, _Tier]:
+    """Derive every tier from 1-minute rows (sums add up, peaks take the max)."""
+    tiers = {}
+    for name, seconds in TIERS.items():
+        if seconds == TIERS["1m"]:
+            tiers[name] = finest
+            continue
+        tiers[name] = _reduce(
+            finest["series"],
+            finest["bucket"] // seconds * seconds,
+            {column: finest[column] for column in COUNTS + tuple(METRICS)},
+        )
+    return tiers
+
+
+def _numeric(store: ColumnStore, field: str) -> np.ndarray:
+    """Float values of a field, with missing or non-numeric values as 0."""
+    column = store.columns.get(field)
+    if isinstance(column, NumericColumn):
+        values = column.values.astype(np.float64)
+        if column.present is not None:
+            values[~column.present] = 0
+        return values
+    values = np.zeros(len(store))
+    if column is not None:
+        for row, value in enumerate(column.tolist()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[row] = value
+    return values
+
+
+def _keys(store: ColumnStore, field: str) -> Tuple[List[Any], np.ndarray]:
+    """Distinct values of a field and each row's code (-1 when missing)."""
+    column = store.columns.get(field)
+    if column is None:
+        return [], np.full(len(store), -1, dtype=np.int64)
+    if isinstance(column, CategoricalColumn):
+        return list(column.categories), column.codes.astype(np.int64)
+    lookup: Dict[Any, int] = {}
+    codes = np.full(len(store), -1, dtype=np.int64)
+    for row, value in enumerate(column.tolist()):
+        if value is None or value is MISSING:
+            continue
+        try:
+            codes[row] = lookup.setdefault(value, len(lookup))
+        except TypeError:
+            pass  # Unhashable keys (lists, dicts) have no series
+    return list(lookup), codes
@@ -0,0 +1,278 @@
+"""
+Telemetry Sampling for TRACE JSON Analysis
+
+Picks small, representative subsets of large datasets by record index:
+1. Representative samples: error records, bandwidth extremes and evenly
+   spaced records, de-duplicated by index instead of comparing records
+2. Extremes via partial selection (argpartition) instead of a full sort
+3. Stratified samples (k records per tower, region, error type, ...)
+4. Reservoir sampling (Algorithm L) for streamed records, optionally per stratum
+
+Column stores are scanned in fixed-size chunks, so time is linear in the
+number of records and extra memory is bounded by the chunk size plus the
+sample itself. Random choices come from a seeded generator, so the same
+input and seed always give the same sample.
+"""
+
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .telemetry_aggregates import NO_ERROR_VALUES
+from .telemetry_store import CategoricalColumn, ColumnStore, NumericColumn
+
+
+DEFAULT_SEED = 0
+SCAN_CHUNK_ROWS = 1 << 16
+EXTREMES_PER_SIDE = 5
+
+
+def sample_indices(store: ColumnStore, max_records: int) -> np.ndarray:
+    """
+    Representative sample of at most max_records row indices.
+
+    In order of priority: the first error records (up to a third of the
+    sample), the 5 lowest and 5 highest bandwidth records, then evenly spaced
+    records. Every row is picked at most once.
+    """
+    picked: Dict[int, None] = {}  # Insertion-ordered set of row indices
+
+    def pick(rows: Iterable[int]) -> None:
+        for row in rows:
+            if len(picked) >= max_records:
+                return
+            picked.setdefault(int(row), None)
+
+    # 1. Error records (high priority)
+    pick(first_matching_indices(store, "detected_error", max_records // 3))
+
+    # 2. Bandwidth outliers, lowest and highest
+    field = "bandwidth_utilization_pct"
+    pick(extreme_indices(store, field, EXTREMES_PER_SIDE))
+    pick(extreme_indices(store, field, EXTREMES_PER_SIDE, largest=True))
+
+    # 3. Evenly spaced records over the whole dataset
+    remaining = max_records - len(picked)
+    if remaining > 0:
+        step = max(1, len(store) // remaining)
+        pick(row for row in range(0, len(store), step) if row not in picked)
+
+    return np.fromiter(picked, dtype=np.intp, count=len(picked))
+
+
+def first_matching_indices(
+    store: ColumnStore, field: str, limit: int, exclude: Tuple = NO_ERROR_VALUES
+) -> np.ndarray:
+    """Indices of the first `limit` rows whose field is set and not in exclude."""
+    found: List[np.ndarray] = []
+    count = 0
+    for start, chunk in _chunks(store):
+        if count >= limit:
+            break
+        rows = np.flatnonzero(chunk.not_in(field, exclude))[: limit - count]
+        found.append(rows + start)
+        count += len(rows)
+    return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+
+def extreme_indices(
+    store: ColumnStore,
+    field: str,
+    k: int,
+    largest: bool = False,
+    default: float = 0,
+) -> np.ndarray:
+    """
+    Indices of the k smallest (or largest) values of a numeric field.
+
+    Missing values count as `default`. The result is ordered like the
+    matching end of a stable ascending sort, i.e. sorted(...)[:k] or
+    sorted(...)[-k:].
+    """
+    best_values = np.empty(0)
+    best_rows = np.empty(0, dtype=np.intp)
+    for start, chunk in _chunks(store):
+        values = np.concatenate([best_values, _numeric_values(chunk, field, default)])
+        rows = np.concatenate([best_rows, np.arange(start, start + len(chunk))])
+        keep = _select(values, rows, k, largest)
+        best_values, best_rows = values[keep], rows[keep]
+
+    order = np.lexsort((best_rows, best_values))
+    return best_rows[order]
+
+
+def stratified_indices(
+    store: ColumnStore,
+    by: str,
+    per_stratum: int,
+    seed: Optional[int] = DEFAULT_SEED,
+) -> np.ndarray:
+    """
+    Uniform random sample of up to per_stratum rows for each value of a field.
+
+    Every row gets a seeded random priority and each stratum keeps its
+    per_stratum lowest priorities, so only the current picks are carried
+    from chunk to chunk. Returns row indices in ascending order.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.empty(0, dtype=np.int64)
+    priorities = np.empty(0)
+    rows = np.empty(0, dtype=np.intp)
+    stratum_ids: Dict[Any, int] = {}
+
+    for start, chunk in _chunks(store):
+        keys = np.concatenate([keys, _stratum_keys(chunk, by, stratum_ids)])
+        priorities = np.concatenate([priorities, rng.random(len(chunk))])
+        rows = np.concatenate([rows, np.arange(start, start + len(chunk))])
+
+        order = np.lexsort((priorities, keys))
+        sorted_keys = keys[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        group_sizes = np.diff(np.r_[group_start, len(order)])
+        rank = np.arange(len(order)) - np.repeat(group_start, group_sizes)
+        keep = order[rank < per_stratum]
+        keys, priorities, rows = keys[keep], priorities[keep], rows[keep]
+
+    return np.sort(rows)
+
+
+class ReservoirSampler:
+    """
+    Fixed-size uniform sample of a stream of records (Algorithm L).
+
+    With `by`, one reservoir of size k is kept per value of that field.
+    Skips between replacements are drawn up front, so most records cost a
+    single comparison.
+
+    Example:
+        sampler = ReservoirSampler(50, by="tower_id")
+        for record in reader:
+            sampler.add(record)
+        sample = sampler.sample
+    """
+
+    def __init__(
+        self, k: int, seed: Optional[int] = DEFAULT_SEED, by: Optional[str] = None
+    ):
+        self.k = k
+        self.by = by
+        self.seen = 0
+        self._rng = random.Random(seed)
+        self._reservoirs: Dict[Any, _Reservoir] = {}
+
+    def add(self, record: dict) -> None:
+        key = record.get(self.by, "unknown") if self.by else None
+        reservoir = self._reservoirs.get(key)
+        if reservoir is None:
+            reservoir = self._reservoirs[key] = _Reservoir(self.k, self._rng)
+        reservoir.add(self.seen, record)
+        self.seen += 1
+
+    def extend(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.add(record)
+
+    @property
+    def sample(self) -> List[dict]:
+        """Sampled records in arrival order."""
+        items = [item for r in self._reservoirs.values() for item in r.items]
+        return [record for _, record in sorted(items, key=lambda item: item[0])]
+
+
+class _Reservoir:
+    __slots__ = ("k", "rng", "items", "seen", "weight", "next_pick")
+
+    def __init__(self, k: int, rng: random.Random):
+        self.k = k
+        self.rng = rng
+        self.items: List[Tuple[int, dict]] = []
+        self.seen = 0
+        self.weight = 1.0
+        self.next_pick = 0
+
+    def add(self, position: int, record: dict) -> None:
+        if self.k <= 0:
+            return
+        if len(self.items) < self.k:
+            self.items.append((position, record))
+            if len(self.items) == self.k:
+                self.weight = self._draw_weight()
+                self.next_pick = self.k + self._draw_skip()
+        elif self.seen == self.next_pick:
+            self.items[self.rng.randrange(self.k)] = (position, record)
+            self.weight *= self._draw_weight()
+            self.next_pick += 1 + self._draw_skip()
+        self.seen += 1
+
+    def _draw_weight(self) -> float:
+        return math.exp(math.log(self._uniform()) / self.k)
+
+    def _draw_skip(self) -> int:
+        if self.weight >= 1.0:
+            return 0
+        return int(math.log(self._uniform()) / math.log1p(-self.weight))
+
+    def _uniform(self) -> float:
+        return self.rng.random() or 1e-300  # Avoid log(0)
+
+
+def _chunks(store: ColumnStore) -> Iterator[Tuple[int, ColumnStore]]:
+    for start in range(0, len(store), SCAN_CHUNK_ROWS):
+        yield start, store.slice(start, start + SCAN_CHUNK_ROWS)
+
+
+def _numeric_values(store: ColumnStore, field: str, default: float) -> np.ndarray:
+    column = store.columns.get(field)
+    if column is None:
+        return np.full(len(store), default, dtype=np.float64)
+    if not isinstance(column, NumericColumn):
+        raise TypeError(f"Field '{field}' is not numeric")
+    values = column.values.astype(np.float64)
+    if column.present is not None:
+        values[~column.present] = default
+    return values
+
+
+def _select(values: np.ndarray, rows: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """
+    Positions of the k best values, ties broken like a stable ascending sort.
+
+    For the smallest values, earlier rows win ties; for the largest, later
+    rows win (they come last in a stable sort).
+    """
+    if len(values) <= k:
+        return np.arange(len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if largest:
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        better = np.flatnonzero(values > threshold)
+    else:
+        threshold = np.partition(values, k - 1)[k - 1]
+        better = np.flatnonzero(values < threshold)
+    ties = np.flatnonzero(values == threshold)
+    needed = k - len(better)
+    ties = ties[np.argsort(rows[ties], kind="stable")]
+    ties = ties[-needed:] if largest else ties[:needed]
+    return np.concatenate([better, ties])
+
+
+def _stratum_keys(
+    store: ColumnStore, by: str, stratum_ids: Dict[Any, int]
+) -> np.ndarray:
+    """Integer stratum of every row, consistent across chunks of one store."""
+    column = store.columns.get(by)
+    if column is None:
+        return np.full(len(store), -1, dtype=np.int64)
+    if isinstance(column, CategoricalColumn):
+        # Codes are shared by every chunk sliced from the same store
+        return column.codes.astype(np.int64)
+    values = column.tolist()
+    return np.fromiter(
+        (stratum_ids.setdefault(v, len(stratum_ids)) for v in values),
+        dtype=np.int64,
+        count=len(values),
+    )
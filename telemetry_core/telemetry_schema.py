@@ -0,0 +1,419 @@
+"""
+Compiled Telemetry Record Schema for TRACE
+
+Validates loaded telemetry against the trace_reduced_20.json field set, so a
+malformed value is caught at load time instead of skewing averages later:
+1. Each known field has a type (float, int, bool, text, list or timestamp) and
+   an optional valid range; unknown fields pass through untouched
+2. Values that are the right data in the wrong form are coerced: numeric
+   strings, integral floats in count fields, "true"/"false" and 0/1 in flags,
+   numbers in text fields
+3. Rows with a value that cannot be coerced, or that is out of range (e.g. a
+   negative latency or 250% bandwidth), are quarantined: removed from the
+   dataset and kept aside with their source row numbers
+4. A validation report counts the valid, quarantined and coerced rows per field
+   and gives a few examples of what was rejected
+
+Stores are validated column by column: a column that already has the right
+type only gets vectorized range checks, and a mistyped one is coerced once per
+distinct value, so clean data costs almost nothing extra. Streamed files are
+validated the same way, one batch of records at a time.
+"""
+
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .telemetry_index import NOT_A_TIME, row_times
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    Column,
+    ColumnStore,
+    NumericColumn,
+    ObjectColumn,
+    build_column,
+)
+
+
+FLOAT, INT, BOOL, TEXT, LIST, TIMESTAMP = (
+    "float",
+    "int",
+    "bool",
+    "text",
+    "list",
+    "timestamp",
+)
+
+# Field set of trace_reduced_20.json: (type, minimum, maximum)
+TELEMETRY_FIELDS: Dict[str, Tuple[str, Optional[float], Optional[float]]] = {
+    "timestamp": (TIMESTAMP, None, None),
+    "region_id": (TEXT, None, None),
+    "tower_id": (TEXT, None, None),
+    "agent_id": (TEXT, None, None),
+    "neighbors": (LIST, None, None),
+    "capacity_users": (INT, 0, None),
+    "connected_users": (INT, 0, None),
+    "bandwidth_utilization_pct": (FLOAT, 0, 100),
+    "rsrq_db": (FLOAT, None, None),
+    "packet_loss_pct": (FLOAT, 0, 100),
+    "latency_ms": (FLOAT, 0, None),
+    "cpu_util_pct": (FLOAT, 0, 100),
+    "power_voltage_v": (FLOAT, None, None),
+    "event_type": (TEXT, None, None),
+    "tower_radius_km": (FLOAT, 0, None),
+    "desired_radius_km": (FLOAT, 0, None),
+    "coverage_gap_pct": (FLOAT, 0, 100),
+    "adjust_radius_action": (TEXT, None, None),
+    "adjust_reason": (TEXT, None, None),
+    "detected_error": (TEXT, None, None),
+    "detection_confidence": (FLOAT, 0, 1),
+    "signals_used": (LIST, None, None),
+    "action_executed": (TEXT, None, None),
+    "action_reason": (TEXT, None, None),
+    "healed_now": (BOOL, None, None),
+    "auto": (BOOL, None, None),
+    "human_in_loop": (BOOL, None, None),
+}
+
+# Rejected values listed in a validation report
+MAX_EXAMPLES = 5
+
+_BOOLEANS = {"true": True, "false": False, "1": True, "0": False}
+_NUMERIC_KINDS = (FLOAT, INT, BOOL)
+_DTYPES = {FLOAT: np.float64, INT: np.int64, BOOL: np.bool_}
+
+
+def _to_float(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError("expected a number, got a boolean")
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            raise ValueError("expected a number") from None
+    elif not isinstance(value, (int, float)):
+        raise ValueError("expected a number")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError("expected a finite number")
+    return value
+
+
+def _to_int(value: Any) -> int:
+    number = _to_float(value)
+    if isinstance(number, float):
+        if not number.is_integer():
+            raise ValueError("expected a whole number")
+        number = int(number)
+    return number
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _BOOLEANS:
+        return _BOOLEANS[value.strip().lower()]
+    raise ValueError("expected true or false")
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError("expected text")
+
+
+def _to_list(value: Any) -> Any:
+    # Lists arrive as JSON arrays or, in the trace exports, as "['TX003']" text
+    if isinstance(value, (list, str)):
+        return value
+    raise ValueError("expected a list")
+
+
+def _to_timestamp(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError("expected an ISO 8601 timestamp")
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("expected an ISO 8601 timestamp") from None
+    return value
+
+
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    FLOAT: _to_float,
+    INT: _to_int,
+    BOOL: _to_bool,
+    TEXT: _to_text,
+    LIST: _to_list,
+    TIMESTAMP: _to_timestamp,
+}
+
+
+class ValidationReport:
+    """Counts of valid, quarantined and coerced rows; mergeable across chunks."""
+
+    def __init__(self):
+        self.records = 0
+        self.quarantined = 0
+        self.invalid: Dict[str, int] = {}
+        self.coerced: Dict[str, int] = {}
+        self.examples: List[dict] = []
+
+    def reject(self, field: str, count: int = 1) -> None:
+        self.invalid[field] = self.invalid.get(field, 0) + count
+
+    def coerce(self, field: str, count: int = 1) -> None:
+        self.coerced[field] = self.coerced.get(field, 0) + count
+
+    def example(self, row: int, field: str, value: Any, error: str) -> None:
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append(
+                {"row": row, "field": field, "value": repr(value)[:80], "error": error}
+            )
+
+    def merge(self, other: "ValidationReport", row_offset: int = 0) -> None:
+        """Fold in the report of the rows that come right after ours."""
+        self.records += other.records
+        self.quarantined += other.quarantined
+        for field, count in other.invalid.items():
+            self.reject(field, count)
+        for field, count in other.coerced.items():
+            self.coerce(field, count)
+        for example in other.examples:
+            if len(self.examples) < MAX_EXAMPLES:
+                self.examples.append(dict(example, row=example["row"] + row_offset))
+
+    @property
+    def valid(self) -> int:
+        return self.records - self.quarantined
+
+    def to_dict(self) -> dict:
+        """JSON summary: counts always, per-field details only when non-empty."""
+        report = {
+            "records": self.records,
+            "valid": self.valid,
+            "quarantined": self.quarantined,
+        }
+        if self.invalid:
+            report["invalid_fields"] = dict(sorted(self.invalid.items()))
+        if self.coerced:
+            report["coerced_fields"] = dict(sorted(self.coerced.items()))
+        if self.examples:
+            report["examples"] = sorted(self.examples, key=lambda e: e["row"])
+        return report
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ValidationReport":
+        report = cls()
+        report.records = data.get("records", 0)
+        report.quarantined = data.get("quarantined", 0)
+        report.invalid = dict(data.get("invalid_fields", {}))
+        report.coerced = dict(data.get("coerced_fields", {}))
+        report.examples = list(data.get("examples", []))
+        return report
+
+
+class RecordSchema:
+    """
+    Compiled per-field validation for telemetry column stores.
+
+    Example:
+        store, quarantine, report = TELEMETRY_SCHEMA.validate_store(store)
+    """
+
+    def __init__(self, fields: Dict[str, Tuple[str, Optional[float], Optional[float]]]):
+        self.fields = fields
+        # Compile each field to (name, kind, coerce, lo, hi) once
+        self._compiled = [
+            (name, kind, _COERCERS[kind], lo, hi)
+            for name, (kind, lo, hi) in fields.items()
+        ]
+
+    def validate_store(
+        self, store: ColumnStore
+    ) -> Tuple[ColumnStore, Optional[ColumnStore], ValidationReport]:
+        """
+        Validate and coerce a store column by column.
+
+        Returns:
+            tuple: (store of the valid rows, store of the quarantined rows with
+            a "source_row" column or None if there are none, report). A store
+            that needed no changes is returned as is.
+        """
+        report = ValidationReport()
+        report.records = len(store)
+        invalid = np.zeros(len(store), dtype=bool)
+        columns = dict(store.columns)
+        for name, kind, coerce, lo, hi in self._compiled:
+            column = columns.get(name)
+            if column is None:
+                continue
+            new, bad = self._validate_column(name, kind, column, lo, hi, report)
+            if bad is not None and bad.any():
+                report.reject(name, int(bad.sum()))
+                for row in np.flatnonzero(bad & ~invalid)[:MAX_EXAMPLES].tolist():
+                    value = column.get(row)
+                    report.example(row, name, value, _error(coerce, value, lo, hi))
+                invalid |= bad
+            if new is not column:
+                columns[name] = new
+
+        changed = any(columns[name] is not store.columns[name] for name in columns)
+        if changed:
+            store = ColumnStore(columns, len(store))
+        if not invalid.any():
+            return store, None, report
+
+        report.quarantined = int(invalid.sum())
+        bad_rows = np.flatnonzero(invalid)
+        quarantine = store.take(bad_rows)
+        quarantine.columns["source_row"] = NumericColumn(bad_rows.astype(np.int64))
+        return store.take(np.flatnonzero(~invalid)), quarantine, report
+
+    def _validate_column(
+        self,
+        name: str,
+        kind: str,
+        column: Column,
+        lo: Optional[float],
+        hi: Optional[float],
+        report: ValidationReport,
+    ) -> Tuple[Column, Optional[np.ndarray]]:
+        """(validated column, rows with an invalid value or None)."""
+        if isinstance(column, NumericColumn):
+            dtype = column.values.dtype.kind
+            present = _present(column)
+            if kind == FLOAT and dtype in "iuf":
+                return column, _out_of_range(column.values, present, lo, hi)
+            if kind == INT and dtype in "iu":
+                return column, _out_of_range(column.values, present, lo, hi)
+            if kind == INT and dtype == "f":
+                values = column.values
+                bad = present & ~(np.isfinite(values) & (values == np.trunc(values)))
+                bad |= _out_of_range(values, present & ~bad, lo, hi)
+                ints = np.where(bad, 0, values).astype(np.int64)
+                return NumericColumn(ints, _present_mask(present & ~bad)), bad
+            if kind == BOOL and dtype == "b":
+                return column, None
+        elif isinstance(column, CategoricalColumn) and kind in (TEXT, LIST):
+            return column, None
+        elif isinstance(column, CategoricalColumn) and kind == TIMESTAMP:
+            times = row_times(ColumnStore({name: column}, len(column.codes)), name)
+            return column, (column.codes >= 0) & (times == NOT_A_TIME)
+
+        # Mistyped column: coerce each distinct value once
+        coerce = _COERCERS[kind]
+        values = column.tolist()
+        results: Dict[Any, Any] = {}
+        bad = np.zeros(len(values), dtype=bool)
+        coerced = changed = 0
+        for row, value in enumerate(values):
+            if value is MISSING or value is None:
+                continue
+            key = (type(value), value) if _hashable(value) else None
+            result = results.get(key, _UNSET) if key is not None else _UNSET
+            if result is _UNSET:
+                try:
+                    result = coerce(value)
+                    if (lo is not None and result < lo) or (
+                        hi is not None and result > hi
+                    ):
+                        result = _INVALID
+                except ValueError:
+                    result = _INVALID
+                if key is not None:
+                    results[key] = result
+            if result is _INVALID:
+                bad[row] = True
+                values[row] = MISSING
+            elif type(result) is not type(value) or result != value:
+                coerced += _converted(value, result)
+                changed += 1
+                values[row] = result
+        if not changed and not bad.any() and isinstance(column, ObjectColumn):
+            return column, None  # e.g. CSV list columns: nothing to change
+        if coerced:
+            report.coerce(name, coerced)
+        return _typed_column(values, kind), bad
+
+
+class _Unset:
+    __slots__ = ()
+
+
+_UNSET = _Unset()
+_INVALID = _Unset()
+
+
+def _typed_column(values: List[Any], kind: str) -> Column:
+    """Column of coerced values; numeric fields stay numeric even if all missing."""
+    column = build_column(values)
+    if kind in _NUMERIC_KINDS and not isinstance(column, NumericColumn):
+        n = len(values)
+        return NumericColumn(np.zeros(n, dtype=_DTYPES[kind]), np.zeros(n, dtype=bool))
+    return column
+
+
+def _present(column: NumericColumn) -> np.ndarray:
+    if column.present is None:
+        return np.ones(len(column.values), dtype=bool)
+    return column.present
+
+
+def _present_mask(present: np.ndarray) -> Optional[np.ndarray]:
+    return None if present.all() else present
+
+
+def _out_of_range(
+    values: np.ndarray, present: np.ndarray, lo: Optional[float], hi: Optional[float]
+) -> np.ndarray:
+    """Present rows that are NaN/infinite or outside [lo, hi]."""
+    with np.errstate(invalid="ignore"):
+        if values.dtype.kind == "f":
+            bad = ~np.isfinite(values)
+        else:
+            bad = np.zeros(len(values), dtype=bool)
+        if lo is not None:
+            bad |= values < lo
+        if hi is not None:
+            bad |= values > hi
+    return bad & present
+
+
+def _error(
+    coerce: Callable[[Any], Any], value: Any, lo: Optional[float], hi: Optional[float]
+) -> str:
+    """Why a value was rejected, for the report's examples."""
+    try:
+        coerce(value)
+    except ValueError as e:
+        return str(e)
+    return _out_of_range_error(lo, hi)
+
+
+def _out_of_range_error(lo: Optional[float], hi: Optional[float]) -> str:
+    low = "-inf" if lo is None else f"{lo:g}"
+    high = "inf" if hi is None else f"{hi:g}"
+    return f"out of range [{low}, {high}]"
+
+
+def _converted(old: Any, new: Any) -> bool:
+    """Whether coercion changed the kind of a value (1.0 -> 1 does not count)."""
+    return not (_is_number(old) and _is_number(new))
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _hashable(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool))
+
+
+TELEMETRY_SCHEMA = RecordSchema(TELEMETRY_FIELDS)
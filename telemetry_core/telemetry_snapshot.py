@@ -0,0 +1,305 @@
+"""
+Binary Telemetry Snapshots for TRACE
+
+Persists a ColumnStore as a compact binary file that can be reopened with a
+single memory map instead of re-parsing JSON text:
+1. An 8-byte magic, then the header length and a JSON header with the row
+   count, the schema (one entry per column) and free-form metadata
+2. Typed column blocks (numpy arrays plus presence masks), 64-byte aligned
+3. A JSON string dictionary per categorical column, and a JSON block for any
+   object column
+
+Reopened numeric and code arrays are read-only views into the mapping, so
+opening is near-instant regardless of size, and the OS page cache shares the
+pages between every worker process that opens the same snapshot.
+
+SnapshotDirectory plugs snapshots into ParseCache as a persistent tier, so a
+file parsed once is reopened from its snapshot in later processes.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    ColumnStore,
+    NumericColumn,
+    ObjectColumn,
+)
+
+
+MAGIC = b"TRCSNAP1"
+FORMAT_VERSION = 2  # 2 added snapshot_id
+ALIGNMENT = 64
+
+_HEADER_LENGTH_BYTES = 8
+
+# Snapshot only sources at least this large; small files parse fast enough
+DEFAULT_SNAPSHOT_MIN_MB = int(os.environ.get("TELEMETRY_SNAPSHOT_MIN_MB", "1"))
+# Shared snapshot directory; by default snapshots go next to their source
+DEFAULT_SNAPSHOT_DIR = os.environ.get("TELEMETRY_SNAPSHOT_DIR") or None
+
+
+def write_snapshot(
+    path: Union[str, Path], store: ColumnStore, metadata: Optional[dict] = None
+) -> str:
+    """
+    Write a store to path atomically (the file is replaced only when complete).
+
+    Args:
+        path: Snapshot file to create or replace
+        store: Columns to persist
+        metadata: JSON-serializable dict stored in the header
+
+    Returns:
+        str: Unique id of the written snapshot, also set on store.snapshot
+    """
+    blocks: List[bytes] = []
+    offset = 0
+
+    def add_block(data: bytes) -> dict:
+        nonlocal offset
+        offset += -offset % ALIGNMENT
+        blocks.append(data)
+        block = {"offset": offset, "nbytes": len(data)}
+        offset += len(data)
+        return block
+
+    columns = []
+    for name, column in store.columns.items():
+        if isinstance(column, NumericColumn):
+            values = column.values.astype(
+                column.values.dtype.newbyteorder("<"), copy=False
+            )
+            entry = {
+                "name": name,
+                "kind": "numeric",
+                "dtype": values.dtype.str,
+                "values": add_block(values.tobytes()),
+                "present": None,
+            }
+            if column.present is not None:
+                entry["present"] = add_block(column.present.tobytes())
+        elif isinstance(column, CategoricalColumn):
+            entry = {
+                "name": name,
+                "kind": "categorical",
+                "codes": add_block(column.codes.astype("<i4").tobytes()),
+                "categories": add_block(_json_bytes(column.categories)),
+            }
+        else:
+            present = [
+                [row, value]
+                for row, value in enumerate(column.values)
+                if value is not MISSING
+            ]
+            entry = {
+                "name": name,
+                "kind": "object",
+                "values": add_block(_json_bytes(present)),
+            }
+        columns.append(entry)
+
+    snapshot_id = uuid.uuid4().hex
+    header = _json_bytes(
+        {
+            "version": FORMAT_VERSION,
+            "snapshot_id": snapshot_id,
+            "num_rows": store.num_rows,
+            "columns": columns,
+            "metadata": metadata or {},
+        }
+    )
+    # Blocks start at the first aligned offset after the header
+    data_start = len(MAGIC) + _HEADER_LENGTH_BYTES + len(header)
+    data_start += -data_start % ALIGNMENT
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(_HEADER_LENGTH_BYTES, "little"))
+            f.write(header)
+            f.write(b"\0" * (data_start - f.tell()))
+            for block in blocks:
+                f.write(b"\0" * (-(f.tell() - data_start) % ALIGNMENT))
+                f.write(block)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    store.snapshot = (str(path), snapshot_id)
+    return snapshot_id
+
+
+def read_snapshot_header(path: Union[str, Path]) -> dict:
+    """Read only the header of a snapshot (schema, row count and metadata)."""
+    with open(path, "rb") as f:
+        return _parse_header(f.read(len(MAGIC) + _HEADER_LENGTH_BYTES), f)[0]
+
+
+def open_snapshot(path: Union[str, Path]) -> Tuple[ColumnStore, dict]:
+    """
+    Memory-map a snapshot and return (store, metadata).
+
+    Numeric and categorical columns are zero-copy views of the mapping; the
+    mapping stays open for as long as any of them is referenced.
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported version
+    """
+    with open(path, "rb") as f:
+        header, data_start = _parse_header(f.read(len(MAGIC) + _HEADER_LENGTH_BYTES), f)
+        size = os.fstat(f.fileno()).st_size
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    num_rows = header["num_rows"]
+
+    def block(entry: dict) -> memoryview:
+        start = data_start + entry["offset"]
+        if start + entry["nbytes"] > size:
+            raise ValueError(f"Truncated snapshot: {path}")
+        return memoryview(buffer)[start : start + entry["nbytes"]]
+
+    columns: Dict[str, Any] = {}
+    for entry in header["columns"]:
+        kind = entry["kind"]
+        if kind == "numeric":
+            values = np.frombuffer(block(entry["values"]), dtype=entry["dtype"])
+            present = None
+            if entry["present"] is not None:
+                present = np.frombuffer(block(entry["present"]), dtype=bool)
+            columns[entry["name"]] = NumericColumn(values, present)
+        elif kind == "categorical":
+            codes = np.frombuffer(block(entry["codes"]), dtype="<i4")
+            categories = json.loads(bytes(block(entry["categories"])))
+            columns[entry["name"]] = CategoricalColumn(codes, categories)
+        elif kind == "object":
+            values = [MISSING] * num_rows
+            for row, value in json.loads(bytes(block(entry["values"]))):
+                values[row] = value
+            columns[entry["name"]] = ObjectColumn(values)
+        else:
+            raise ValueError(f"Unknown column kind in snapshot: {kind}")
+
+    store = ColumnStore(columns, num_rows)
+    store.snapshot = (str(path), header["snapshot_id"])
+    return store, header["metadata"]
+
+
+def _parse_header(prefix: bytes, f) -> Tuple[dict, int]:
+    if len(prefix) < len(MAGIC) + _HEADER_LENGTH_BYTES or not prefix.startswith(MAGIC):
+        raise ValueError("Not a telemetry snapshot")
+    length = int.from_bytes(prefix[len(MAGIC) :], "little")
+    header = json.loads(f.read(length))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {header.get('version')}")
+    data_start = len(prefix) + length
+    return header, data_start + (-data_start % ALIGNMENT)
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SnapshotDirectory:
+    """
+    Persistent tier for ParseCache: one snapshot per source file.
+
+    Cached values are dicts holding a "store" ColumnStore plus JSON-serializable
+    details, which go into the snapshot metadata. Other ColumnStore entries
+    (e.g. rollup tables) are written as side snapshots next to the main one.
+    A snapshot is only reused while the size and mtime recorded for its source
+    file still match.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = DEFAULT_SNAPSHOT_DIR,
+        min_source_bytes: int = DEFAULT_SNAPSHOT_MIN_MB << 20,
+    ):
+        self.root = Path(root) if root else None
+        self.min_source_bytes = min_source_bytes
+
+    def path_for(self, source: Union[str, Path]) -> Path:
+        """Snapshot file of a source file."""
+        source = Path(source)
+        if self.root is None:
+            return source.parent / ".snapshots" / f"{source.name}.snap"
+        # A shared directory may hold sources with the same file name
+        tag = hashlib.blake2b(str(source).encode("utf-8"), digest_size=4).hexdigest()
+        return self.root / f"{source.name}.{tag}.snap"
+
+    def load(self, source: Union[str, Path], key: Tuple[int, int]) -> Optional[tuple]:
+        """Return (digest, value, nbytes) from a fresh snapshot, or None."""
+        if key[0] < self.min_source_bytes:
+            return None
+        path = self.path_for(source)
+        try:
+            header = read_snapshot_header(path)
+            recorded = header["metadata"].get("source", {})
+            if (recorded.get("size"), recorded.get("mtime_ns")) != tuple(key):
+                return None
+            store, metadata = open_snapshot(path)
+        except (OSError, ValueError, KeyError):
+            return None  # Missing, stale or unreadable; fall back to parsing
+
+        value = dict(metadata["details"], store=store)
+        nbytes = store.nbytes
+        # Tables persisted next to the snapshot must come from the same write
+        for name, snapshot_id in metadata.get("tables", {}).items():
+            try:
+                table, _ = open_snapshot(self.table_path(path, name))
+            except (OSError, ValueError):
+                return None
+            if table.snapshot[1] != snapshot_id:
+                return None
+            value[name] = table
+            nbytes += table.nbytes
+        return metadata["source"]["digest"], value, nbytes
+
+    def save(
+        self, source: Union[str, Path], key: Tuple[int, int], digest: str, value: dict
+    ) -> None:
+        """Write a snapshot of a freshly parsed value (best effort)."""
+        if key[0] < self.min_source_bytes or value is None:
+            return
+        path = self.path_for(source)
+        tables = {
+            k: v
+            for k, v in value.items()
+            if k != "store" and isinstance(v, ColumnStore)
+        }
+        metadata = {
+            "source": {"size": key[0], "mtime_ns": key[1], "digest": digest},
+            "details": {
+                k: v for k, v in value.items() if k != "store" and k not in tables
+            },
+            "tables": {},
+        }
+        try:
+            # Side tables first: the main snapshot only names complete ones
+            for name, table in tables.items():
+                metadata["tables"][name] = write_snapshot(
+                    self.table_path(path, name), table
+                )
+            write_snapshot(path, value["store"], metadata)
+        except (OSError, TypeError, ValueError):
+            pass  # Read-only data directory or unserializable details
+
+    @staticmethod
+    def table_path(snapshot: Path, name: str) -> Path:
+        """File of a side table (e.g. rollups) persisted next to a snapshot."""
+        return snapshot.with_name(f"{snapshot.stem}.{name}{snapshot.suffix}")
@@ -0,0 +1,666 @@
+"""
+Columnar Telemetry Store for TRACE
+
+Holds loaded telemetry as one typed, contiguous array per field instead of a
+list of dicts:
+1. Numeric and boolean fields become numpy arrays with an optional presence mask
+2. String fields (tower_id, region_id, detected_error, ...) are dictionary-encoded
+3. Anything else (nested lists/objects, mixed types) falls back to a plain list
+
+The store still behaves like a read-only sequence of records (len, indexing,
+iteration) so record-oriented callers keep working, while the analyzers run on
+vectorized column operations. Appending returns a new store whose numeric and
+categorical columns grow into spare capacity shared with the old one, so
+repeated appends cost amortized O(new rows) rather than a copy of the history.
+"""
+
+import gc
+import sys
+from itertools import chain
+from operator import itemgetter
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+
+class _Missing:
+    """Sentinel for a field that is absent from a record."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+# Records converted at a time by ColumnStore.from_records
+RECORD_CHUNK_ROWS = 4096
+# Smallest capacity allocated when an appended column outgrows its buffer
+MIN_APPEND_CAPACITY = 1024
+
+
+class _Growth:
+    """
+    Buffers behind an appendable column, shared by the stores appended from it.
+
+    Only the column ending at `rows` (the newest) may write past it; an
+    append to an older version copies into fresh buffers instead.
+    """
+
+    __slots__ = ("values", "present", "rows", "index")
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        present: Optional[np.ndarray],
+        rows: int,
+        index: Optional[Dict[Any, int]] = None,
+    ):
+        self.values = values  # Values, or codes of a categorical column
+        self.present = present
+        self.rows = rows
+        self.index = index  # Categorical: value -> code in the newest categories
+
+
+class NumericColumn:
+    """Integer, float or boolean column with an optional presence mask."""
+
+    __slots__ = ("values", "present", "growth")
+
+    def __init__(self, values: np.ndarray, present: Optional[np.ndarray] = None):
+        self.values = values
+        self.present = present  # None means every row has a value
+        self.growth: Optional[_Growth] = None
+
+    def get(self, row: int) -> Any:
+        if self.present is not None and not self.present[row]:
+            return MISSING
+        return self.values[row].item()
+
+    def tolist(self) -> list:
+        values = self.values.tolist()
+        if self.present is None:
+            return values
+        return [v if p else MISSING for v, p in zip(values, self.present.tolist())]
+
+    def take(self, rows: np.ndarray) -> "NumericColumn":
+        present = None if self.present is None else self.present[rows]
+        return NumericColumn(self.values[rows], present)
+
+    def slice(self, start: int, stop: int) -> "NumericColumn":
+        present = None if self.present is None else self.present[start:stop]
+        return NumericColumn(self.values[start:stop], present)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (0 if self.present is None else self.present.nbytes)
+
+
+class CategoricalColumn:
+    """Dictionary-encoded column: int32 codes into a list of distinct values."""
+
+    __slots__ = ("codes", "categories", "growth")
+
+    def __init__(self, codes: np.ndarray, categories: List[Any]):
+        self.codes = codes  # -1 marks a missing value
+        self.categories = categories
+        self.growth: Optional[_Growth] = None
+
+    def get(self, row: int) -> Any:
+        code = self.codes[row]
+        return MISSING if code < 0 else self.categories[code]
+
+    def tolist(self) -> list:
+        # Code -1 conveniently indexes the trailing MISSING entry
+        lookup = self.categories + [MISSING]
+        return [lookup[c] for c in self.codes.tolist()]
+
+    def take(self, rows: np.ndarray) -> "CategoricalColumn":
+        return CategoricalColumn(self.codes[rows], self.categories)
+
+    def slice(self, start: int, stop: int) -> "CategoricalColumn":
+        return CategoricalColumn(self.codes[start:stop], self.categories)
+
+    def code_of(self, value: Any) -> int:
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return -2  # Matches no row, not even missing ones
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(sys.getsizeof(c) for c in self.categories)
+
+
+class ObjectColumn:
+    """Fallback column of arbitrary Python values."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def get(self, row: int) -> Any:
+        return self.values[row]
+
+    def tolist(self) -> list:
+        return list(self.values)
+
+    def take(self, rows: np.ndarray) -> "ObjectColumn":
+        return ObjectColumn([self.values[i] for i in rows.tolist()])
+
+    def slice(self, start: int, stop: int) -> "ObjectColumn":
+        return ObjectColumn(self.values[start:stop])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(v) for v in self.values)
+
+
+Column = Union[NumericColumn, CategoricalColumn, ObjectColumn]
+
+
+def build_column(values: Sequence[Any]) -> Column:
+    """Pick the most compact column type for a list of values (MISSING allowed)."""
+    if len(values) and type(values[0]) is str:
+        column = _string_column(values)
+        if column is not None:
+            return column
+
+    value_types = set(map(type, values))
+    complete = _Missing not in value_types and type(None) not in value_types
+    value_types.discard(_Missing)
+
+    numeric_types = value_types - {type(None)}
+    if numeric_types == {bool}:
+        return _numeric_column(values, np.bool_, False, complete)
+    if numeric_types and numeric_types <= {int}:
+        try:
+            return _numeric_column(values, np.int64, 0, complete)
+        except OverflowError:
+            return ObjectColumn(list(values))
+    if numeric_types and numeric_types <= {int, float}:
+        return _numeric_column(values, np.float64, 0.0, complete)
+    if value_types <= {str, type(None)}:
+        return _string_column(values)
+    return ObjectColumn(list(values))
+
+
+def _string_column(values: Sequence[Any]) -> Optional[CategoricalColumn]:
+    """
+    Dictionary-encode values that are all strings, None or MISSING.
+
+    Returns None for any other values. The type check runs on the distinct
+    values only, so each value is visited twice: hashed, then encoded.
+    """
+    try:
+        # dict.fromkeys keeps first-seen order, so codes match a row-by-row pass
+        distinct = dict.fromkeys(values)
+    except TypeError:  # Unhashable values (lists, objects)
+        return None
+    if not set(map(type, distinct)) <= {str, type(None), _Missing}:
+        return None
+    distinct.pop(MISSING, None)
+    index = {value: code for code, value in enumerate(distinct)}
+    index[MISSING] = -1
+    codes = np.fromiter(
+        map(index.__getitem__, values), dtype=np.int32, count=len(values)
+    )
+    return CategoricalColumn(codes, list(distinct))
+
+
+def _missing_like(column: Column, num_rows: int) -> Column:
+    """Column of the same kind as column with num_rows missing values."""
+    if isinstance(column, NumericColumn):
+        values = np.zeros(num_rows, dtype=column.values.dtype)
+        return NumericColumn(values, np.zeros(num_rows, dtype=bool))
+    if isinstance(column, CategoricalColumn):
+        return CategoricalColumn(np.full(num_rows, -1, dtype=np.int32), [])
+    return ObjectColumn([MISSING] * num_rows)
+
+
+def _numeric_column(
+    values: Sequence[Any], dtype: Any, fill: Any, complete: bool = False
+) -> NumericColumn:
+    if complete:
+        return NumericColumn(np.array(values, dtype=dtype))
+    # JSON nulls in numeric fields are treated as missing values
+    present = [v is not MISSING and v is not None for v in values]
+    if all(present):
+        return NumericColumn(np.array(values, dtype=dtype))
+    filled = [v if p else fill for v, p in zip(values, present)]
+    return NumericColumn(np.array(filled, dtype=dtype), np.array(present, dtype=bool))
+
+
+def concat_columns(chunks: List[Column], num_rows: int) -> Column:
+    """Join per-chunk columns of one field into a single column."""
+    if not chunks:
+        return build_column([None] * num_rows)
+    if len(chunks) == 1:
+        return chunks[0]
+
+    if all(isinstance(c, NumericColumn) for c in chunks):
+        dtypes = {c.values.dtype for c in chunks}
+        if len(dtypes) == 1 or np.dtype(bool) not in dtypes:
+            values = np.concatenate([c.values for c in chunks])
+            present = None
+            if any(c.present is not None for c in chunks):
+                present = np.concatenate(
+                    [
+                        c.present
+                        if c.present is not None
+                        else np.ones(len(c.values), dtype=bool)
+                        for c in chunks
+                    ]
+                )
+            return NumericColumn(values, present)
+
+    if all(isinstance(c, CategoricalColumn) for c in chunks):
+        categories = dict.fromkeys(chain.from_iterable(c.categories for c in chunks))
+        index = {value: code for code, value in enumerate(categories)}
+        codes = []
+        for chunk in chunks:
+            lookup = np.fromiter(
+                chain(map(index.__getitem__, chunk.categories), [-1]),
+                dtype=np.int32,
+                count=len(chunk.categories) + 1,
+            )
+            codes.append(lookup[chunk.codes])
+        return CategoricalColumn(np.concatenate(codes), list(categories))
+
+    # Mixed kinds after a column was widened mid-file
+    return build_column([v for c in chunks for v in c.tolist()])
+
+
+def append_column(column: Column, delta: Column, num_rows: int) -> Column:
+    """
+    column followed by delta (num_rows rows in all), leaving column unchanged.
+
+    Numeric and categorical columns are written into spare capacity after
+    the column's rows, which is doubled when it runs out; other columns are
+    concatenated.
+    """
+    if isinstance(column, NumericColumn) and isinstance(delta, NumericColumn):
+        dtypes = {column.values.dtype, delta.values.dtype}
+        if len(dtypes) == 1 or np.dtype(bool) not in dtypes:
+            return _append_numeric(column, delta, num_rows)
+    if isinstance(column, CategoricalColumn) and isinstance(delta, CategoricalColumn):
+        return _append_categorical(column, delta, num_rows)
+    return concat_columns([column, delta], num_rows)
+
+
+def _append_numeric(
+    column: NumericColumn, delta: NumericColumn, num_rows: int
+) -> NumericColumn:
+    rows = len(column.values)
+    dtype = np.result_type(column.values, delta.values)
+    masked = column.present is not None or delta.present is not None
+    growth = column.growth
+    if (
+        growth is None
+        or growth.rows != rows
+        or len(growth.values) < num_rows
+        or growth.values.dtype != dtype
+        or (masked and growth.present is None)
+    ):
+        growth = _Growth(_grown(column.values, num_rows, dtype), None, rows)
+        if masked:
+            present = np.ones(len(growth.values), dtype=bool)
+            if column.present is not None:
+                present[:rows] = column.present
+            growth.present = present
+    growth.values[rows:num_rows] = delta.values
+    if growth.present is not None:
+        growth.present[rows:num_rows] = (
+            True if delta.present is None else delta.present
+        )
+    growth.rows = num_rows
+    present = None if growth.present is None else growth.present[:num_rows]
+    appended = NumericColumn(growth.values[:num_rows], present)
+    appended.growth = growth
+    return appended
+
+
+def _append_categorical(
+    column: CategoricalColumn, delta: CategoricalColumn, num_rows: int
+) -> CategoricalColumn:
+    rows = len(column.codes)
+    growth = column.growth
+    if growth is None or growth.rows != rows:
+        index = {value: code for code, value in enumerate(column.categories)}
+        growth = _Growth(_grown(column.codes, num_rows, np.int32), None, rows, index)
+    elif len(growth.values) < num_rows:
+        growth.values = _grown(column.codes, num_rows, np.int32)
+
+    # Readers of column keep its categories; new ones go into a copy
+    index = growth.index
+    categories = column.categories
+    new = [value for value in delta.categories if value not in index]
+    if new:
+        index.update(zip(new, range(len(categories), len(categories) + len(new))))
+        categories = categories + new
+    lookup = np.fromiter(
+        chain(map(index.__getitem__, delta.categories), [-1]),
+        dtype=np.int32,
+        count=len(delta.categories) + 1,
+    )
+    growth.values[rows:num_rows] = lookup[delta.codes]
+    growth.rows = num_rows
+    appended = CategoricalColumn(growth.values[:num_rows], categories)
+    appended.growth = growth
+    return appended
+
+
+def _grown(values: np.ndarray, num_rows: int, dtype: Any) -> np.ndarray:
+    """Buffer of dtype starting with values, with room for twice num_rows."""
+    buffer = np.empty(max(2 * num_rows, MIN_APPEND_CAPACITY), dtype=dtype)
+    buffer[: len(values)] = values
+    return buffer
+
+
+class ColumnStore:
+    """Read-only columnar table of telemetry records."""
+
+    def __init__(self, columns: Dict[str, Column], num_rows: int):
+        self.columns = columns
+        self.num_rows = num_rows
+        # (path, snapshot_id) of an on-disk snapshot holding the same rows
+        self.snapshot: Optional[Tuple[str, str]] = None
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict]) -> "ColumnStore":
+        """Build a store from a list of record dicts."""
+        if not all(issubclass(t, dict) for t in set(map(type, records))):
+            raise ValueError("Telemetry records must be JSON objects")
+        if len(records) <= RECORD_CHUNK_ROWS:
+            return cls._from_record_chunk(records)
+
+        # Chunk by chunk, each chunk's values are still in the CPU caches from
+        # the transposition when its columns are built. Transposing allocates a
+        # tuple per record, which would otherwise set off repeated full garbage
+        # collections over the parsed records
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            stores = [
+                cls._from_record_chunk(records[start : start + RECORD_CHUNK_ROWS])
+                for start in range(0, len(records), RECORD_CHUNK_ROWS)
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return cls.concat(stores)
+
+    @classmethod
+    def _from_record_chunk(cls, records: Sequence[dict]) -> "ColumnStore":
+        fields = tuple(records[0]) if records else ()
+        values = None
+        if len(fields) > 1 and sum(map(len, records)) == len(fields) * len(records):
+            # Records with the first record's fields (the usual case): one pass
+            # collects a tuple of values per record, transposed into one tuple
+            # per field
+            try:
+                values = list(zip(*map(itemgetter(*fields), records)))
+            except KeyError:
+                pass
+        if values is None:
+            # Union of all fields, in first-seen order
+            fields = tuple(dict.fromkeys(chain.from_iterable(records)))
+            values = [[r.get(name, MISSING) for r in records] for name in fields]
+        columns = {name: build_column(column) for name, column in zip(fields, values)}
+        return cls(columns, len(records))
+
+    @classmethod
+    def concat(cls, stores: Sequence["ColumnStore"]) -> "ColumnStore":
+        """Stack stores row-wise; fields absent from a store are missing there."""
+        num_rows = sum(store.num_rows for store in stores)
+        fields = dict.fromkeys(chain.from_iterable(store.columns for store in stores))
+        columns = {}
+        for name in fields:
+            like = next(s.columns[name] for s in stores if name in s.columns)
+            columns[name] = concat_columns(
+                [
+                    store.columns.get(name) or _missing_like(like, store.num_rows)
+                    for store in stores
+                ],
+                num_rows,
+            )
+        return cls(columns, num_rows)
+
+    def append(self, delta: "ColumnStore") -> "ColumnStore":
+        """
+        New store with delta's rows after this one's; this store is unchanged.
+
+        The new store shares this one's column buffers and writes delta into
+        their spare capacity (see append_column), so a chain of appends
+        copies each row amortized O(1) times. Appends to the same store must
+        not run concurrently.
+        """
+        num_rows = self.num_rows + delta.num_rows
+        fields = dict.fromkeys(chain(self.columns, delta.columns))
+        columns = {}
+        for name in fields:
+            like = self.columns.get(name) or delta.columns[name]
+            columns[name] = append_column(
+                self.columns.get(name) or _missing_like(like, self.num_rows),
+                delta.columns.get(name) or _missing_like(like, delta.num_rows),
+                num_rows,
+            )
+        return ColumnStore(columns, num_rows)
+
+    # ------------------------------------------------------------------
+    # Sequence-of-records interface
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[dict, "ColumnStore"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.num_rows)
+            if step == 1:
+                return self.slice(start, stop)
+            return self.take(np.arange(self.num_rows)[key])
+        if key < 0:
+            key += self.num_rows
+        if not 0 <= key < self.num_rows:
+            raise IndexError("record index out of range")
+        record = {}
+        for name, column in self.columns.items():
+            value = column.get(key)
+            if value is not MISSING:
+                record[name] = value
+        return record
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.to_records())
+
+    def to_records(self) -> List[dict]:
+        """Materialize the store back into a list of record dicts."""
+        names = list(self.columns)
+        if not names:
+            return [{} for _ in range(self.num_rows)]
+        rows = zip(*(self.columns[name].tolist() for name in names))
+        return [
+            {name: value for name, value in zip(names, row) if value is not MISSING}
+            for row in rows
+        ]
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the column data."""
+        return sum(column.nbytes for column in self.columns.values())
+
+    def slice(self, start: int, stop: int) -> "ColumnStore":
+        """Return a store of rows start..stop-1 that shares the column arrays."""
+        start, stop, _ = slice(start, stop).indices(self.num_rows)
+        stop = max(start, stop)
+        columns = {
+            name: column.slice(start, stop) for name, column in self.columns.items()
+        }
+        return ColumnStore(columns, stop - start)
+
+    def take(self, rows: np.ndarray) -> "ColumnStore":
+        """Return a new store with only the given row positions."""
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = {name: column.take(rows) for name, column in self.columns.items()}
+        return ColumnStore(columns, len(rows))
+
+    # ------------------------------------------------------------------
+    # Vectorized column operations
+    # ------------------------------------------------------------------
+
+    def _numeric(self, name: str) -> Optional[NumericColumn]:
+        column = self.columns.get(name)
+        if column is None:
+            return None
+        if not isinstance(column, NumericColumn):
+            raise TypeError(f"Field '{name}' is not numeric")
+        return column
+
+    def _present(self, column: NumericColumn) -> np.ndarray:
+        if column.present is None:
+            return np.ones(self.num_rows, dtype=bool)
+        return column.present
+
+    def below(self, name: str, threshold: float) -> np.ndarray:
+        """Rows where the field is present and < threshold."""
+        column = self._numeric(name)
+        if column is None:
+            return np.zeros(self.num_rows, dtype=bool)
+        return (column.values < threshold) & self._present(column)
+
+    def above(self, name: str, threshold: float) -> np.ndarray:
+        """Rows where the field is present and > threshold."""
+        column = self._numeric(name)
+        if column is None:
+            return np.zeros(self.num_rows, dtype=bool)
+        return (column.values > threshold) & self._present(column)
+
+    def equals(self, name: str, value: Any) -> np.ndarray:
+        """Rows where the field equals value."""
+        return self.isin(name, [value])
+
+    def isin(self, name: str, values: Iterable[Any]) -> np.ndarray:
+        """Rows where the field is present and one of values."""
+        values = list(values)
+        column = self.columns.get(name)
+        if column is None:
+            return np.zeros(self.num_rows, dtype=bool)
+        if isinstance(column, CategoricalColumn):
+            codes = [column.code_of(v) for v in values]
+            return np.isin(column.codes, codes)
+        if isinstance(column, NumericColumn):
+            numbers = [v for v in values if isinstance(v, (int, float))]
+            return np.isin(column.values, numbers) & self._present(column)
+        return np.fromiter(
+            (v is not MISSING and v in values for v in column.values),
+            dtype=bool,
+            count=self.num_rows,
+        )
+
+    def not_in(self, name: str, values: Iterable[Any]) -> np.ndarray:
+        """Rows where the field is present and not one of values."""
+        column = self.columns.get(name)
+        if column is None:
+            return np.zeros(self.num_rows, dtype=bool)
+        return ~self.isin(name, values) & self.present(name)
+
+    def present(self, name: str) -> np.ndarray:
+        """Rows where the field exists."""
+        column = self.columns.get(name)
+        if column is None:
+            return np.zeros(self.num_rows, dtype=bool)
+        if isinstance(column, CategoricalColumn):
+            return column.codes >= 0
+        if isinstance(column, NumericColumn):
+            return self._present(column)
+        return np.fromiter(
+            (v is not MISSING for v in column.values), dtype=bool, count=self.num_rows
+        )
+
+    def sum(self, name: str, mask: Optional[np.ndarray] = None) -> Union[int, float]:
+        """
+        Sum a numeric field over the masked rows, missing values counting as 0.
+
+        Floats are accumulated left to right so the result matches Python's
+        built-in sum() over the same records bit for bit.
+        """
+        column = self._numeric(name)
+        if column is None:
+            return 0
+        values = column.values
+        if column.present is not None:
+            mask = column.present if mask is None else mask & column.present
+        if mask is not None:
+            values = values[mask]
+        if values.size == 0:
+            return 0
+        if values.dtype == np.float64:
+            return float(np.add.accumulate(values)[-1])
+        return int(values.sum())
+
+    def distinct(
+        self, name: str, mask: Optional[np.ndarray] = None, default: Any = "unknown"
+    ) -> set:
+        """Distinct values of a field over the masked rows."""
+        column = self.columns.get(name)
+        if column is None:
+            return {default} if self.count(mask) else set()
+        if isinstance(column, CategoricalColumn):
+            codes = column.codes if mask is None else column.codes[mask]
+            lookup = column.categories + [default]
+            return {lookup[c] for c in np.unique(codes).tolist()}
+        values = column.tolist()
+        rows = range(self.num_rows) if mask is None else np.flatnonzero(mask).tolist()
+        return {default if values[i] is MISSING else values[i] for i in rows}
+
+    def value_counts(self, name: str, mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        """Value histogram over the masked rows, keyed in first-occurrence order."""
+        column = self.columns.get(name)
+        if column is None:
+            return {}
+        if isinstance(column, CategoricalColumn):
+            codes = column.codes if mask is None else column.codes[mask]
+            codes = codes[codes >= 0]
+            uniques, first_seen, counts = np.unique(
+                codes, return_index=True, return_counts=True
+            )
+            order = np.argsort(first_seen, kind="stable")
+            return {
+                column.categories[uniques[i]]: int(counts[i]) for i in order.tolist()
+            }
+        values = column.tolist()
+        rows = range(self.num_rows) if mask is None else np.flatnonzero(mask).tolist()
+        counts: Dict[Any, int] = {}
+        for i in rows:
+            if values[i] is not MISSING:
+                counts[values[i]] = counts.get(values[i], 0) + 1
+        return counts
+
+    def value(self, name: str, row: int, default: Any = None) -> Any:
+        """Single field value of one row."""
+        column = self.columns.get(name)
+        if column is None:
+            return default
+        value = column.get(row if row >= 0 else row + self.num_rows)
+        return default if value is MISSING else value
+
+    def count(self, mask: Optional[np.ndarray] = None) -> int:
+        """Number of rows selected by mask (all rows if mask is None)."""
+        return self.num_rows if mask is None else int(np.count_nonzero(mask))
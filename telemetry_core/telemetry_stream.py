@@ -0,0 +1,120 @@
+"""
+Incremental Telemetry Readers for TRACE
+
+Parses telemetry files record-by-record so that arbitrarily large files can be
+ingested with memory bounded by the size of a single record rather than the
+size of the file. Supported layouts:
+1. A top-level JSON array of objects
+2. Newline-delimited JSON (one object per line)
+3. A single JSON object
+"""
+
+import json
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB reads
+MAX_RECORD_BYTES = 64 << 20  # Refuse to buffer a single record beyond 64 MiB
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonRecordReader:
+    """
+    Stream JSON objects out of a file without loading the whole document.
+
+    Iterating yields one dict per record. After iteration finishes, `layout`
+    is one of "array", "object" (a single record) or "ndjson".
+    """
+
+    def __init__(
+        self, path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.layout: Optional[str] = None
+
+    def __iter__(self) -> Iterator[dict]:
+        decoder = json.JSONDecoder()
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            buf = ""
+            pos = 0
+            eof = False
+
+            def read_more() -> bool:
+                nonlocal buf, pos, eof
+                if eof:
+                    return False
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    eof = True
+                    return False
+                # Drop everything already consumed so the buffer stays small
+                buf = buf[pos:] + chunk
+                pos = 0
+                return True
+
+            def peek() -> str:
+                nonlocal pos
+                while True:
+                    while pos < len(buf) and buf[pos] in _WHITESPACE:
+                        pos += 1
+                    if pos < len(buf):
+                        return buf[pos]
+                    if not read_more():
+                        return ""
+
+            def decode_record() -> dict:
+                nonlocal pos
+                peek()  # raw_decode does not skip leading whitespace
+                while True:
+                    try:
+                        record, pos = decoder.raw_decode(buf, pos)
+                        break
+                    except json.JSONDecodeError:
+                        # Most likely a record split across reads
+                        if len(buf) - pos > MAX_RECORD_BYTES or not read_more():
+                            raise
+                if not isinstance(record, dict):
+                    raise ValueError("Telemetry records must be JSON objects")
+                return record
+
+            first = peek()
+            if first == "[":
+                self.layout = "array"
+                pos += 1
+                if peek() == "]":
+                    pos += 1
+                else:
+                    while True:
+                        yield decode_record()
+                        delimiter = peek()
+                        pos += 1
+                        if delimiter == ",":
+                            continue
+                        if delimiter == "]":
+                            break
+                        raise json.JSONDecodeError(
+                            "Expecting ',' delimiter", buf, pos - 1
+                        )
+                if peek():
+                    raise json.JSONDecodeError("Extra data", buf, pos)
+
+            elif first == "{":
+                num_objects = 0
+                while peek():
+                    if buf[pos] != "{":
+                        raise json.JSONDecodeError("Expecting object", buf, pos)
+                    yield decode_record()
+                    num_objects += 1
+                self.layout = "object" if num_objects == 1 else "ndjson"
+
+            elif first:
+                raise ValueError(
+                    "JSON should be an array of objects, a single object, "
+                    "or newline-delimited objects"
+                )
+            else:
+                raise json.JSONDecodeError("Expecting value", buf, 0)
@@ -0,0 +1,262 @@
+"""
+Synthetic TRACE Fleet Telemetry
+
+Deterministic generator of telemetry records with the trace_reduced_20.json
+schema, for benchmarks and load tests at 10^3 to 10^7 records:
+1. Towers report in rounds (one record per tower per interval), so timestamps
+   are ordered and every tower gets an evenly spaced time series
+2. Bandwidth follows a daily cycle plus a per-tower offset and noise; latency,
+   RSRQ, packet loss, CPU, radius actions and errors are derived from it
+3. Values are drawn with numpy in chunks, so memory stays bounded by the chunk
+   size however many records are generated
+
+The same (num_records, seed, num_towers) always gives the same records.
+"""
+
+import csv
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+
+DEFAULT_SEED = 0
+DEFAULT_START = datetime(2025, 10, 31, tzinfo=timezone.utc)
+DEFAULT_INTERVAL_S = 60
+GENERATE_CHUNK_ROWS = 1 << 15
+# Smaller for endless streams, which may start in the middle of a chunk
+STREAM_CHUNK_ROWS = 1 << 12
+
+FIELDS = [
+    "timestamp",
+    "region_id",
+    "tower_id",
+    "agent_id",
+    "neighbors",
+    "capacity_users",
+    "connected_users",
+    "bandwidth_utilization_pct",
+    "rsrq_db",
+    "packet_loss_pct",
+    "latency_ms",
+    "cpu_util_pct",
+    "power_voltage_v",
+    "event_type",
+    "tower_radius_km",
+    "desired_radius_km",
+    "coverage_gap_pct",
+    "adjust_radius_action",
+    "adjust_reason",
+    "detected_error",
+    "detection_confidence",
+    "signals_used",
+    "action_executed",
+    "action_reason",
+    "healed_now",
+    "auto",
+    "human_in_loop",
+]
+
+REGIONS = ["R-A", "R-B", "R-C", "R-D", "R-E"]
+CAPACITIES = [1000, 1500, 2000]
+ERRORS = ["high_cpu", "packet_loss", "radio_failure", "voltage_drop", "backhaul_down"]
+SIGNAL_SETS = ["[]", "['SINR']", "['SNR']", "['LTE_RSRQ', 'RSSI']", "['CQI', 'RSSI']"]
+
+
+def default_num_towers(num_records: int) -> int:
+    """Fleet size for a dataset: about one day of 5-minute reports per tower."""
+    return int(min(max(num_records // 288, 20), 100_000))
+
+
+def generate_records(
+    num_records: int,
+    seed: int = DEFAULT_SEED,
+    num_towers: Optional[int] = None,
+    start: datetime = DEFAULT_START,
+    interval_s: int = DEFAULT_INTERVAL_S,
+) -> Iterator[dict]:
+    """
+    Yield num_records synthetic telemetry records in timestamp order.
+
+    Args:
+        num_records: Number of records to generate
+        seed: Random seed; the same seed always gives the same records
+        num_towers: Fleet size (defaults to default_num_towers(num_records))
+        start: Timestamp of the first reporting round
+        interval_s: Seconds between two reports of the same tower
+
+    Example:
+        for record in generate_records(10_000, seed=1):
+            ...
+    """
+    towers = num_towers or default_num_towers(num_records)
+    fleet = _Fleet(towers, seed)
+    rng = np.random.default_rng(seed)
+    for first in range(0, num_records, GENERATE_CHUNK_ROWS):
+        rows = np.arange(first, min(first + GENERATE_CHUNK_ROWS, num_records))
+        yield from fleet.records(rows, rng, start, interval_s)
+
+
+def stream_records(
+    num_towers: int,
+    seed: int = DEFAULT_SEED,
+    start: datetime = DEFAULT_START,
+    interval_s: int = DEFAULT_INTERVAL_S,
+    first_round: int = 0,
+) -> Iterator[dict]:
+    """
+    Yield synthetic records without end, one reporting round after another.
+
+    Feeds live models (e.g. the tower fleet) rather than files; the same
+    (num_towers, seed) always gives the same sequence. Each chunk of rounds
+    is drawn from its own seeded generator, so starting at first_round gives
+    the same records as generating the earlier rounds and dropping them.
+    """
+    fleet = _Fleet(num_towers, seed)
+    rounds_per_chunk = max(STREAM_CHUNK_ROWS // num_towers, 1)
+    chunk_rows = rounds_per_chunk * num_towers
+    skip = (first_round % rounds_per_chunk) * num_towers
+    for chunk in itertools.count(first_round // rounds_per_chunk):
+        rng = np.random.default_rng([seed, num_towers, chunk])
+        rows = np.arange(chunk * chunk_rows, (chunk + 1) * chunk_rows)
+        records = fleet.records(rows, rng, start, interval_s)
+        yield from records[skip:]
+        skip = 0
+
+
+def write_dataset(
+    path: Union[str, Path],
+    num_records: int,
+    seed: int = DEFAULT_SEED,
+    num_towers: Optional[int] = None,
+) -> Path:
+    """
+    Write synthetic records to a file, streaming (memory does not grow with size).
+
+    The layout follows the suffix: .json (array), .ndjson/.jsonl or .csv.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = generate_records(num_records, seed, num_towers)
+    suffix = path.suffix.lower()
+    with open(path, "w", newline="" if suffix == ".csv" else None) as f:
+        if suffix == ".csv":
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        elif suffix in (".ndjson", ".jsonl"):
+            for record in records:
+                f.write(json.dumps(record))
+                f.write("\n")
+        else:
+            f.write("[")
+            for i, record in enumerate(records):
+                f.write(",\n" if i else "\n")
+                f.write(json.dumps(record))
+            f.write("\n]\n")
+    return path
+
+
+class _Fleet:
+    """Static per-tower attributes, drawn once from the seed."""
+
+    def __init__(self, num_towers: int, seed: int):
+        rng = np.random.default_rng([seed, num_towers])
+        self.num_towers = num_towers
+        self.ids = [f"TX{i:03d}" for i in range(num_towers)]
+        self.capacity = rng.choice(CAPACITIES, num_towers)
+        self.base_load = rng.uniform(15, 65, num_towers)
+        self.radius = np.round(rng.uniform(0.5, 2.5, num_towers), 2)
+        self.neighbors = [self._neighbors(i, rng) for i in range(num_towers)]
+
+    def _neighbors(self, tower: int, rng: np.random.Generator) -> str:
+        count = int(rng.integers(1, 4))
+        picks = (tower + rng.integers(1, 11, count)) % self.num_towers
+        return str([self.ids[i] for i in dict.fromkeys(picks.tolist())])
+
+    def records(
+        self,
+        rows: np.ndarray,
+        rng: np.random.Generator,
+        start: datetime,
+        interval_s: int,
+    ) -> List[dict]:
+        n = len(rows)
+        tower = rows % self.num_towers
+        rounds = rows // self.num_towers
+        seconds = rounds * interval_s
+
+        # Daily cycle peaking mid-afternoon, shifted per tower
+        hour = (seconds / 3600.0) % 24
+        daily = 25 * np.sin((hour - 9) / 24 * 2 * np.pi)
+        noise = rng.normal(0, 8, n)
+        bandwidth = np.clip(self.base_load[tower] + daily + noise, 0, 100)
+        load = bandwidth / 100
+
+        capacity = self.capacity[tower]
+        connected = (capacity * load * rng.uniform(0.1, 0.3, n)).astype(np.int64)
+        rsrq = -5 - 8 * load - rng.uniform(0, 2, n)
+        packet_loss = np.maximum(rng.exponential(0.2, n) + 1.5 * (load > 0.85), 0)
+        latency = (10 + 90 * load**2 + rng.exponential(10, n)).astype(np.int64)
+        cpu = np.clip(20 + 60 * load + rng.normal(0, 6, n), 1, 100)
+        voltage = 48 + rng.normal(0, 1, n) - 6 * (rng.random(n) < 0.002)
+
+        event = np.where(rng.random(n) < 0.01, "concert", "normal")
+        gap = np.round(rng.uniform(0, 30, n), 2)
+        radius = self.radius[tower]
+        expand, shrink = bandwidth > 70, bandwidth < 30
+        action = np.select([expand, shrink], ["expand", "shrink"], "hold")
+        reason = np.select(
+            [expand, shrink], ["coverage_expand", "energy_saving"], "no_change"
+        )
+        desired = radius * np.select([expand, shrink], [1.15, 0.85], 1.0)
+
+        error = np.full(n, "none", dtype=object)
+        failing = rng.random(n) < 0.05 + 0.1 * (cpu > 85)
+        kinds = rng.integers(0, len(ERRORS), n)
+        error[failing] = np.asarray(ERRORS, dtype=object)[kinds[failing]]
+        confidence = np.round(rng.uniform(0.2, 1.0, n), 2)
+        signals = np.asarray(SIGNAL_SETS, dtype=object)[
+            rng.integers(0, len(SIGNAL_SETS), n)
+        ]
+        healed = rng.random(n) < 0.8
+        auto = rng.random(n) < 0.8
+
+        # A chunk spans few reporting rounds: format each timestamp once
+        offsets, round_of = np.unique(seconds, return_inverse=True)
+        labels = [(start + timedelta(seconds=s)).isoformat() for s in offsets.tolist()]
+        stamps = [labels[i] for i in round_of.tolist()]
+        tower_ids = [self.ids[t] for t in tower.tolist()]
+        columns = [
+            stamps,
+            [REGIONS[t % len(REGIONS)] for t in tower.tolist()],
+            tower_ids,
+            [f"agent-{t.lower()}" for t in tower_ids],
+            [self.neighbors[t] for t in tower.tolist()],
+            capacity.tolist(),
+            connected.tolist(),
+            np.round(bandwidth, 2).tolist(),
+            np.round(rsrq, 2).tolist(),
+            np.round(packet_loss, 3).tolist(),
+            latency.tolist(),
+            np.round(cpu, 2).tolist(),
+            np.round(voltage, 2).tolist(),
+            event.tolist(),
+            radius.tolist(),
+            np.round(desired, 2).tolist(),
+            gap.tolist(),
+            action.tolist(),
+            reason.tolist(),
+            error.tolist(),
+            confidence.tolist(),
+            signals.tolist(),
+            action.tolist(),
+            reason.tolist(),
+            healed.tolist(),
+            auto.tolist(),
+            (~auto).tolist(),
+        ]
+        return [dict(zip(FIELDS, values)) for values in zip(*columns)]
@@ -0,0 +1,204 @@
+"""
+Vectorized Trend and Anomaly Engine for TRACE Telemetry
+
+Computes trend statistics for every series of a scope (e.g. every tower) in
+one pass over a dense [series x bucket] matrix, instead of looping per tower:
+1. Trailing rolling mean and standard deviation (cumulative-sum windows)
+2. Exponentially weighted moving average (one vectorized step per bucket)
+3. Robust z-scores from the median and MAD, flagging anomalous buckets
+4. Least-squares slopes and the fitted value at the latest bucket
+
+Buckets without records are NaN and are skipped by every statistic, so towers
+that report irregularly are compared on the buckets they actually have. Time
+is measured in hours, so slopes are "units per hour".
+"""
+
+from typing import Any, List, Optional
+
+import numpy as np
+
+
+ROLLING_WINDOW = 6
+EWMA_ALPHA = 0.3
+# |robust z| above this marks an anomaly (Iglewicz and Hoaglin's cut-off)
+ANOMALY_Z = 3.5
+
+_MAD_TO_SIGMA = 0.6745  # MAD of a normal distribution, in standard deviations
+
+
+class SeriesTrends:
+    """
+    Trend statistics of many series sharing the same time buckets.
+
+    Per-series arrays (length = number of series): slope_per_hour, fitted_last,
+    mean, buckets, ewma_last, rolling_mean_last, rolling_std_last, z_last,
+    anomalous_last. Per-bucket matrices (series x buckets): rolling_mean,
+    rolling_std, ewma, z, anomalies.
+
+    Example:
+        keys, hours, values = rollups.matrix("tower", "1h", "bandwidth_sum")
+        trends = SeriesTrends(keys, hours, values)
+        rising = trends.top("slope_per_hour", 5)
+    """
+
+    def __init__(
+        self,
+        keys: List[Any],
+        hours: np.ndarray,
+        values: np.ndarray,
+        window: int = ROLLING_WINDOW,
+        alpha: float = EWMA_ALPHA,
+        anomaly_z: float = ANOMALY_Z,
+    ):
+        self.keys = keys
+        self.hours = hours
+        self.values = values
+
+        observed = ~np.isnan(values)
+        self.buckets = observed.sum(axis=1)
+        self.slope_per_hour, self.mean, self.fitted_last = linear_trend(values, hours)
+
+        self.rolling_mean, self.rolling_std = rolling_mean_std(values, window)
+        self.ewma = ewma(values, alpha)
+        self.z = robust_z(values)
+        self.anomalies = np.abs(np.nan_to_num(self.z)) > anomaly_z
+
+        # Statistics at each series' latest observed bucket
+        last = _last_observed(observed)
+        rows = np.arange(len(keys))
+        self.ewma_last = self.ewma[rows, last]
+        self.rolling_mean_last = self.rolling_mean[rows, last]
+        self.rolling_std_last = self.rolling_std[rows, last]
+        self.z_last = self.z[rows, last]
+        self.anomalous_last = self.anomalies[rows, last] & (self.buckets > 0)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: Any) -> Optional[dict]:
+        """Per-series statistics of one key, or None if it has no series."""
+        try:
+            row = self.keys.index(key)
+        except ValueError:
+            return None
+        return {
+            "slope_per_hour": float(self.slope_per_hour[row]),
+            "mean": float(self.mean[row]),
+            "fitted_last": float(self.fitted_last[row]),
+            "ewma_last": float(self.ewma_last[row]),
+            "z_last": float(self.z_last[row]),
+            "buckets": int(self.buckets[row]),
+        }
+
+    def top(
+        self, attribute: str, k: int, mask: Optional[np.ndarray] = None
+    ) -> List[Any]:
+        """Keys of the k series with the largest value of a per-series array."""
+        values = getattr(self, attribute)
+        values = np.where(np.isnan(values), -np.inf, values)
+        if mask is not None:
+            values = np.where(mask, values, -np.inf)
+        candidates = np.flatnonzero(values > -np.inf)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-values[candidates], k - 1)[:k]]
+        # Largest first, ties in key order
+        order = np.lexsort((candidates, -values[candidates]))
+        return [self.keys[i] for i in candidates[order]]
+
+
+def linear_trend(values: np.ndarray, hours: np.ndarray) -> tuple:
+    """
+    Least-squares line of every row over the observed (non-NaN) buckets.
+
+    Returns:
+        tuple: (slope per hour, mean, fitted value at the latest observed
+        bucket); slope is 0 for rows with fewer than 2 buckets, NaN statistics
+        for rows with none
+    """
+    observed = ~np.isnan(values)
+    n = observed.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_mean = (observed * hours).sum(axis=1) / n
+        y_mean = np.nansum(values, axis=1) / n
+        # Center per row first, so epoch-sized hour values keep their precision
+        t = np.where(observed, hours - t_mean[:, None], 0.0)
+        y = np.where(observed, values - y_mean[:, None], 0.0)
+        sum_tt = (t * t).sum(axis=1)
+        slope = np.where(sum_tt > 0, (t * y).sum(axis=1) / sum_tt, 0.0)
+        last_t = np.where(observed, hours - t_mean[:, None], -np.inf).max(axis=1)
+        fitted_last = y_mean + slope * np.where(n > 0, last_t, np.nan)
+    return slope, y_mean, fitted_last
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> tuple:
+    """Trailing mean and population std of the observed values in each window."""
+    observed = ~np.isnan(values)
+    # Shift each row to mean 0 first: sums of squares of large values cancel badly
+    with np.errstate(invalid="ignore", divide="ignore"):
+        offset = np.where(observed, values, 0.0).sum(axis=1) / observed.sum(axis=1)
+    offset = np.nan_to_num(offset)[:, None]
+    filled = np.where(observed, values - offset, 0.0)
+
+    def trailing(array: np.ndarray) -> np.ndarray:
+        total = np.cumsum(array, axis=1)
+        total[:, window:] -= total[:, :-window].copy()
+        return total
+
+    count = trailing(observed.astype(np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = trailing(filled) / count
+        variance = trailing(filled * filled) / count - mean * mean
+    return mean + offset, np.sqrt(np.maximum(variance, 0.0))
+
+
+def ewma(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponentially weighted moving average along each row.
+
+    Starts at the first observed bucket; unobserved buckets carry the
+    previous average forward.
+    """
+    result = np.full(values.shape, np.nan)
+    current = np.full(values.shape[0], np.nan)
+    for column in range(values.shape[1]):
+        value = values[:, column]
+        observed = ~np.isnan(value)
+        started = ~np.isnan(current)
+        current = np.where(
+            observed & started, alpha * value + (1 - alpha) * current, current
+        )
+        current = np.where(observed & ~started, value, current)
+        result[:, column] = current
+    return result
+
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """Robust z-scores per row: 0.6745 * (x - median) / MAD (NaN if MAD is 0)."""
+    median = _nanmedian_rows(values)
+    mad = _nanmedian_rows(np.abs(values - median[:, None]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = _MAD_TO_SIGMA * (values - median[:, None]) / mad[:, None]
+    return np.where(mad[:, None] > 0, deviation, np.nan)
+
+
+def _nanmedian_rows(values: np.ndarray) -> np.ndarray:
+    """Median of the non-NaN values of each row (NaN for empty rows)."""
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    n = (~np.isnan(values)).sum(axis=1)
+    lo = np.maximum((n - 1) // 2, 0)[:, None]
+    hi = np.maximum(n // 2, 0)[:, None]
+    if not values.shape[1]:
+        return np.full(values.shape[0], np.nan)
+    median = (
+        np.take_along_axis(ordered, lo, axis=1) + np.take_along_axis(ordered, hi, axis=1)
+    )[:, 0] / 2
+    return np.where(n > 0, median, np.nan)
+
+
+def _last_observed(observed: np.ndarray) -> np.ndarray:
+    """Column of each row's latest observed bucket (0 for rows with none)."""
+    columns = observed.shape[1]
+    if not columns:
+        return np.zeros(observed.shape[0], dtype=np.intp)
+    reversed_first = np.argmax(observed[:, ::-1], axis=1)
+    return columns - 1 - reversed_first
@@ -0,0 +1,586 @@
+"""
+Persistent Telemetry Warehouse for TRACE
+
+Keeps loaded telemetry in an embedded SQLite database, so datasets survive a
+restart and queries over long histories run inside SQLite instead of over
+records held in memory:
+1. Datasets are bulk-inserted in a single transaction per load or append, with
+   the database in WAL mode so readers never block the writer
+2. Covering indexes on (tower_id, timestamp) and (region_id, timestamp) hold
+   every column the analysis aggregates read, so a tower or region query over
+   a time window is answered from the index alone
+3. Filters and aggregates are pushed down into SQL: a filtered analysis costs
+   a range scan plus a GROUP BY, however much history is stored
+4. Dataset metadata and the ingest rollups are stored too, so a restart only
+   reads a few rows per dataset; records are read on demand
+
+Each known telemetry field gets its own column. Columns are untyped, so values
+come back exactly as they were loaded; flags are restored from the schema, and
+unknown fields or non-scalar values (e.g. neighbor lists) are kept as JSON.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .telemetry_aggregates import (
+    HIGH_BANDWIDTH_PCT,
+    HIGH_LATENCY_MS,
+    HIGH_PACKET_LOSS_PCT,
+    LOW_BANDWIDTH_PCT,
+    NO_ERROR_VALUES,
+    POOR_RSRQ_DB,
+    TelemetryAggregates,
+)
+from .telemetry_index import NOT_A_TIME, row_times, time_bounds
+from .telemetry_rollups import TelemetryRollups
+from .telemetry_schema import BOOL, LIST, TELEMETRY_FIELDS
+from .telemetry_store import (
+    MISSING,
+    CategoricalColumn,
+    ColumnStore,
+    NumericColumn,
+    build_column,
+)
+
+
+# Warehouse database file; unset keeps telemetry in memory only
+DEFAULT_WAREHOUSE_PATH = os.environ.get("TELEMETRY_WAREHOUSE") or None
+
+# Record ids are (dataset id << ROW_BITS) + row, so the rows of a dataset are
+# stored contiguously and in load order
+ROW_BITS = 40
+# Rows inserted per executemany() batch
+INSERT_BATCH_ROWS = 1 << 14
+# Page cache per connection; bulk inserts update both covering indexes
+CACHE_MB = 64
+
+FIELDS = tuple(TELEMETRY_FIELDS)
+_BOOL_FIELDS = frozenset(
+    name for name, (kind, _, _) in TELEMETRY_FIELDS.items() if kind == BOOL
+)
+_SCALARS = (str, int, float, bool)
+
+# Columns read by aggregates(); the covering indexes hold all of them
+_AGGREGATE_COLUMNS = (
+    "timestamp",
+    "bandwidth_utilization_pct",
+    "latency_ms",
+    "rsrq_db",
+    "packet_loss_pct",
+    "adjust_radius_action",
+    "detected_error",
+)
+_NO_ERRORS = tuple(v for v in NO_ERROR_VALUES if v is not None)
+
+
+def _quoted(names: Tuple[str, ...]) -> str:
+    return ", ".join(f'"{name}"' for name in names)
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    committed INTEGER NOT NULL DEFAULT 0,
+    num_records INTEGER NOT NULL DEFAULT 0,
+    fields TEXT NOT NULL DEFAULT '[]',
+    metadata TEXT NOT NULL DEFAULT '{{}}'
+);
+CREATE UNIQUE INDEX IF NOT EXISTS datasets_name
+    ON datasets (session_id, name) WHERE committed;
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    dataset_id INTEGER NOT NULL,
+    ts INTEGER,
+    {_quoted(FIELDS)},
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS records_tower_time ON records (
+    dataset_id, tower_id, ts, region_id, {_quoted(_AGGREGATE_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS records_region_time ON records (
+    dataset_id, region_id, ts, tower_id, {_quoted(_AGGREGATE_COLUMNS)}
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    dataset_id INTEGER PRIMARY KEY,
+    series TEXT NOT NULL,
+    tiers BLOB NOT NULL
+);
+"""
+
+# Per (tower, region) group: record count, sums and threshold counts
+_GROUP_SQL = f"""
+SELECT COALESCE(tower_id, 'unknown'), COALESCE(region_id, 'unknown'), COUNT(*),
+    SUM(bandwidth_utilization_pct), SUM(latency_ms),
+    COUNT(CASE WHEN bandwidth_utilization_pct < {LOW_BANDWIDTH_PCT} THEN 1 END),
+    COUNT(CASE WHEN bandwidth_utilization_pct > {HIGH_BANDWIDTH_PCT} THEN 1 END),
+    COUNT(CASE WHEN adjust_radius_action = 'shrink' THEN 1 END),
+    COUNT(CASE WHEN adjust_radius_action = 'expand' THEN 1 END),
+    COUNT(CASE WHEN rsrq_db < {POOR_RSRQ_DB} THEN 1 END),
+    COUNT(CASE WHEN latency_ms > {HIGH_LATENCY_MS} THEN 1 END),
+    SUM(CASE WHEN latency_ms > {HIGH_LATENCY_MS} THEN latency_ms END),
+    COUNT(CASE WHEN packet_loss_pct > {HIGH_PACKET_LOSS_PCT} THEN 1 END),
+    SUM(CASE WHEN packet_loss_pct > {HIGH_PACKET_LOSS_PCT} THEN packet_loss_pct END)
+FROM records WHERE {{where}} GROUP BY 1, 2
+"""
+_GROUP_SUMS = (
+    "count",
+    "bandwidth_sum",
+    "latency_sum",
+    "low_bandwidth_count",
+    "high_bandwidth_count",
+    "shrink_count",
+    "expand_count",
+    "poor_rsrq_count",
+    "high_latency_count",
+    "high_latency_sum",
+    "packet_loss_count",
+    "packet_loss_sum",
+)
+# Tower sets filled from the group counts of the same name
+_GROUP_TOWERS = {
+    "low_bandwidth_count": "low_bandwidth_towers",
+    "high_bandwidth_count": "high_bandwidth_towers",
+    "expand_count": "expand_towers",
+    "high_latency_count": "high_latency_towers",
+}
+
+
+def open_warehouse(
+    path: Optional[Union[str, Path]] = DEFAULT_WAREHOUSE_PATH,
+) -> Optional["TelemetryWarehouse"]:
+    """The warehouse at path, or None when no path is configured."""
+    return TelemetryWarehouse(path) if path else None
+
+
+class TelemetryWarehouse:
+    """
+    Thread-safe SQLite store of telemetry datasets.
+
+    Every thread reads through its own connection; writes are serialized.
+
+    Example:
+        warehouse = TelemetryWarehouse("/var/lib/trace/telemetry.db")
+        dataset_id = warehouse.create()
+        warehouse.insert(dataset_id, store)
+        warehouse.commit(dataset_id, "default", "day1", {"path": "day1.json"})
+        aggregates = warehouse.aggregates(dataset_id, tower_id="TX001")
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            # Drop datasets whose load never committed (e.g. a crash mid-load)
+            for (dataset_id,) in connection.execute(
+                "SELECT id FROM datasets WHERE NOT committed"
+            ).fetchall():
+                self._delete(connection, dataset_id)
+            connection.commit()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def create(self) -> int:
+        """Start a new dataset; it stays invisible until commit()."""
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO datasets (session_id, name) VALUES ('', '')"
+                )
+            return cursor.lastrowid
+
+    def insert(self, dataset_id: int, store: ColumnStore) -> None:
+        """Append the rows of a store to a dataset, in one transaction."""
+        if not len(store):
+            return
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                num_records, fields = connection.execute(
+                    "SELECT num_records, fields FROM datasets WHERE id = ?",
+                    (dataset_id,),
+                ).fetchone()
+                sql = (
+                    f"INSERT INTO records (id, dataset_id, ts, {_quoted(FIELDS)}, "
+                    f"extra) VALUES ({', '.join('?' * (len(FIELDS) + 4))})"
+                )
+                # Parameters are built batch by batch: as Python objects, the
+                # whole store would take several times its columnar size
+                times = row_times(store)
+                for start in range(0, len(store), INSERT_BATCH_ROWS):
+                    stop = start + INSERT_BATCH_ROWS
+                    rows = _record_rows(
+                        dataset_id,
+                        num_records + start,
+                        store.slice(start, stop),
+                        times[start:stop],
+                    )
+                    connection.executemany(sql, rows)
+                fields = list(dict.fromkeys(json.loads(fields) + store.fields))
+                connection.execute(
+                    "UPDATE datasets SET num_records = ?, fields = ? WHERE id = ?",
+                    (num_records + len(store), json.dumps(fields), dataset_id),
+                )
+
+    def commit(
+        self,
+        dataset_id: int,
+        session_id: str,
+        name: str,
+        metadata: dict,
+        rollups: Optional[TelemetryRollups] = None,
+    ) -> None:
+        """
+        Publish a dataset under (session, name), replacing any previous one.
+
+        Also used after an append, to store the new metadata and rollups.
+        """
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                for (previous,) in connection.execute(
+                    "SELECT id FROM datasets WHERE session_id = ? AND name = ? "
+                    "AND committed AND id != ?",
+                    (session_id, name, dataset_id),
+                ).fetchall():
+                    self._delete(connection, previous)
+                connection.execute(
+                    "UPDATE datasets SET session_id = ?, name = ?, committed = 1, "
+                    "metadata = ? WHERE id = ?",
+                    (session_id, name, json.dumps(metadata, default=str), dataset_id),
+                )
+                if rollups is not None:
+                    # One row per dataset: series keys as JSON, tier arrays as npz
+                    tiers = io.BytesIO()
+                    np.savez(
+                        tiers,
+                        **{
+                            f"{tier}.{column}": values
+                            for tier, arrays in rollups.tiers.items()
+                            for column, values in arrays.items()
+                        },
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?)",
+                        (
+                            dataset_id,
+                            json.dumps(rollups.series_keys, default=str),
+                            tiers.getvalue(),
+                        ),
+                    )
+
+    def drop(self, dataset_id: int) -> None:
+        """Delete a dataset and its records."""
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                self._delete(connection, dataset_id)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def datasets(self) -> List[dict]:
+        """Committed datasets: id, session_id, name, num_records and metadata."""
+        rows = self._connection().execute(
+            "SELECT id, session_id, name, num_records, metadata FROM datasets "
+            "WHERE committed ORDER BY id"
+        )
+        return [
+            {
+                "id": dataset_id,
+                "session_id": session_id,
+                "name": name,
+                "num_records": num_records,
+                "metadata": json.loads(metadata),
+            }
+            for dataset_id, session_id, name, num_records, metadata in rows
+        ]
+
+    def aggregates(
+        self,
+        dataset_id: int,
+        tower_id: Optional[str] = None,
+        region_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> TelemetryAggregates:
+        """
+        Analysis aggregates of the matching records, computed inside SQLite.
+
+        Args:
+            dataset_id: Dataset to query
+            tower_id: Optional tower to restrict to
+            region_id: Optional region to restrict to
+            start: Optional inclusive start of a time window (ISO 8601)
+            end: Optional exclusive end of a time window (ISO 8601)
+
+        Returns:
+            TelemetryAggregates equal to those of the matching rows in memory
+
+        Raises:
+            ValueError: If start or end is not a valid timestamp
+        """
+        where, params = _where(dataset_id, tower_id, region_id, start, end)
+        connection = self._connection()
+        aggregates = TelemetryAggregates()
+
+        for tower, region, *sums in connection.execute(
+            _GROUP_SQL.format(where=where), params
+        ):
+            aggregates.towers.add(tower)
+            aggregates.regions.add(region)
+            for name, value in zip(_GROUP_SUMS, sums):
+                setattr(aggregates, name, getattr(aggregates, name) + (value or 0))
+            for name, towers in _GROUP_TOWERS.items():
+                if sums[_GROUP_SUMS.index(name)]:
+                    getattr(aggregates, towers).add(tower)
+        if not aggregates.count:
+            return aggregates
+
+        errors = ", ".join("?" * len(_NO_ERRORS))
+        aggregates.error_types = dict(
+            connection.execute(
+                f"SELECT detected_error, COUNT(*) FROM records WHERE {where} "
+                f"AND detected_error NOT IN ({errors}) GROUP BY 1 ORDER BY MIN(id)",
+                params + list(_NO_ERRORS),
+            )
+        )
+        aggregates.error_count = sum(aggregates.error_types.values())
+
+        head = connection.execute(
+            f"SELECT timestamp, bandwidth_utilization_pct FROM records "
+            f"WHERE {where} ORDER BY id LIMIT 3",
+            params,
+        ).fetchall()
+        last = connection.execute(
+            f"SELECT timestamp, bandwidth_utilization_pct FROM records "
+            f"WHERE {where} ORDER BY id DESC LIMIT 1",
+            params,
+        ).fetchone()
+        aggregates.first_timestamp = _or(head[0][0], "unknown")
+        aggregates.last_timestamp = _or(last[0], "unknown")
+        aggregates.head_bandwidth = [_or(bandwidth, 0) for _, bandwidth in head]
+        aggregates.last_bandwidth = _or(last[1], 0)
+        return aggregates
+
+    def select(
+        self,
+        dataset_id: int,
+        tower_id: Optional[str] = None,
+        region_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        rows: Optional[List[int]] = None,
+        predicates: Sequence[Tuple[str, str, Any]] = (),
+        fields: Optional[Sequence[str]] = None,
+    ) -> ColumnStore:
+        """
+        Records matching the filters (and row numbers, if given), in load order.
+
+        Args:
+            dataset_id: Dataset to read
+            tower_id, region_id, start, end: Filters, as in aggregates()
+            rows: Optional row numbers to restrict to
+            predicates: (field, op, value) conditions with op one of =, !=, <,
+                <=, >, >=, in, not in (a tuple of values); conditions on
+                fields without a column are left to the caller
+            fields: Fields to read (default: all)
+
+        Raises:
+            ValueError: If start or end is not a valid timestamp
+        """
+        where, params = _where(dataset_id, tower_id, region_id, start, end)
+        if rows is not None:
+            base = dataset_id << ROW_BITS
+            where += f" AND id IN ({', '.join('?' * len(rows))})"
+            params += [base + row for row in rows]
+        for field, op, value in predicates:
+            if field not in TELEMETRY_FIELDS:
+                continue
+            if op in ("in", "not in"):
+                placeholders = ", ".join("?" * len(value))
+                where += f' AND "{field}" {op.upper()} ({placeholders})'
+                params.extend(value)
+            else:
+                where += f' AND "{field}" {op} ?'
+                params.append(value)
+        return self._read(dataset_id, f"WHERE {where} ORDER BY id", params, fields)
+
+    def iter_stores(self, dataset_id: int, chunk_rows: int) -> Iterator[ColumnStore]:
+        """All records of a dataset as ColumnStore chunks of chunk_rows rows."""
+        base = dataset_id << ROW_BITS
+        start = 0
+        while True:
+            chunk = self._read(
+                dataset_id,
+                "WHERE id >= ? AND id < ? ORDER BY id",
+                [base + start, base + start + chunk_rows],
+            )
+            if not len(chunk):
+                return
+            yield chunk
+            start += chunk_rows
+
+    def rollups(self, dataset_id: int) -> Optional[TelemetryRollups]:
+        """The stored rollups of a dataset, or None if none were stored."""
+        row = self._connection().execute(
+            "SELECT series, tiers FROM rollups WHERE dataset_id = ?", (dataset_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        arrays = np.load(io.BytesIO(row[1]))
+        tiers: Dict[str, Dict[str, np.ndarray]] = {}
+        for name in arrays.files:
+            tier, column = name.split(".", 1)
+            tiers.setdefault(tier, {})[column] = arrays[name]
+        series = [tuple(key) for key in json.loads(row[0])]
+        return TelemetryRollups(series, tiers)
+
+    # ------------------------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL makes commits durable at checkpoints, which is enough for a cache
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA cache_size=-{CACHE_MB << 10}")
+            self._local.connection = connection
+        return connection
+
+    def _read(
+        self,
+        dataset_id: int,
+        clause: str,
+        params: list,
+        fields: Optional[Sequence[str]] = None,
+    ) -> ColumnStore:
+        """Records of a dataset selected by a WHERE/ORDER BY clause."""
+        connection = self._connection()
+        (stored,) = connection.execute(
+            "SELECT fields FROM datasets WHERE id = ?", (dataset_id,)
+        ).fetchone()
+        names = [
+            name for name in json.loads(stored) if fields is None or name in fields
+        ]
+        columns = tuple(name for name in FIELDS if name in names)
+        # Unknown fields and non-scalar values only exist in the JSON column
+        extra = any(
+            name not in TELEMETRY_FIELDS or TELEMETRY_FIELDS[name][0] == LIST
+            for name in names
+        )
+        selected = ", ".join(filter(None, [_quoted(columns), "extra" if extra else ""]))
+        rows = connection.execute(
+            f"SELECT {selected or 'NULL'} FROM records {clause}", params
+        ).fetchall()
+        values: Dict[str, List[Any]] = {name: [MISSING] * len(rows) for name in names}
+        for i, row in enumerate(rows):
+            for name, value in zip(columns, row):
+                if value is not None:
+                    values[name][i] = bool(value) if name in _BOOL_FIELDS else value
+            if extra and row[-1] is not None:
+                for name, value in json.loads(row[-1]).items():
+                    if name in values:
+                        values[name][i] = value
+        return ColumnStore(
+            {name: build_column(column) for name, column in values.items()}, len(rows)
+        )
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, dataset_id: int) -> None:
+        base = dataset_id << ROW_BITS
+        connection.execute(
+            "DELETE FROM records WHERE id >= ? AND id < ?",
+            (base, base + (1 << ROW_BITS)),
+        )
+        connection.execute("DELETE FROM rollups WHERE dataset_id = ?", (dataset_id,))
+        connection.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+
+
+def _record_rows(
+    dataset_id: int, first_row: int, store: ColumnStore, times: np.ndarray
+) -> Iterator[tuple]:
+    """INSERT parameters for every row of a store (None for missing values)."""
+    num_rows = len(store)
+    extras: List[Optional[dict]] = [None] * num_rows
+
+    def keep_extra(name: str, row: int, value: Any) -> None:
+        if extras[row] is None:
+            extras[row] = {}
+        extras[row][name] = value
+
+    columns = []
+    for name in FIELDS:
+        column = store.columns.get(name)
+        if column is None:
+            columns.append(repeat(None, num_rows))
+            continue
+        values = column.tolist()
+        if isinstance(column, (NumericColumn, CategoricalColumn)):
+            # Typed columns only hold scalars
+            columns.append([None if v is MISSING else v for v in values])
+            continue
+        for row, value in enumerate(values):
+            if value is MISSING:
+                values[row] = None
+            elif value is not None and not isinstance(value, _SCALARS):
+                keep_extra(name, row, value)
+                values[row] = None
+        columns.append(values)
+
+    for name in store.fields:
+        if name not in TELEMETRY_FIELDS:
+            for row, value in enumerate(store.columns[name].tolist()):
+                if value is not MISSING:
+                    keep_extra(name, row, value)
+
+    base = (dataset_id << ROW_BITS) + first_row
+    return zip(
+        range(base, base + num_rows),
+        repeat(dataset_id),
+        [None if t == NOT_A_TIME else t for t in times.tolist()],
+        *columns,
+        [None if e is None else json.dumps(e, default=str) for e in extras],
+    )
+
+
+def _where(
+    dataset_id: int,
+    tower_id: Optional[str],
+    region_id: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+) -> Tuple[str, list]:
+    """WHERE clause (and parameters) of a dataset query."""
+    clauses, params = ["dataset_id = ?"], [dataset_id]
+    if tower_id:
+        clauses.append("tower_id = ?")
+        params.append(tower_id)
+    if region_id:
+        clauses.append("region_id = ?")
+        params.append(region_id)
+    if start or end:
+        clauses.append("ts >= ? AND ts < ?")
+        params.extend(time_bounds(start or None, end or None))
+    return " AND ".join(clauses), params
+
+
+def _or(value: Any, default: Any) -> Any:
+    return default if value is None else value
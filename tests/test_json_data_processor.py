@@ -0,0 +1,796 @@
+"""
+Tests for the JSON telemetry pipeline in telemetry_core and its ADK tools
+"""
+
+import csv
+import json
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from principal_agent.tools import json_data_processor as jdp
+from telemetry_core import (
+    engine,
+    payload_compactor,
+    telemetry_sampling,
+    telemetry_warehouse,
+)
+from telemetry_core.dataset_registry import DatasetRegistry
+from telemetry_core.telemetry_aggregates import TelemetryAggregates
+from telemetry_core.telemetry_diff import diff_datasets
+from telemetry_core.telemetry_parallel import aggregate
+from telemetry_core.telemetry_rollups import TelemetryRollups
+from telemetry_core.telemetry_snapshot import SnapshotDirectory
+from telemetry_core.telemetry_store import ColumnStore
+from telemetry_core.telemetry_synthetic import FIELDS, write_dataset
+from telemetry_core.telemetry_trends import SeriesTrends
+from telemetry_core.telemetry_warehouse import TelemetryWarehouse
+
+
+def _make_records(n: int, seed: int = 7) -> list:
+    """Generate telemetry records matching the trace_reduced_20.json schema."""
+    rnd = random.Random(seed)
+    records = []
+    for i in range(n):
+        tower = rnd.randrange(12)
+        records.append(
+            {
+                "timestamp": f"2025-10-31T{(i // 60) % 24:02d}:{i % 60:02d}:00+00:00",
+                "region_id": f"R-{'ABCDE'[tower % 5]}",
+                "tower_id": f"TX{tower:03d}",
+                "bandwidth_utilization_pct": round(rnd.uniform(0, 100), 2),
+                "rsrq_db": round(rnd.uniform(-15, -5), 2),
+                "packet_loss_pct": round(rnd.uniform(0, 2), 3),
+                "latency_ms": rnd.randrange(5, 150),
+                "cpu_util_pct": round(rnd.uniform(10, 95), 2),
+                "adjust_radius_action": rnd.choice(["hold", "expand", "shrink"]),
+                "detected_error": rnd.choice(["none", "none", "high_cpu", "packet_loss"]),
+                "healed_now": rnd.random() < 0.5,
+            }
+        )
+    return records
+
+
+@pytest.fixture
+def records():
+    return _make_records(300)
+
+
+@pytest.fixture(autouse=True)
+def _reset_loaded_data():
+    yield
+    engine._registry.clear()
+    engine._parse_cache.clear()
+    engine._result_cache.clear()
+    engine._loaded_json_data = None
+
+
+@pytest.mark.parametrize("layout", ["array", "ndjson"])
+def test_streaming_load_matches_in_memory_analysis(tmp_path, records, layout):
+    path = tmp_path / f"telemetry.{layout}"
+    if layout == "array":
+        path.write_text(json.dumps(records, indent=2))
+    else:
+        path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+    result = jdp.add_json_data(str(path), streaming=True)
+
+    assert result["status"] == "success"
+    assert result["num_records"] == len(records)
+    assert result["sample_record"] == records[0]
+    assert result["fields"] == list(records[0].keys())
+    assert engine._loaded_json_data["data"] is None
+
+    for analysis_type in ["comprehensive", "energy", "health", "prediction"]:
+        streamed = jdp.analyze_json_data_with_llm(analysis_type)["analysis"]
+        assert streamed == engine._perform_analysis(records, analysis_type, [])
+
+    streamed = jdp.get_recommendations_from_json(metric_focus="all")
+    assert streamed["recommendations"] == engine._generate_recommendations(records, "all")
+
+
+def test_streaming_load_rejects_malformed_json(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('[{"tower_id": "TX001"}, {"tower_id": ')
+
+    result = jdp.add_json_data(str(path), streaming=True)
+
+    assert result["status"] == "error"
+    assert "Invalid JSON format" in result["message"]
+
+
+def test_column_store_round_trips_records(records):
+    records[3].pop("latency_ms")
+    records[5]["detected_error"] = None
+    store = ColumnStore.from_records(records)
+
+    assert len(store) == len(records)
+    assert list(store) == records
+    assert store[5] == records[5]
+    assert store[-1] == records[-1]
+    assert store.nbytes < sum(len(json.dumps(r)) for r in records)
+
+
+def test_filter_data_returns_matching_rows(records):
+    store = ColumnStore.from_records(records)
+
+    filtered = engine._filter_data(store, "TX003", "R-D")
+
+    expected = [
+        r for r in records if r["tower_id"] == "TX003" and r["region_id"] == "R-D"
+    ]
+    assert list(filtered) == expected
+
+
+def test_comprehensive_analysis_of_sample_file():
+    assert jdp.add_json_data("data/trace_reduced_20.json")["status"] == "success"
+
+    analysis = engine._perform_analysis(
+        engine._loaded_json_data["data"], "comprehensive", ["recommendations"]
+    )
+
+    assert analysis["summary"] == {
+        "total_records": 2,
+        "unique_towers": 2,
+        "unique_regions": 2,
+        "time_span": {
+            "start": "2025-10-31T00:25:00+00:00",
+            "end": "2025-10-31T00:45:00+00:00",
+        },
+        "avg_bandwidth_utilization": 40.05,
+        "avg_latency_ms": 28.0,
+    }
+    assert analysis["insights"] == [
+        "Energy Opportunity: 1 records (50.0%) show low bandwidth utilization (<30%), "
+        "indicating potential for energy savings through radius reduction.",
+        "Coverage Expansion: 1 records recommend expanding coverage. Affected towers: TX005",
+        "Errors Detected: 1 error events found. Most common: high_cpu (1 occurrences)",
+    ]
+    assert analysis["key_findings"] == [
+        "🔋 1/2 records show energy-saving opportunity. Towers: TX005",
+        "🔴 1/2 records with errors. Most common: high_cpu",
+    ]
+    assert [r["category"] for r in analysis["recommendations"]] == [
+        "Energy Optimization",
+        "Reliability",
+    ]
+
+
+def test_most_common_error_prefers_first_seen_on_ties(records):
+    for record in records:
+        record["detected_error"] = "none"
+    records[10]["detected_error"] = "voltage_drop"
+    records[20]["detected_error"] = "high_cpu"
+    records[30]["detected_error"] = "high_cpu"
+    records[40]["detected_error"] = "voltage_drop"
+
+    findings = engine._extract_health_findings(records[5:])
+
+    assert findings == ["🔴 4/295 records with errors. Most common: voltage_drop"]
+
+
+def _session(session_id: str) -> SimpleNamespace:
+    """Stand-in for the ADK ToolContext of a session."""
+    return SimpleNamespace(session=SimpleNamespace(id=session_id))
+
+
+def test_sessions_and_named_datasets_are_isolated(tmp_path, records):
+    low, high = tmp_path / "low.json", tmp_path / "high.json"
+    low.write_text(json.dumps([dict(r, bandwidth_utilization_pct=10) for r in records]))
+    high.write_text(json.dumps([dict(r, bandwidth_utilization_pct=90) for r in records]))
+
+    jdp.add_json_data(str(low), tool_context=_session("alice"))
+    jdp.add_json_data(str(high), tool_context=_session("bob"))
+    jdp.add_json_data(str(high), dataset_name="other", tool_context=_session("alice"))
+
+    def categories(**kwargs):
+        result = jdp.get_recommendations_from_json(metric_focus="energy", **kwargs)
+        return [r["category"] for r in result["recommendations"]]
+
+    assert categories(tool_context=_session("alice")) == []
+    assert categories(dataset_name="low", tool_context=_session("alice")) == [
+        "Energy Optimization"
+    ]
+    assert categories(tool_context=_session("bob")) == []
+    assert jdp.analyze_json_data_with_llm()["status"] == "error"
+
+
+def test_compare_keeps_active_dataset(tmp_path, records):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    first.write_text(json.dumps(records))
+    second.write_text(json.dumps(records[:100]))
+    jdp.add_json_data(str(first))
+
+    result = jdp.compare_json_datasets(str(first), str(second))
+
+    assert result["status"] == "success"
+    assert result["comparison"]["size_change"] == -200
+    assert jdp.analyze_json_data_with_llm()["dataset_name"] == "first"
+    names = {d["name"] for d in jdp.list_json_datasets()["datasets"]}
+    assert names == {"first"}
+
+
+def test_compare_never_replaces_a_dataset_of_the_same_name(
+    tmp_path, records, monkeypatch
+):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    loaded, same_stem = tmp_path / "a" / "trace.json", tmp_path / "b" / "trace.json"
+    other = tmp_path / "other.json"
+    loaded.write_text(json.dumps(records))
+    same_stem.write_text(json.dumps(records[:120]))
+    other.write_text(json.dumps(records[:50]))
+    warehouse = TelemetryWarehouse(tmp_path / "telemetry.db")
+    monkeypatch.setattr(engine, "_warehouse", warehouse)
+    jdp.add_json_data(str(loaded))
+
+    result = jdp.compare_json_datasets(str(other), str(same_stem))
+
+    assert result["dataset2"]["records"] == 120
+    analysis = jdp.analyze_json_data_with_llm()
+    assert analysis["data_source"] == str(loaded)
+    assert analysis["num_records_analyzed"] == 300
+    assert [d["metadata"]["path"] for d in warehouse.datasets()] == [str(loaded)]
+
+
+def test_registry_evicts_idle_datasets_over_budget(records):
+    store = ColumnStore.from_records(records)
+    registry = DatasetRegistry(memory_budget_bytes=int(store.nbytes * 3.5))
+
+    for name in ["a", "b"]:
+        registry.register("s", name, {"data": store})
+    with registry.acquire("s", "a"):
+        registry.register("s", "c", {"data": store})
+        registry.register("s", "d", {"data": store})
+
+    assert [d["name"] for d in registry.list_datasets("s")] == ["a", "c", "d"]
+
+
+def test_parse_cache_reuses_unchanged_files(tmp_path, records):
+    path, copy = tmp_path / "a.json", tmp_path / "b.json"
+    path.write_text(json.dumps(records))
+    copy.write_text(json.dumps(records))
+
+    first = jdp.add_json_data(str(path))
+    again = jdp.add_json_data(str(path))
+    same_content = jdp.add_json_data(str(copy))
+
+    assert [first["loaded_from"], again["loaded_from"], same_content["loaded_from"]] == [
+        "parse",
+        "memory",
+        "memory",
+    ]
+    assert again["sample_record"] == first["sample_record"]
+    assert engine._registry.get("default", "b")["data"] is engine._registry.get(
+        "default", "a"
+    )["data"]
+
+
+def test_parse_cache_invalidates_changed_files(tmp_path, records):
+    path = tmp_path / "a.json"
+    path.write_text(json.dumps(records))
+    jdp.add_json_data(str(path))
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps(records[:10]))
+
+    path.write_text(json.dumps(records[:50]))
+    result = jdp.add_json_data(str(path))
+    comparison = jdp.compare_json_datasets(str(path), str(other))
+
+    assert (result["loaded_from"], result["num_records"]) == ("parse", 50)
+    assert comparison["dataset1"]["records"] == 50
+
+
+def test_snapshot_reopens_without_parsing(tmp_path, monkeypatch, records):
+    records[7]["neighbors"] = ["TX001", "TX002"]
+    path = tmp_path / "day.json"
+    path.write_text(json.dumps(records))
+    snapshots = SnapshotDirectory(tmp_path / "snapshots", min_source_bytes=0)
+    monkeypatch.setattr(engine._parse_cache, "persistent", snapshots)
+
+    first = jdp.add_json_data(str(path))
+    engine._parse_cache.clear()  # As if in a fresh process
+    reopened = jdp.add_json_data(str(path))
+
+    assert (first["loaded_from"], reopened["loaded_from"]) == ("parse", "snapshot")
+    assert reopened["sample_record"] == first["sample_record"]
+    assert list(engine._loaded_json_data["data"]) == records
+    # Rollups are persisted next to the snapshot instead of being rebuilt
+    rollups = engine._loaded_json_data["rollups"]
+    assert rollups.to_table().to_records() == (
+        TelemetryRollups.from_store(ColumnStore.from_records(records))
+        .to_table()
+        .to_records()
+    )
+
+    path.write_text(json.dumps(records[:20]))
+    engine._parse_cache.clear()
+    assert jdp.add_json_data(str(path))["loaded_from"] == "parse"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_csv_load_matches_json_analysis(tmp_path, records, streaming):
+    for record in records:
+        record["neighbors"] = ["TX001", "TX002"][: len(record["tower_id"]) % 3]
+    records[4]["latency_ms"] = None
+    path = tmp_path / "telemetry.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+    result = jdp.add_json_data(str(path), streaming=streaming)
+
+    assert (result["status"], result["num_records"]) == ("success", len(records))
+    assert result["sample_record"] == records[0]
+    for analysis_type in ["comprehensive", "energy", "health", "prediction"]:
+        analysis = jdp.analyze_json_data_with_llm(analysis_type)["analysis"]
+        assert analysis == engine._perform_analysis(records, analysis_type, [])
+    if not streaming:
+        loaded = engine._loaded_json_data["data"]
+        assert loaded[5] == records[5]
+        assert [r.get("latency_ms") for r in loaded][:6] == [
+            r["latency_ms"] for r in records[:6]
+        ]
+
+
+def test_merged_chunk_aggregates_match_single_pass(records):
+    store = ColumnStore.from_records(records)
+
+    merged = TelemetryAggregates.merge_all(
+        TelemetryAggregates.from_store(store[i : i + 70]) for i in range(0, 300, 70)
+    )
+
+    rollups = TelemetryRollups.from_store(store)
+    for analysis_type in ["comprehensive", "energy", "health", "prediction"]:
+        assert engine._analysis_from_aggregates(
+            merged, analysis_type, rollups
+        ) == engine._perform_analysis(records, analysis_type, [])
+
+
+def test_rollup_tiers_merge_like_a_single_pass(records):
+    store = ColumnStore.from_records(records)
+    whole = TelemetryRollups.from_store(store)
+    merged = TelemetryRollups.merge_all(
+        TelemetryRollups.from_store(store[i : i + 70]) for i in range(0, 300, 70)
+    )
+
+    def rows(rollups):
+        return sorted(
+            rollups.to_table().to_records(),
+            key=lambda r: (r["tier"], r["scope"], r["key"], r["bucket"]),
+        )
+
+    for row, expected in zip(rows(merged), rows(whole), strict=True):
+        assert row == pytest.approx(expected)
+    hourly = whole.series("tower", "TX003", "1h")
+    assert hourly["count"].sum() == sum(r["tower_id"] == "TX003" for r in records)
+    assert list(whole.series("fleet", "all", "1h")["count"]) == [60] * 5
+    assert whole.tier_for(12) == "5m"
+
+
+def test_streamed_rollups_drop_fine_tiers_past_the_row_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "STORE_CHUNK_ROWS", 1000)
+    monkeypatch.setattr(engine, "STREAM_ROLLUP_ROWS", 6000)
+
+    def streamed(num_records):
+        path = write_dataset(tmp_path / f"{num_records}.ndjson", num_records, 1, 20)
+        jdp.add_json_data(str(path), streaming=True)
+        dataset = engine._registry.get(engine.DEFAULT_SESSION)
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        return dataset, TelemetryRollups.from_store(ColumnStore.from_records(records))
+
+    def rows(rollups, tier):
+        table = rollups.to_table().to_records()
+        return sorted(
+            (r for r in table if r["tier"] == tier),
+            key=lambda r: (r["scope"], r["key"], r["bucket"]),
+        )
+
+    # 26 series (fleet, 5 regions, 20 towers) over 200 and 800 minutes
+    all_tiers = ["1m", "5m", "1h", "1d"]
+    for num_records, tiers in [(4000, all_tiers), (16000, all_tiers[1:])]:
+        dataset, whole = streamed(num_records)
+        rollups = dataset["rollups"]
+        assert list(rollups.tiers) == tiers
+        for tier in tiers:
+            pairs = zip(rows(rollups, tier), rows(whole, tier), strict=True)
+            for row, expected in pairs:
+                assert row == pytest.approx(expected)
+        assert dataset["nbytes"] == rollups.nbytes
+    assert dataset["nbytes"] < whole.nbytes / 4
+    # Trends still come from the (hourly) rollups
+    insights = jdp.analyze_json_data_with_llm("prediction")["analysis"]["insights"]
+    assert any("1h bucket" in insight for insight in insights)
+
+
+def test_trend_engine_matches_per_series_reference():
+    rng = np.random.default_rng(3)
+    hours = np.arange(24.0) + 480_000
+    values = rng.normal(50, 5, (40, 24)) + np.linspace(0, 12, 24)
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[7, -1] = 500  # Spike in the latest bucket
+
+    trends = SeriesTrends([f"TX{i:03d}" for i in range(40)], hours, values)
+
+    for row in range(40):
+        series = pd.Series(values[row])
+        seen = ~np.isnan(values[row])
+        slope = np.polyfit(hours[seen], values[row][seen], 1)[0]
+        assert trends.slope_per_hour[row] == pytest.approx(slope)
+        rolling = series.rolling(6, min_periods=1)
+        assert np.allclose(trends.rolling_mean[row], rolling.mean(), equal_nan=True)
+        # pandas' running sums leave ~1e-6 residue in single-value windows
+        assert np.allclose(
+            trends.rolling_std[row], rolling.std(ddof=0), atol=1e-5, equal_nan=True
+        )
+        ewm = series.ewm(alpha=0.3, adjust=False, ignore_na=True).mean()
+        assert np.allclose(trends.ewma[row], ewm, equal_nan=True)
+    assert trends.anomalous_last[7]
+    assert trends.top("z_last", 1) == ["TX007"]
+
+
+def test_process_pool_aggregation_matches_serial(records):
+    store = ColumnStore.from_records(records)
+
+    parallel = aggregate(store, workers=2, min_rows=1)
+
+    assert store.snapshot is not None  # Workers read a temporary snapshot
+    assert engine._analysis_from_aggregates(parallel, "comprehensive") == (
+        engine._perform_analysis(records, "comprehensive", [])
+    )
+
+
+def test_sampler_picks_each_record_once(records, monkeypatch):
+    monkeypatch.setattr(telemetry_sampling, "SCAN_CHUNK_ROWS", 64)
+    records.append(dict(records[3]))  # Equal content, but a distinct record
+    store = ColumnStore.from_records(records)
+
+    rows = telemetry_sampling.sample_indices(store, 50).tolist()
+
+    assert len(rows) == len(set(rows)) <= 50
+    errors = [i for i, r in enumerate(records) if r["detected_error"] != "none"]
+    assert rows[:16] == errors[:16]
+    by_bandwidth = sorted(
+        range(len(records)), key=lambda i: records[i]["bandwidth_utilization_pct"]
+    )
+    assert set(by_bandwidth[:5] + by_bandwidth[-5:]) <= set(rows)
+    assert engine._sample_data_intelligently(store, 50) == [records[i] for i in rows]
+
+
+def test_stratified_and_reservoir_samples_are_seeded(records):
+    store = ColumnStore.from_records(records)
+
+    rows = telemetry_sampling.stratified_indices(store, "tower_id", 2, seed=3)
+
+    assert rows.tolist() == sorted(rows.tolist())
+    towers = [records[i]["tower_id"] for i in rows]
+    assert sorted(set(towers)) == sorted({r["tower_id"] for r in records})
+    assert all(towers.count(t) == 2 for t in towers)
+    assert rows.tolist() == telemetry_sampling.stratified_indices(
+        store, "tower_id", 2, seed=3
+    ).tolist()
+
+    samples = []
+    for _ in range(2):
+        sampler = telemetry_sampling.ReservoirSampler(4, seed=3, by="region_id")
+        sampler.extend(records)
+        samples.append(sampler.sample)
+    assert samples[0] == samples[1] and len(samples[0]) == 4 * 5
+
+
+def test_indexed_filters_match_a_scan(records):
+    store = ColumnStore.from_records(records)
+
+    def scan(tower=None, region=None, start=None, end=None):
+        return [
+            r
+            for r in records
+            if (tower is None or r["tower_id"] == tower)
+            and (region is None or r["region_id"] == region)
+            and (start is None or r["timestamp"] >= start)
+            and (end is None or r["timestamp"] < end)
+        ]
+
+    start, end = "2025-10-31T01:30:00+00:00", "2025-10-31T03:00:00+00:00"
+    for args in [
+        ("TX003", None),
+        (None, "R-B"),
+        ("TX003", "R-D"),  # Tower 3 is in region D
+        ("TX003", "R-A"),
+        ("TX999", None),
+        ("TX003", None, start),
+        (None, "R-B", start, end),
+        (None, None, None, end),
+    ]:
+        filtered = engine._filter_data(store, *args)
+        assert filtered.to_records() == scan(*args)
+
+    with pytest.raises(ValueError):
+        engine._filter_data(store, None, None, "yesterday-ish")
+
+
+def test_diff_reports_tower_and_error_shifts(tmp_path, records):
+    later = [dict(r) for r in records if r["tower_id"] != "TX000"]
+    for r in later:
+        r["latency_ms"] += 10
+    later.append(dict(records[0], tower_id="TX100", detected_error="overheat"))
+    first, second = tmp_path / "first.json", tmp_path / "second.csv"
+    first.write_text(json.dumps(records))
+    with open(second, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(later)
+
+    loaded = jdp.compare_json_datasets(str(first), str(second), bucket_minutes=30)
+    engine._registry.clear()
+    streamed = jdp.compare_json_datasets(str(first), str(second), streaming=True)
+
+    comparison = loaded["comparison"]
+    assert json.loads(json.dumps(comparison)) == comparison
+    assert (comparison["towers"]["new"], comparison["towers"]["removed"]) == (
+        ["TX100"],
+        ["TX000"],
+    )
+    assert comparison["errors"]["overheat"] == {
+        "dataset1": 0,
+        "dataset2": 1,
+        "change": 1,
+    }
+    top = comparison["tower_changes"][0]
+    assert top["deltas"]["latency_ms"] == 10.0
+    untouched = ({"R-A", "R-B", "R-C"} - {records[0]["region_id"], "R-A"}).pop()
+    assert comparison["regions"][untouched]["metrics"]["latency_ms"]["change"] == 10.0
+    assert streamed["comparison"]["towers"] == comparison["towers"]
+    assert jdp.list_json_datasets()["datasets"] == []  # Nothing was loaded
+
+
+def test_tool_results_are_compacted_to_the_token_budget(
+    tmp_path, records, monkeypatch
+):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    first.write_text(json.dumps(records))
+    second.write_text(json.dumps([dict(r, latency_ms=1) for r in records[::2]]))
+    full = jdp.compare_json_datasets(str(first), str(second))
+    assert "compaction" not in full  # Within the default budget: unchanged
+
+    monkeypatch.setattr(
+        payload_compactor, "TOOL_TOKEN_BUDGETS", {"compare_json_datasets": 150}
+    )
+    compacted = jdp.compare_json_datasets(str(first), str(second))
+
+    assert compacted["status"] == "success"
+    assert compacted["compaction"]["tokens_before"] == (
+        payload_compactor.estimate_tokens(full)
+    )
+    assert compacted["compaction"]["tokens_after"] <= 150
+    assert payload_compactor.compact(full, 10**6) is full
+
+
+def test_compaction_tabulates_and_deduplicates():
+    towers = [f"TX{i:03d}" for i in range(40)]
+    result = {
+        "status": "success",
+        "rows": [{"tower_id": t, "latency_ms": i} for i, t in enumerate(towers)],
+        "first": {"towers": towers},
+        "second": {"towers": towers},
+    }
+    compacted = payload_compactor.compact(result, 200)
+
+    assert compacted["rows"]["columns"] == ["tower_id", "latency_ms"]
+    assert compacted["rows"]["rows"][0] == ["TX000", 0]
+    assert compacted["second"] == "(same as first)"
+    assert compacted["compaction"]["tokens_after"] <= 200
+
+
+def test_diff_spills_to_disk_with_the_same_result(records):
+    store = ColumnStore.from_records(records)
+    chunks = [store[i : i + 50] for i in range(0, len(store), 50)]
+
+    in_memory = diff_datasets(chunks, [store[::-1]])
+    spilled = diff_datasets(chunks, [store[::-1]], spill_keys=7)
+
+    assert spilled == in_memory
+    assert in_memory["time_buckets"]["only_dataset1"] == 0
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_append_matches_loading_all_records(tmp_path, records, streaming):
+    head, tail = tmp_path / "head.json", tmp_path / "tail.ndjson"
+    head.write_text(json.dumps(records[:200]))
+    tail.write_text("\n".join(json.dumps(r) for r in records[200:]) + "\n")
+    jdp.add_json_data(str(head), streaming=streaming)
+    jdp.analyze_json_data_with_llm("comprehensive")
+
+    result = jdp.append_json_data(str(tail))
+
+    assert (result["status"], result["records_appended"]) == ("success", 100)
+    assert (result["num_records"], result["version"]) == (len(records), 1)
+    for analysis_type in ["comprehensive", "energy", "health", "prediction"]:
+        analysis = jdp.analyze_json_data_with_llm(analysis_type)["analysis"]
+        assert analysis == engine._perform_analysis(records, analysis_type, [])
+    if not streaming:
+        filtered = jdp.get_recommendations_from_json(tower_id="TX003")
+        assert filtered["records_analyzed"] == sum(
+            r["tower_id"] == "TX003" for r in records
+        )
+
+
+def test_appends_grow_shared_buffers_and_keep_old_versions(records):
+    for r in records[250:]:
+        r["tower_id"] = "TX999"  # A category the earlier rows lack
+        del r["latency_ms"]
+    chunks = [ColumnStore.from_records(records[i : i + 50]) for i in range(0, 300, 50)]
+    versions = [chunks[0]]
+    for chunk in chunks[1:]:
+        versions.append(versions[-1].append(chunk))
+
+    for i, store in enumerate(versions):
+        assert store.to_records() == ColumnStore.concat(chunks[: i + 1]).to_records()
+    # Later versions wrote into the buffers of earlier ones, not into copies
+    codes = versions[-1].columns["tower_id"].codes
+    assert np.shares_memory(codes, versions[2].columns["tower_id"].codes)
+    # An append to an older version copies instead of overwriting its successor
+    branch = versions[2].append(chunks[0])
+    assert branch.to_records()[150:] == chunks[0].to_records()
+    assert versions[3].to_records() == ColumnStore.concat(chunks[:4]).to_records()
+
+
+def test_repeat_calls_are_cached_until_reload_or_append(tmp_path, records):
+    head, tail = tmp_path / "head.json", tmp_path / "tail.json"
+    head.write_text(json.dumps(records[:200]))
+    tail.write_text(json.dumps(records[200:]))
+    jdp.add_json_data(str(head))
+
+    first = jdp.analyze_json_data_with_llm("health")
+    first["analysis"]["insights"].clear()  # Callers get their own copy
+    hits = engine._result_cache.hits
+    again = jdp.analyze_json_data_with_llm("health")
+    assert engine._result_cache.hits == hits + 1
+    assert again["analysis"]["insights"]
+    assert jdp.get_recommendations_from_json(tower_id="TX001") == (
+        jdp.get_recommendations_from_json(tower_id="TX001")
+    )
+    assert engine._result_cache.hits == hits + 2
+
+    jdp.append_json_data(str(tail))
+    assert jdp.analyze_json_data_with_llm("health")["num_records_analyzed"] == 300
+    assert len(engine._result_cache) == 1  # Entries of the old version were dropped
+
+    jdp.add_json_data(str(head))
+    assert jdp.analyze_json_data_with_llm("health")["num_records_analyzed"] == 200
+    assert engine._result_cache.hits == hits + 2
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_invalid_records_are_quarantined_with_a_report(
+    tmp_path, records, streaming, monkeypatch
+):
+    # Streamed in batches of two, so the rejected rows span several batches
+    monkeypatch.setattr(engine, "STORE_CHUNK_ROWS", 2)
+    dirty = [dict(r) for r in records[:20]]
+    dirty[0]["bandwidth_utilization_pct"] = "high"
+    dirty[1]["bandwidth_utilization_pct"] = "45.5"
+    dirty[2]["latency_ms"] = -4
+    dirty[3]["timestamp"] = "yesterday"
+    path = tmp_path / ("dirty.ndjson" if streaming else "dirty.json")
+    if streaming:
+        path.write_text("\n".join(json.dumps(r) for r in dirty) + "\n")
+    else:
+        path.write_text(json.dumps(dirty))
+
+    result = jdp.add_json_data(str(path), streaming=streaming)
+
+    assert result["num_records"] == 17
+    validation = result["validation"]
+    assert (validation["records"], validation["quarantined"]) == (20, 3)
+    assert validation["coerced_fields"] == {"bandwidth_utilization_pct": 1}
+    assert [e["row"] for e in validation["examples"]] == [0, 2, 3]
+    summary = jdp.analyze_json_data_with_llm("comprehensive")["analysis"]["summary"]
+    valid = [r for i, r in enumerate(dirty) if i not in (0, 2, 3)]
+    valid[0]["bandwidth_utilization_pct"] = 45.5
+    assert summary == engine._perform_analysis(valid, "comprehensive", [])["summary"]
+    if not streaming:
+        quarantine = engine._registry.get(engine.DEFAULT_SESSION)["quarantine"]
+        assert quarantine.columns["source_row"].values.tolist() == [0, 2, 3]
+
+
+def test_query_filters_groups_and_aggregates(tmp_path, records):
+    path = tmp_path / "telemetry.json"
+    path.write_text(json.dumps(records))
+    jdp.add_json_data(str(path))
+    df = pd.DataFrame(records)
+
+    result = jdp.query_json_data(
+        ["p95(latency_ms)", "count", "distinct(tower_id)"],
+        ["region_id"],
+        ["detected_error != none", "latency_ms >= 20"],
+    )
+
+    expected = df[(df.detected_error != "none") & (df.latency_ms >= 20)]
+    groups = expected.groupby("region_id")
+    assert result["columns"] == [
+        "region_id",
+        "p95(latency_ms)",
+        "count",
+        "distinct(tower_id)",
+    ]
+    assert result["records_matched"] == len(expected)
+    assert result["rows"] == [
+        [region, round(p95, 2), count, towers]
+        for region, p95, count, towers in zip(
+            groups.groups,
+            groups.latency_ms.quantile(0.95),
+            groups.size(),
+            groups.tower_id.nunique(),
+        )
+    ]
+
+    top = jdp.query_json_data(
+        ["avg(cpu_util_pct)"],
+        ["tower_id"],
+        ["region_id in R-A,R-B"],
+        order_by="avg(cpu_util_pct)",
+        limit=2,
+    )
+    cpu = df[df.region_id.isin(["R-A", "R-B"])].groupby("tower_id").cpu_util_pct
+    assert [row[0] for row in top["rows"]] == list(cpu.mean().nlargest(2).index)
+    assert top["omitted"] == f"{top['num_groups'] - 2} more of {top['num_groups']} rows"
+    assert jdp.query_json_data(where=["latency_ms > fast"])["status"] == "error"
+
+
+def test_warehouse_datasets_survive_a_restart(tmp_path, records, monkeypatch):
+    db = tmp_path / "telemetry.db"
+    head, tail = tmp_path / "head.json", tmp_path / "tail.json"
+    head.write_text(json.dumps(records[:200]))
+    tail.write_text(json.dumps(records[200:]))
+    monkeypatch.setattr(telemetry_warehouse, "INSERT_BATCH_ROWS", 64)
+    monkeypatch.setattr(engine, "_warehouse", TelemetryWarehouse(db))
+    jdp.add_json_data(str(head))
+    jdp.append_json_data(str(tail))
+    queries = [
+        {},
+        {"tower_id": "TX003"},
+        {"region_id": "R-B", "start_time": "2025-10-31T02:00:00Z"},
+    ]
+    analyses = [
+        jdp.analyze_json_data_with_llm(t) for t in ["comprehensive", "prediction"]
+    ]
+    recommendations = [jdp.get_recommendations_from_json(**q) for q in queries]
+    query = jdp.query_json_data(["p95(latency_ms)"], ["tower_id"], ["region_id = R-B"])
+
+    # A new process only reads the dataset metadata back
+    engine._registry.clear()
+    engine._result_cache.clear()
+    monkeypatch.setattr(engine, "_warehouse", TelemetryWarehouse(db))
+    assert engine._restore_datasets() == 1
+    dataset = engine._registry.get(engine.DEFAULT_SESSION)
+    assert (dataset["data"], dataset["num_records"]) == (None, 300)
+
+    assert analyses == [
+        jdp.analyze_json_data_with_llm(t) for t in ["comprehensive", "prediction"]
+    ]
+    assert recommendations == [jdp.get_recommendations_from_json(**q) for q in queries]
+    assert query == jdp.query_json_data(
+        ["p95(latency_ms)"], ["tower_id"], ["region_id = R-B"]
+    )
+    stored = ColumnStore.concat(list(engine._iter_stores(dataset)))
+    assert stored.to_records() == records
+
+
+@pytest.mark.parametrize("suffix", [".json", ".ndjson", ".csv"])
+def test_synthetic_fleet_is_deterministic_and_loadable(tmp_path, suffix):
+    first = write_dataset(tmp_path / f"a{suffix}", 3000, seed=5)
+    second = write_dataset(tmp_path / f"b{suffix}", 3000, seed=5)
+    assert first.read_bytes() == second.read_bytes()
+
+    # NDJSON is only read by the streaming loader
+    result = jdp.add_json_data(str(first), streaming=suffix == ".ndjson")
+
+    assert (result["status"], result["num_records"]) == ("success", 3000)
+    assert result["fields"] == FIELDS
+    with open("data/trace_reduced_20.json") as f:
+        assert list(json.load(f)[0]) == FIELDS
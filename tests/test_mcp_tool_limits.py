@@ -0,0 +1,41 @@
+"""
+Tests for the bounded execution of MCP tool calls in aws_integration/mcp_servers
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+MCP_SERVERS = Path(__file__).parent.parent / "aws_integration" / "mcp_servers"
+sys.path.insert(0, str(MCP_SERVERS))
+
+import tool_limits  # noqa: E402
+
+
+def test_saturated_tool_is_rejected_without_blocking_the_loop(monkeypatch):
+    monkeypatch.setitem(tool_limits.TOOL_LIMITS, "slow_tool", 2)
+    release = threading.Event()
+
+    @tool_limits.offloaded
+    def slow_tool(value: int) -> dict:
+        release.wait(5)
+        return {"status": "success", "value": value}
+
+    async def scenario():
+        calls = [asyncio.create_task(slow_tool(i)) for i in range(2)]
+        await asyncio.sleep(0.05)  # Both calls hold their slots now
+        rejected = await slow_tool(2)
+        release.set()
+        return rejected, await asyncio.gather(*calls)
+
+    rejected, results = asyncio.run(scenario())
+
+    assert rejected["status"] == "error"
+    assert rejected["error_code"] == 429
+    assert rejected["retry_after_seconds"] > 0
+    assert [r["value"] for r in results] == [0, 1]
+
+    load = tool_limits.tool_load()
+    assert load["rejected"]["slow_tool"] == 1
+    assert "slow_tool" not in load["in_flight"]  # Slots were released
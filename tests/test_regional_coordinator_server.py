@@ -0,0 +1,44 @@
+"""
+Tests for the Regional Coordinator MCP server in aws_integration/mcp_servers
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+MCP_SERVERS = Path(__file__).parent.parent / "aws_integration" / "mcp_servers"
+sys.path.insert(0, str(MCP_SERVERS))
+
+import regional_coordinator_server as server  # noqa: E402
+
+
+def test_batch_tools_return_one_row_per_tower():
+    towers = ["TX003", "TX009", "TX012"]
+    kpis = asyncio.run(server.collect_ran_kpis_batch(tower_ids=", ".join(towers)))
+
+    assert kpis["status"] == "success"
+    assert kpis["num_towers"] == 3
+    assert [row[0] for row in kpis["rows"]] == towers
+    single = asyncio.run(server.collect_ran_kpis("TX003"))
+    assert kpis["columns"] == ["tower_id", *single["kpis"], *single["last_hour"]]
+
+    region = server._fleet.towers("R-A")
+    decisions = asyncio.run(
+        server.make_energy_decision_batch(region_id="R-A", hours_ahead=6)
+    )
+    assert decisions["num_towers"] == len(decisions["rows"]) == len(region)
+    assert sum(decisions["towers_by_decision"].values()) == len(region)
+    forecast = decisions["columns"].index("forecast_load_pct")
+    assert all(0 <= row[forecast] <= 100 for row in decisions["rows"])
+    energy = asyncio.run(server.make_energy_decision("TX003", 20, 25))
+    assert energy["tower_id"] == "TX003"
+    assert 0 <= energy["safety_score"] <= 1
+
+    unknown = asyncio.run(server.collect_ran_kpis_batch(tower_ids="TX003,tower_1"))
+    assert unknown["status"] == "error"
+    assert "tower_1" in unknown["message"]
+
+    too_many = ",".join(f"t{i}" for i in range(server.BATCH_MAX_TOWERS + 1))
+    assert asyncio.run(server.get_tower_status_batch(tower_ids=too_many))[
+        "status"
+    ] == "error"
@@ -0,0 +1,59 @@
+"""
+Tests for the stateful tower fleet in telemetry_core.telemetry_fleet
+"""
+
+import json
+
+from telemetry_core.telemetry_fleet import TowerFleet, replay_source, synthetic_source
+
+
+def test_fleet_rings_follow_the_simulated_clock(tmp_path):
+    trace = [
+        {
+            "timestamp": f"2025-10-31T00:{minute:02d}:00+00:00",
+            "region_id": "R-A",
+            "tower_id": tower_id,
+            "bandwidth_utilization_pct": float(minute),
+            "detected_error": "none" if minute % 3 else "high_cpu",
+        }
+        for minute in range(10)
+        for tower_id in ("TX000", "TX001")
+    ]
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps(trace[::-1]))  # Replay sorts by timestamp
+    clock = [0.0]
+    fleet = TowerFleet(replay_source(path, loop=False), 4, 60, lambda: clock[0])
+
+    # Warm-up fills the rings; nothing more arrives until the clock moves
+    assert fleet.towers("R-A") == ["TX001", "TX000"]
+    assert fleet.latest("TX000")["timestamp"] == "2025-10-31T00:03:00+00:00"
+    assert fleet.sync() == 0
+
+    clock[0] = 2.0  # Two simulated minutes
+    window = fleet.window("TX000")
+    assert list(window["bandwidth_utilization_pct"]) == [2.0, 3.0, 4.0, 5.0]
+    assert list(window["errors"]) == [False, True, False, False]
+    assert fleet.records_ingested == 12
+    recent = fleet.window("TX000", seconds=60)
+    assert list(recent["bandwidth_utilization_pct"]) == [4.0, 5.0]
+
+
+def test_sync_after_a_long_idle_reads_only_the_rounds_kept():
+    clock = [0.0]
+    fleet = TowerFleet(synthetic_source(20, seed=1), 8, 1, lambda: clock[0])
+    # A plain iterator cannot skip: this fleet reads every round due
+    reader = TowerFleet(
+        (r for r in synthetic_source(20, seed=1)), 8, 1, lambda: clock[0]
+    )
+    ingested = fleet.records_ingested
+    clock[0] = 24 * 3600.0  # A day idle: 1,440 rounds of 20 towers
+
+    assert fleet.sync() == fleet.records_ingested - ingested <= 9 * 20
+
+    # The rings hold the last rounds due, as if every round had been read
+    reader.sync()
+    times = fleet.window("TX000")["times"]
+    assert list(times) == [fleet.now() - 60 * i for i in range(7, -1, -1)]
+    for tower_id in fleet.towers():
+        assert fleet.latest(tower_id) == reader.latest(tower_id)
+        assert str(fleet.window(tower_id)) == str(reader.window(tower_id))
@@ -0,0 +1,125 @@
+"""
+Tests for the trace replay engine in telemetry_core.telemetry_replay
+"""
+
+import json
+import time
+
+from principal_agent.parent_agents.regional_coordinator.edge_agents.replay import (
+    edge_stages,
+    replay_trace,
+)
+from telemetry_core.telemetry_fleet import TowerFleet
+from telemetry_core.telemetry_replay import LatencyStats, TraceReplay
+
+
+def test_replay_keeps_tower_order_under_backpressure():
+    trace = [
+        {"timestamp": f"2025-10-31T00:00:{second:02d}+00:00", "tower_id": f"TX00{i}"}
+        for second in range(20)
+        for i in range(3)
+    ]
+    seen = {}
+
+    def monitor(context):
+        record = context["record"]
+        seen.setdefault(record["tower_id"], []).append(record["timestamp"])
+        time.sleep(0.001)  # Slower than the producer: the queues fill up
+        return {"status": "success"}
+
+    def decide(context):
+        if context["record"]["timestamp"].endswith(":05+00:00"):
+            return {"status": "error", "message": "rejected"}
+        return None  # Nothing to act on
+
+    def act(context):
+        raise AssertionError("Decisions returned no action")
+
+    stages = [("monitoring", monitor), ("decision", decide), ("action", act)]
+    report = TraceReplay(stages, speed=None, workers=2, queue_size=1).run(trace)
+
+    assert seen == {f"TX00{i}": sorted(seen[f"TX00{i}"]) for i in range(3)}
+    assert report["records"] == 60
+    assert report["backpressure"]["blocked_puts"] > 0
+    assert report["stages"]["monitoring"]["calls"] == 60
+    assert report["stages"]["decision"]["failed"] == 3
+    assert report["stages"]["action"]["calls"] == 0
+    assert report["end_to_end"]["records"] == 57
+
+    # Paced: 18 simulated seconds take at least 0.09 s at 200x
+    paced = TraceReplay(stages[:1], speed=200).run(trace[3:] + trace[:3])
+    assert paced["out_of_order_dropped"] == 3  # The first round, played last
+    assert paced["elapsed_seconds"] >= 18 / 200
+
+
+class _FussyFleet(TowerFleet):
+    def ingest(self, record: dict) -> None:
+        if record["tower_id"] == "TX-BAD":
+            raise KeyError("region_id")
+        super().ingest(record)
+
+
+def test_bad_records_are_counted_without_stopping_the_replay():
+    warm_up = [{"timestamp": "2025-10-31T00:00:00+00:00", "tower_id": "TX000"}]
+    fleet = _FussyFleet(warm_up, ring_size=2, clock=lambda: 0.0)
+    trace = [
+        {"timestamp": f"2025-10-31T00:00:{second:02d}+00:00", "tower_id": "TX000"}
+        for second in range(1, 11)
+    ]
+    trace[2]["tower_id"] = "TX-BAD"  # Rejected by the fleet
+    trace[5]["timestamp"] = "yesterday"  # Rejected by the replay
+
+    def monitor(context):
+        return {"success": not context["record"]["timestamp"].endswith("9+00:00")}
+
+    replay = TraceReplay(
+        [("monitoring", monitor)], None, 1, 2, fleet, continue_on_failure=["monitoring"]
+    )
+    report = replay.run(trace)
+
+    assert (report["records"], report["invalid_dropped"]) == (9, 1)
+    ingest = report["stages"]["ingest"]
+    assert (ingest["calls"], ingest["errors"]) == (9, 1)
+    assert ingest["last_error"] == "KeyError: 'region_id'"
+    assert report["stages"]["monitoring"]["failed"] == 1
+    assert report["end_to_end"]["records"] == 8  # The failed stream went on
+    assert fleet.latest("TX000")["timestamp"] == trace[-1]["timestamp"]
+
+
+def test_latency_stats_keep_a_fixed_size_sample():
+    stats = LatencyStats(samples=16)
+    for ms in range(1, 1001):
+        stats.add(ms / 1000)
+
+    summary = stats.summary()
+
+    assert len(stats._sample.sample) == 16
+    assert (stats.count, summary["mean_ms"], summary["max_ms"]) == (1000, 500.5, 1000)
+    assert 1 <= summary["p50_ms"] <= 1000
+
+
+def test_edge_replay_forecasts_from_the_replayed_load(tmp_path):
+    # Load rising by 2% every 5 minutes, i.e. 24% an hour
+    trace = [
+        {
+            "timestamp": f"2025-10-31T10:{minutes:02d}:00+00:00",
+            "tower_id": "TX001",
+            "region_id": "R-A",
+            "bandwidth_utilization_pct": 10 + 2 * (minutes // 5),
+        }
+        for minutes in range(0, 60, 5)
+    ]
+    fleet = TowerFleet(())
+    for record in trace:
+        fleet.ingest(record)
+
+    predict = dict(edge_stages(fleet))["prediction"]
+    forecast = predict({"record": trace[-1]})["forecast"]
+
+    assert forecast[0]["timestamp"] == "2025-10-31T11:55:00+00:00"
+    assert forecast[0]["predicted_load_pct"] == 56.0
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps(trace))
+    report = replay_trace(str(path), speed=None, workers=1)
+    ingest, prediction = report["stages"]["ingest"], report["stages"]["prediction"]
+    assert (ingest["calls"], prediction["calls"], prediction["errors"]) == (12, 12, 0)